@@ -1,115 +1,105 @@
-# import cv2
-import numpy as np
-from src.utils import VideoUtils
-from src.tracker import Tracker
-from src.team_assigner import TeamAssigner
-from src.ball_assigner import BallAssigner
-from src.camera_movement_estimator import CameraMovementEstimator
-from src.view_transformer import ViewTransformer
-from src.speed_and_distance_estimator import SpeedAndDistanceEstimator
+import argparse
+from src.pipeline import Pipeline
+from src.stage_cache import StageCache
+from src.profiler import StageProfiler
+from src.segment_runner import SegmentRunner
+from src.batch_runner import BatchRunner
 
 import warnings
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
-def main():
-    print("Initializing video utilities...\n")
-    vu = VideoUtils()
-
-    print("Initializing tracker with model...\n")
-    tracker = Tracker('./models/best.pt')
-
-    # Input and output paths
-    input_video_path = './input_videos/input.mp4'
-    output_video_path = './output_videos/output.mp4'
-    tracks_stub_path = './stubs/track_stubs.pkl'
-    camera_movement_stub_path = './stubs/camera_movement_stubs.pkl'
-
-    print(f"Reading video frames from: {input_video_path}")
-    video_frames = vu.read_video(input_video_path)
-    print(f"Total frames loaded: {len(video_frames)}\n")
-
-    print("Getting object tracks...")
-    tracks = tracker.get_object_tracks(video_frames, 
-                                       read_from_stub=True,
-                                       stub_path=tracks_stub_path)
-    print("Object tracking complete.\n")
-
-    print("Adding position to tracks...")
-    tracker.add_position_to_tracks(tracks)
-    print("Adding position to tracks complete.\n")
-
-    print("Estimating camera movements...")
-    camera_movement_estimator = CameraMovementEstimator(video_frames[0])
-    camera_movement_per_frame = camera_movement_estimator.get_camera_movement(video_frames, 
-                                                                              read_from_stub=True,
-                                                                              stub_path=camera_movement_stub_path)
-    print("Camera movement estimation complete.\n")
-
-    print("Adjusting track positions...")
-    camera_movement_estimator.adjust_track_positions(tracks, camera_movement_per_frame)
-    print("Adjusting track positions complete.\n")
-
-    print("Adjusting view transformations...")
-    view_transformer = ViewTransformer()
-    view_transformer.add_transformed_position_to_tracks(tracks)
-    print("Adjusting view transformations complete.\n")
-
-    print("Interpolating ball positions...")
-    tracks['ball'] = tracker.interpolate_ball_position(tracks['ball'])
-    print("Ball position interpolation complete.\n")
-
-    print("Estimating speed and distance...")
-    speed_and_distance_estimator = SpeedAndDistanceEstimator()
-    speed_and_distance_estimator.add_speed_and_distance_to_tracks(tracks)
-    print("Estimating speed and distance complete.\n")
+def parse_args():
+    parser = argparse.ArgumentParser(description='AI Football Analysis')
+    parser.add_argument('--input', default='./input_videos/input.mp4', help='input video path')
+    parser.add_argument('--output', default='./output_videos/output.mp4', help='output video path')
+    parser.add_argument('--model', default='./models/best.pt', help='YOLO model path, .pt runs on PyTorch and .onnx on ONNX Runtime')
+    parser.add_argument('--batch', default=None, help='directory of videos or manifest file (one "input[,output]" per line) processed by a pool of worker processes')
+    parser.add_argument('--batch-output-dir', default='./output_videos/batch', help='output directory of batch videos, logs and job queue')
+    parser.add_argument('--batch-workers', type=int, default=1, help='worker processes of batch, each loads model once and takes jobs from queue')
+    parser.add_argument('--batch-queue', default=None, help='SQLite job queue, default is batch_queue.sqlite in --batch-output-dir')
+    parser.add_argument('--max-attempts', type=int, default=3, help='attempts of a batch job before it is marked failed')
+    parser.add_argument('--retry-failed', action='store_true', help='queue failed jobs of an earlier batch run again')
+    parser.add_argument('--stream', action='store_true', help='process video in bounded windows instead of loading all frames')
+    parser.add_argument('--live', action='store_true', help='process frames online as they arrive from --input (file, RTSP URL or camera index)')
+    parser.add_argument('--latency-budget', type=float, default=100, help='in live mode, max milliseconds from capture to annotated frame before work is dropped')
+    parser.add_argument('--no-realtime', action='store_true', help='in live mode, read input file as fast as possible instead of at its frame rate')
+    parser.add_argument('--window-size', type=int, default=240, help='frames per window in streaming mode')
+    parser.add_argument('--predict-ball', action='store_true', help='in streaming mode, predict ball missing at end of window with constant velocity')
+    parser.add_argument('--keyframe-stride', type=int, default=1, help='run detector every N frames (or on scene change / fast motion) and propagate boxes by optical flow in between')
+    parser.add_argument('--low-resolution', type=int, default=None, help='detect players and referees on frames downscaled to this long side (pixels) and ball on full resolution crop')
+    parser.add_argument('--ball-roi-size', type=int, default=256, help='size (pixels) of full resolution crop around predicted ball position, with --low-resolution')
+    parser.add_argument('--workers', type=int, default=1, help='split video into time segments processed by this many worker processes (offline mode)')
+    parser.add_argument('--segment-overlap', type=int, default=24, help='frames shared by neighbouring segments, used to stitch track ids')
+    parser.add_argument('--checkpoint-dir', default=None, help='write tracks in chunks with tracker snapshots here, rerun after a crash resumes from last chunk (offline mode)')
+    parser.add_argument('--checkpoint-chunk', type=int, default=1000, help='frames per tracking checkpoint chunk')
+    parser.add_argument('--no-save-tracks', action='store_true', help='do not save final tracks next to output video (offline mode), they are needed to query a finished match')
+    parser.add_argument('--camera-scale', type=float, default=1.0, help='downscale factor for camera movement estimation, lower is faster')
+    parser.add_argument('--speed-window', type=int, default=5, help='frames over which player speed and distance are measured')
+    parser.add_argument('--max-speed', type=float, default=None, help='speeds above this (km/h) are treated as tracking glitches and smoothed')
+    parser.add_argument('--cache-dir', default='./cache', help='directory for cached stage results')
+    parser.add_argument('--cache-size-gb', type=float, default=10, help='max size of stage cache, least recently used results are evicted')
+    parser.add_argument('--no-cache', action='store_true', help='always recompute every stage')
+    parser.add_argument('--profile', action='store_true', help='record time and memory of every stage (or set AI_FOOTBALL_PROFILE=1)')
+    parser.add_argument('--profile-frames', action='store_true', help='also record per-frame latency histograms of detection and rendering')
+    parser.add_argument('--profile-output', default='./output_videos/profile_report.json', help='JSON profiling report, readable summary is saved next to it')
+    parser.add_argument('--use-stubs', action='store_true', help='read tracks and camera movement from stubs instead of cache')
+    parser.add_argument('--tracks-stub', default='./stubs/track_stubs.pkl', help='tracks stub, .pkl or columnar directory (required for --stream)')
+    parser.add_argument('--camera-movement-stub', default='./stubs/camera_movement_stubs.pkl', help='camera movement stub, .pkl or columnar directory')
+    return parser.parse_args()
 
-    print("Initializing team assigner...")
-    team_assigner = TeamAssigner()
-    print("Assigning team colors for the first frame...")
-    team_assigner.assign_team_color(video_frames[0], tracks['players'][0])
-    print("Team color assignment complete.\n")
-
-    print("Assigning teams to players across frames...")
-    for frame_num, player_track in enumerate(tracks['players']):
-        for player_id, track in player_track.items():
-            team = team_assigner.get_player_team(video_frames[frame_num], track['bbox'], player_id)
-            tracks['players'][frame_num][player_id]['team'] = team
-            tracks['players'][frame_num][player_id]['team_color'] = team_assigner.team_colors[team]
-    print("Player team assignment complete.\n")
-
-    print("Initializing ball assigner...")
-    ball_assigner = BallAssigner()
-    team_ball_control = []
-
-    print("Assigning ball possession...")
-    for frame_num, player_track in enumerate(tracks['players']):
-        ball_bbox = tracks['ball'][frame_num][1]['bbox']  # track ID 1 for ball
-        assigned_player = ball_assigner.assign_ball_to_player(player_track, ball_bbox)
-
-        if assigned_player != -1:
-            tracks['players'][frame_num][assigned_player]['has_ball'] = True
-            team_ball_control.append(tracks['players'][frame_num][assigned_player]['team'])
-        else:
-            team_ball_control.append(team_ball_control[-1] if team_ball_control else -1)  # handle initial case
-    print("Ball possession assignment complete.\n")
-
-    team_ball_control = np.array(team_ball_control)
-
-    print("Drawing object tracks on frames...")
-    output_video_frames = tracker.draw_annotations(video_frames, tracks, team_ball_control)
-    print("Object tracks drawn.\n")
-
-    print("Drawing camera movement indicators...")
-    output_video_frames = camera_movement_estimator.draw_camera_movement(output_video_frames, camera_movement_per_frame)
-    print("Camera movement drawing complete.\n")
-
-    print("Drawing speed and distance indicators...")
-    output_video_frames = speed_and_distance_estimator.draw_speed_and_distance(output_video_frames, tracks)
-    print("Drawing speed and distance indicators complete.\n")
-
-    print(f"Saving output video to: {output_video_path}")
-    vu.save_video(output_video_frames, output_video_path)
-    print("Video saved successfully.\n")
+def main():
+    args = parse_args()
+
+    # stub paths, only used with --use-stubs
+    tracks_stub_path = args.tracks_stub if args.use_stubs else None
+    camera_movement_stub_path = args.camera_movement_stub if args.use_stubs else None
+
+    # settings shared by single video runs and every batch job
+    pipeline_options = dict(camera_movement_scale=args.camera_scale, speed_window=args.speed_window, max_speed=args.max_speed,
+                            predict_ball=args.predict_ball, keyframe_stride=args.keyframe_stride,
+                            low_resolution=args.low_resolution, ball_roi_size=args.ball_roi_size,
+                            checkpoint_dir=args.checkpoint_dir, checkpoint_chunk_size=args.checkpoint_chunk,
+                            save_tracks=not args.no_save_tracks)
+
+    # many videos: jobs are queued in SQLite and taken by worker processes which keep model loaded between jobs
+    if args.batch:
+        batch_runner = BatchRunner(args.model, args.batch_output_dir, args.batch_queue, args.batch_workers, args.max_attempts,
+                                   pipeline_options, cache_dir=None if args.no_cache else args.cache_dir,
+                                   cache_size=int(args.cache_size_gb * 1024 ** 3))
+        report = batch_runner.run(args.batch, retry_failed=args.retry_failed)
+        print(batch_runner.format_report(report))
+        return
+
+    cache = None if args.no_cache else StageCache(args.cache_dir, int(args.cache_size_gb * 1024 ** 3))
+    profiler = StageProfiler.from_env(args.profile, args.profile_frames)
+
+    # detection, tracking and camera movement of long matches can be split across processes
+    segment_runner = None
+    if args.workers > 1:
+        segment_runner = SegmentRunner(args.model, num_workers=args.workers, overlap=args.segment_overlap,
+                                       window_size=args.window_size, camera_movement_scale=args.camera_scale,
+                                       keyframe_stride=args.keyframe_stride, low_resolution=args.low_resolution,
+                                       ball_roi_size=args.ball_roi_size)
+
+    pipeline = Pipeline(args.model, cache=cache, profiler=profiler, segment_runner=segment_runner, **pipeline_options)
+
+    if args.live:
+        pipeline.run_live(args.input, args.output,
+                          latency_budget=args.latency_budget / 1000,
+                          realtime=not args.no_realtime)
+    elif args.stream:
+        pipeline.run_stream(args.input, args.output,
+                            window_size=args.window_size,
+                            tracks_stub_path=tracks_stub_path,
+                            camera_movement_stub_path=camera_movement_stub_path)
+    else:
+        pipeline.run(args.input, args.output,
+                     tracks_stub_path=tracks_stub_path,
+                     camera_movement_stub_path=camera_movement_stub_path)
+
+    if profiler.enabled:
+        print(profiler.save(args.profile_output))
+        print(f"Profiling report saved to: {args.profile_output}")
 
 if __name__ == '__main__':
     main()
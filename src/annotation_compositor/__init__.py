@@ -0,0 +1 @@
+from .annotation_compositor import AnnotationCompositor
\ No newline at end of file
@@ -0,0 +1,23 @@
+class AnnotationCompositor:
+    def __init__(self, tracker, camera_movement_estimator, speed_and_distance_estimator):
+        # stages which know how to draw their own overlay layer on one frame
+        self.tracker = tracker
+        self.camera_movement_estimator = camera_movement_estimator
+        self.speed_and_distance_estimator = speed_and_distance_estimator
+
+    def compose(self, frame, frame_num, tracks, possession_stats, camera_movement_per_frame, frame_offset=0, overlays=True):
+        # draw every layer on frame in place, same order as separate render passes:
+        # ellipses, triangles and possession panel, then camera panel, then speed labels
+        frame = self.tracker.draw_frame_annotations(frame, frame_num, tracks, possession_stats, frame_offset)
+
+        # live mode skips camera panel and speed labels when it falls behind
+        if overlays:
+            frame = self.camera_movement_estimator.draw_frame_camera_movement(frame, camera_movement_per_frame[frame_num])
+            frame = self.speed_and_distance_estimator.draw_frame_speed_and_distance(frame, tracks['players'][frame_num])
+
+        return frame
+
+    def compose_frames(self, frames, tracks, possession_stats, camera_movement_per_frame, frame_offset=0):
+        # frames are annotated in place, no copies are made
+        for frame_num, frame in enumerate(frames):
+            yield self.compose(frame, frame_num, tracks, possession_stats, camera_movement_per_frame, frame_offset)
@@ -1 +1,2 @@
-from .ball_assigner import BallAssigner
\ No newline at end of file
+from .ball_assigner import BallAssigner
+from .possession_stats import PossessionStats
\ No newline at end of file
@@ -1,4 +1,6 @@
+import numpy as np
 from src.utils import BBoxUtils
+from src.track_store import TrackStore
 
 class BallAssigner:
     def __init__(self):
@@ -32,3 +34,76 @@ class BallAssigner:
         
         return assigned_player
 
+    def assign_ball_to_players(self, ball_centers, player_frames, player_feet):
+        # ball_centers: (frames, 2) ball center per frame, nan when frame has no ball
+        # player_frames: (rows,) frame of each player row, player_feet: (rows, 2, 2) left and right foot corners
+        assigned_rows = np.full(len(ball_centers), -1, dtype=np.int64)
+        if len(player_frames) == 0:
+            return assigned_rows
+
+        # distance from ball to the closer foot corner of every player row in one pass
+        ball_positions = ball_centers[player_frames]
+        distances = np.sqrt(((player_feet - ball_positions[:, None, :]) ** 2).sum(axis=2)).min(axis=1)
+
+        # only players closer than max distance can get the ball (nan distance never passes)
+        rows = np.flatnonzero(distances < self.max_player_ball_distance)
+        if len(rows) == 0:
+            return assigned_rows
+
+        # sort candidates by frame then distance, stable so first player in frame wins ties like the loop
+        rows = rows[np.lexsort((distances[rows], player_frames[rows]))]
+        frames, first = np.unique(player_frames[rows], return_index=True)
+        assigned_rows[frames] = rows[first]
+
+        return assigned_rows
+
+    def get_team_ball_control(self, assigned_rows, player_teams, initial_team=-1):
+        # index of last frame (up to each frame) where some player had the ball
+        frame_indices = np.arange(len(assigned_rows))
+        last_assigned = np.maximum.accumulate(np.where(assigned_rows != -1, frame_indices, -1))
+
+        # team of that player, or initial team before anyone had the ball
+        team_ball_control = np.full(len(assigned_rows), initial_team, dtype=np.int64)
+        has_control = last_assigned >= 0
+        team_ball_control[has_control] = player_teams[assigned_rows[last_assigned[has_control]]]
+
+        return team_ball_control
+
+    def assign_ball_possession(self, tracks, initial_team=-1):
+        num_frames = len(tracks['players'])
+
+        if isinstance(tracks, TrackStore):
+            # player rows are contiguous in store
+            players = tracks.object_rows('players')
+            player_frames = tracks.frame[players]
+            player_bboxes = tracks.bbox[players]
+            player_teams = tracks.team[players].astype(np.int64)
+
+            # one ball (track ID 1) per frame, first row of each frame span
+            ball_offsets = tracks.frame_offsets[tracks.objects.index('ball')]
+            has_ball = ball_offsets[1:] > ball_offsets[:-1]
+            ball_bboxes = np.full((num_frames, 4), np.nan)
+            ball_bboxes[has_ball] = tracks.bbox[ball_offsets[:-1][has_ball]]
+        else:
+            # flatten nested dicts into same arrays
+            keys = [(frame_num, player_id) for frame_num, player_track in enumerate(tracks['players']) for player_id in player_track]
+            player_frames = np.array([frame_num for frame_num, _ in keys], dtype=np.int64)
+            player_bboxes = np.array([tracks['players'][frame_num][player_id]['bbox'] for frame_num, player_id in keys], dtype=np.float64).reshape(-1, 4)
+            player_teams = np.array([tracks['players'][frame_num][player_id]['team'] for frame_num, player_id in keys], dtype=np.int64)
+            ball_bboxes = np.array([ball[1]['bbox'] if 1 in ball else [np.nan] * 4 for ball in tracks['ball']], dtype=np.float64).reshape(-1, 4)
+
+        # ball center (same as int() in get_center) and foot corners (x1, y2), (x2, y2) of players
+        ball_centers = np.trunc(np.stack([ball_bboxes[:, 0] + ball_bboxes[:, 2], ball_bboxes[:, 1] + ball_bboxes[:, 3]], axis=1) / 2)
+        player_feet = np.stack([player_bboxes[:, [0, 3]], player_bboxes[:, [2, 3]]], axis=1)
+
+        assigned_rows = self.assign_ball_to_players(ball_centers, player_frames, player_feet)
+
+        # mark players with ball
+        if isinstance(tracks, TrackStore):
+            tracks.set_column('has_ball', True, players.start + assigned_rows[assigned_rows != -1])
+        else:
+            for row in assigned_rows[assigned_rows != -1]:
+                frame_num, player_id = keys[row]
+                tracks['players'][frame_num][player_id]['has_ball'] = True
+
+        return self.get_team_ball_control(assigned_rows, player_teams, initial_team)
@@ -0,0 +1,50 @@
+import numpy as np
+
+class PossessionStats:
+    def __init__(self):
+        # running number of frames each team controlled the ball, one column per frame
+        # buffer grows by doubling so adding single frames (online mode) stays cheap on long matches
+        self.frames = np.zeros((2, 0), dtype=np.int64)
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def team1_frames(self):
+        return self.frames[0, :self.length]
+
+    @property
+    def team2_frames(self):
+        return self.frames[1, :self.length]
+
+    def add_team_ball_control(self, team_ball_control):
+        # prefix sums over new frames, continuing from totals of frames added before (streaming windows)
+        team_ball_control = np.asarray(team_ball_control)
+        team1_total = self.team1_frames[-1] if len(self) else 0
+        team2_total = self.team2_frames[-1] if len(self) else 0
+
+        new_length = self.length + len(team_ball_control)
+        if new_length > self.frames.shape[1]:
+            frames = np.zeros((2, max(new_length, 2 * self.frames.shape[1])), dtype=np.int64)
+            frames[:, :self.length] = self.frames[:, :self.length]
+            self.frames = frames
+
+        self.frames[0, self.length:new_length] = team1_total + np.cumsum(team_ball_control == 1)
+        self.frames[1, self.length:new_length] = team2_total + np.cumsum(team_ball_control == 2)
+        self.length = new_length
+
+    def update(self, team):
+        # add a single frame (online mode) and return percentages for it
+        self.add_team_ball_control([team])
+        return self.get_percentages(len(self) - 1)
+
+    def get_percentages(self, frame_num):
+        # share of ball control of both teams up to frame_num, 0 while no team had the ball yet
+        team1_num_frames = self.frames[0, frame_num]
+        team2_num_frames = self.frames[1, frame_num]
+        total_frames = team1_num_frames + team2_num_frames
+        if total_frames == 0:
+            return 0.0, 0.0
+
+        return team1_num_frames / total_frames, team2_num_frames / total_frames
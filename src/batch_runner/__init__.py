@@ -0,0 +1,2 @@
+from .job_queue import JobQueue
+from .batch_runner import BatchRunner
\ No newline at end of file
@@ -0,0 +1,149 @@
+import os
+import time
+import socket
+import traceback
+import multiprocessing
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from src.utils import VideoUtils
+from src.pipeline import Pipeline
+from src.stage_cache import StageCache
+from .job_queue import JobQueue
+
+class BatchRunner:
+    # files picked up from a directory given as batch input
+    video_extensions = ('.mp4', '.avi', '.mov', '.mkv')
+
+    def __init__(self, model_path, output_dir='./output_videos/batch', queue_path=None, num_workers=1, max_attempts=3, pipeline_options=None, cache_dir=None, cache_size=10 * 1024 ** 3):
+        self.model_path = model_path
+        self.output_dir = output_dir
+
+        # SQLite job queue next to outputs unless given, rerunning same batch skips finished jobs
+        self.queue_path = queue_path or os.path.join(output_dir, 'batch_queue.sqlite')
+        self.num_workers = num_workers
+        self.max_attempts = max_attempts
+
+        # keyword arguments of Pipeline shared by every job (speed window, detection settings, ...)
+        self.pipeline_options = pipeline_options or {}
+
+        # workers share one stage cache directory, None disables caching
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+
+    def get_jobs(self, batch_input):
+        # (input, output) pairs from directory of videos, or from manifest with one "input[,output]" per line
+        if os.path.isdir(batch_input):
+            inputs = sorted(os.path.join(batch_input, name) for name in os.listdir(batch_input) if name.lower().endswith(self.video_extensions))
+            return [(input, self.get_output_path(input)) for input in inputs]
+
+        jobs = []
+        with open(batch_input) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                input, _, output = [part.strip() for part in line.partition(',')]
+                jobs.append((input, output or self.get_output_path(input)))
+        return jobs
+
+    def get_output_path(self, input_video_path):
+        return os.path.join(self.output_dir, os.path.splitext(os.path.basename(input_video_path))[0] + '.mp4')
+
+    def process_jobs(self, worker_num):
+        # runs in worker process: model and libraries are loaded once, then jobs are taken from queue until it is empty
+        worker = f"{socket.gethostname()}:{os.getpid()}:{worker_num}"
+        queue = JobQueue(self.queue_path, self.max_attempts)
+
+        load_start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            cache = StageCache(self.cache_dir, self.cache_size) if self.cache_dir else None
+            pipeline = Pipeline(self.model_path, cache=cache, **self.pipeline_options)
+        stats = {'worker': worker, 'load_seconds': time.perf_counter() - load_start, 'jobs': 0, 'frames': 0, 'failures': 0}
+
+        while True:
+            job = queue.claim(worker)
+            if job is None:
+                return stats
+
+            print(f"[{worker}] job {job['id']} attempt {job['attempt']}: {job['input']}")
+            start_time = time.perf_counter()
+            try:
+                properties = VideoUtils().get_video_properties(job['input'])
+                if properties is None:
+                    raise ValueError(f"Could not open video: {job['input']}")
+
+                # progress output of every job goes to a log file next to its output video
+                os.makedirs(os.path.dirname(os.path.abspath(job['output'])), exist_ok=True)
+                with open(os.path.splitext(job['output'])[0] + '.log', 'w') as log, redirect_stdout(log):
+                    pipeline.run(job['input'], job['output'])
+
+                seconds = time.perf_counter() - start_time
+                queue.complete(job['id'], properties['frame_count'], seconds)
+                stats['jobs'] += 1
+                stats['frames'] += properties['frame_count']
+                print(f"[{worker}] job {job['id']} done in {seconds:.1f}s")
+            except Exception:
+                error = traceback.format_exc()
+                queue.fail(job['id'], error, time.perf_counter() - start_time)
+                stats['failures'] += 1
+                print(f"[{worker}] job {job['id']} failed: {error.strip().splitlines()[-1]}")
+
+    def run(self, batch_input, retry_failed=False):
+        # queue jobs of batch input and process them with worker pool, returns report of whole queue
+        queue = JobQueue(self.queue_path, self.max_attempts)
+        queue.add_jobs(self.get_jobs(batch_input))
+
+        # jobs left running by an interrupted batch start again, failed ones only when asked
+        queue.reset_running()
+        if retry_failed:
+            queue.retry_failed()
+
+        counts = queue.get_counts()
+        num_workers = max(1, min(self.num_workers, counts['pending']))
+        print(f"Batch queue: {self.queue_path} ({counts['pending']} pending, {counts['done']} done, {counts['failed']} failed)")
+        print(f"Processing with {num_workers} workers\n")
+
+        start_time = time.perf_counter()
+        worker_stats = []
+        if counts['pending']:
+            # spawn so workers do not inherit model or threads of parent process
+            with ProcessPoolExecutor(num_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(self.process_jobs, worker_num) for worker_num in range(num_workers)]
+                worker_stats = [future.result() for future in futures]
+
+        return self.get_report(queue, worker_stats, time.perf_counter() - start_time)
+
+    def get_report(self, queue, worker_stats, seconds):
+        # per-job status and aggregate throughput of jobs finished in this run
+        jobs = queue.get_jobs()
+        run_jobs = sum(stats['jobs'] for stats in worker_stats)
+        run_frames = sum(stats['frames'] for stats in worker_stats)
+
+        return {
+            'queue': self.queue_path,
+            'counts': queue.get_counts(),
+            'jobs': [{key: job[key] for key in ['id', 'input', 'output', 'status', 'attempts', 'worker', 'frames', 'seconds', 'error']} for job in jobs],
+            'workers': worker_stats,
+            'seconds': seconds,
+            'jobs_done': run_jobs,
+            'frames': run_frames,
+            'fps': run_frames / seconds if seconds > 0 else 0,
+            'jobs_per_hour': run_jobs / seconds * 3600 if seconds > 0 else 0,
+        }
+
+    def format_report(self, report):
+        lines = [f"{'id':>4}  {'status':<8} {'attempts':>8} {'frames':>8} {'seconds':>9} {'fps':>8}  input"]
+        for job in report['jobs']:
+            fps = job['frames'] / job['seconds'] if job['status'] == 'done' and job['seconds'] else 0
+            lines.append(f"{job['id']:>4}  {job['status']:<8} {job['attempts']:>8} {job['frames'] or 0:>8} "
+                         f"{job['seconds'] or 0:>9.1f} {fps:>8.2f}  {job['input']}")
+            if job['status'] == 'failed' and job['error']:
+                lines.append(f"{'':>6}{job['error'].strip().splitlines()[-1]}")
+
+        counts = report['counts']
+        lines.append(f"\n{counts['done']} done, {counts['failed']} failed, {counts['pending']} pending")
+        lines.append(f"This run: {report['jobs_done']} jobs, {report['frames']} frames in {report['seconds']:.1f}s "
+                     f"({report['fps']:.2f} frames/sec, {report['jobs_per_hour']:.1f} jobs/hour)")
+        for stats in report['workers']:
+            lines.append(f"  {stats['worker']}: {stats['jobs']} jobs, {stats['failures']} failures, model loaded in {stats['load_seconds']:.1f}s")
+        return '\n'.join(lines)
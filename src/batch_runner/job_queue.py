@@ -0,0 +1,99 @@
+import os
+import time
+import sqlite3
+from contextlib import closing
+
+class JobQueue:
+    # job states: pending -> running -> done, or back to pending after a failure while retries are left
+    statuses = ['pending', 'running', 'done', 'failed']
+
+    def __init__(self, db_path='./output_videos/batch_queue.sqlite', max_attempts=3):
+        # local SQLite file shared by runner and worker processes, survives crashes so a batch can be resumed
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        with closing(self.connect()) as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    input TEXT NOT NULL,
+                    output TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    error TEXT,
+                    frames INTEGER,
+                    seconds REAL,
+                    created_at REAL,
+                    started_at REAL,
+                    finished_at REAL,
+                    UNIQUE (input, output)
+                )
+            """)
+
+    def connect(self):
+        # autocommit connection, writes that must be atomic open their own transaction (closing connection rolls back unfinished one)
+        # timeout makes workers wait for lock of another worker instead of failing
+        return sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+
+    def add_jobs(self, jobs):
+        # jobs: (input, output) pairs, jobs already in queue are kept with their status
+        with closing(self.connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany("INSERT OR IGNORE INTO jobs (input, output, created_at) VALUES (?, ?, ?)",
+                                   [(input, output, time.time()) for input, output in jobs])
+            connection.execute("COMMIT")
+
+    def reset_running(self):
+        # jobs left running by a crashed batch are picked up again, attempt still counts
+        with closing(self.connect()) as connection:
+            connection.execute("UPDATE jobs SET status = 'pending', worker = NULL WHERE status = 'running'")
+
+    def retry_failed(self):
+        # give failed jobs a new set of attempts
+        with closing(self.connect()) as connection:
+            connection.execute("UPDATE jobs SET status = 'pending', attempts = 0, error = NULL WHERE status = 'failed'")
+
+    def claim(self, worker):
+        # atomically take oldest pending job, None when queue is empty
+        with closing(self.connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute("SELECT id, input, output, attempts FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+
+            job_id, input, output, attempts = row
+            connection.execute("UPDATE jobs SET status = 'running', attempts = ?, worker = ?, started_at = ?, finished_at = NULL WHERE id = ?",
+                               (attempts + 1, worker, time.time(), job_id))
+            connection.execute("COMMIT")
+
+        return {'id': job_id, 'input': input, 'output': output, 'attempt': attempts + 1}
+
+    def complete(self, job_id, frames, seconds):
+        with closing(self.connect()) as connection:
+            connection.execute("UPDATE jobs SET status = 'done', error = NULL, frames = ?, seconds = ?, finished_at = ? WHERE id = ?",
+                               (frames, seconds, time.time(), job_id))
+
+    def fail(self, job_id, error, seconds):
+        # job goes back to queue until it used all attempts
+        with closing(self.connect()) as connection:
+            connection.execute("""
+                UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END,
+                                error = ?, seconds = ?, finished_at = ?
+                WHERE id = ?
+            """, (self.max_attempts, error, seconds, time.time(), job_id))
+
+    def get_jobs(self):
+        with closing(self.connect()) as connection:
+            connection.row_factory = sqlite3.Row
+            return [dict(row) for row in connection.execute("SELECT * FROM jobs ORDER BY id")]
+
+    def get_counts(self):
+        # number of jobs in every state
+        counts = {status: 0 for status in self.statuses}
+        with closing(self.connect()) as connection:
+            for status, count in connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[status] = count
+        return counts
@@ -0,0 +1 @@
+from .synthetic_data import SyntheticData
\ No newline at end of file
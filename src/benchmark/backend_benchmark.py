@@ -0,0 +1,116 @@
+import json
+import time
+import argparse
+import numpy as np
+from src.utils import VideoUtils, BBoxUtils
+from src.inference_backend import InferenceBackend
+
+class BackendBenchmark:
+    def __init__(self, model_paths, num_frames=100, batch_size=8, conf=0.1, iou_threshold=0.5):
+        # first model is reference for parity, e.g. models/best.pt models/best.onnx models/best_int8.onnx
+        self.model_paths = model_paths
+        self.num_frames = num_frames
+        self.batch_size = batch_size
+        self.conf = conf
+
+        # boxes of two backends are the same detection if they overlap at least this much
+        self.iou_threshold = iou_threshold
+
+        self.vu = VideoUtils()
+        self.bbox_utils = BBoxUtils()
+
+    def detect(self, backend, video_frames):
+        # detections of every frame and seconds spent in inference (including pre- and post-processing)
+        detections = []
+        start_time = time.perf_counter()
+        for i in range(0, len(video_frames), self.batch_size):
+            detections += [frame_detections for _, frame_detections in backend.detect(video_frames[i:i + self.batch_size], self.conf)]
+        return detections, time.perf_counter() - start_time
+
+    def compare(self, reference_detections, detections):
+        # share of reference boxes found with same class, IoU and confidence difference of found boxes
+        reference_boxes, matched_boxes, predicted_boxes = 0, 0, 0
+        ious, confidence_differences = [], []
+        for reference, predicted in zip(reference_detections, detections):
+            reference_boxes += len(reference)
+            predicted_boxes += len(predicted)
+            for class_id in set(reference.class_id) | set(predicted.class_id):
+                reference_class = reference[reference.class_id == class_id]
+                predicted_class = predicted[predicted.class_id == class_id]
+                rows, columns, iou = self.bbox_utils.match_boxes(reference_class.xyxy, predicted_class.xyxy, self.iou_threshold)
+                matched_boxes += len(iou)
+                ious += iou.tolist()
+                confidence_differences += np.abs(reference_class.confidence[rows] - predicted_class.confidence[columns]).tolist()
+
+        return {
+            'recall': matched_boxes / reference_boxes if reference_boxes else None,
+            'precision': matched_boxes / predicted_boxes if predicted_boxes else None,
+            'mean_iou': float(np.mean(ious)) if ious else None,
+            'min_iou': float(np.min(ious)) if ious else None,
+            'mean_confidence_difference': float(np.mean(confidence_differences)) if confidence_differences else None,
+            'max_confidence_difference': float(np.max(confidence_differences)) if confidence_differences else None,
+        }
+
+    def run(self, video_path):
+        video_frames = list(self.vu.generate_frames(video_path, 0, self.num_frames))
+        num_frames = len(video_frames)
+
+        results = []
+        reference_detections, reference_seconds = None, None
+        for model_path in self.model_paths:
+            load_start = time.perf_counter()
+            backend = InferenceBackend.create(model_path)
+            load_seconds = time.perf_counter() - load_start
+
+            # first batch warms up runtime (memory allocation, kernel selection)
+            backend.detect(video_frames[:1], self.conf)
+            detections, seconds = self.detect(backend, video_frames)
+
+            if reference_detections is None:
+                reference_detections, reference_seconds = detections, seconds
+            results.append({
+                'model': model_path,
+                'backend': type(backend).__name__,
+                'load_seconds': load_seconds,
+                'seconds': seconds,
+                'fps': num_frames / seconds if seconds > 0 else None,
+                'speedup': reference_seconds / seconds if seconds > 0 else None,
+                'parity': self.compare(reference_detections, detections),
+            })
+
+            parity = results[-1]['parity']
+            print(f"{model_path:<32} {results[-1]['backend']:<12} {results[-1]['fps'] or 0:8.1f} frames/sec "
+                  f"speedup {results[-1]['speedup'] or 0:5.2f}x  recall {parity['recall'] or 0:.3f}  mean IoU {parity['mean_iou'] or 0:.3f}")
+
+        return {
+            'config': {
+                'video': video_path,
+                'frames': num_frames,
+                'batch_size': self.batch_size,
+                'conf': self.conf,
+                'iou_threshold': self.iou_threshold,
+            },
+            'backends': results,
+        }
+
+
+if __name__ == '__main__':
+    # python -m src.benchmark.backend_benchmark --models ./models/best.pt ./models/best.onnx ./models/best_int8.onnx --output backends.json
+    parser = argparse.ArgumentParser(description='Compare detections and throughput of inference backends, first model is reference')
+    parser.add_argument('--input', default='./input_videos/input.mp4', help='input video path')
+    parser.add_argument('--models', nargs='+', default=['./models/best.pt', './models/best.onnx', './models/best_int8.onnx'])
+    parser.add_argument('--frames', type=int, default=100, help='frames from start of video to compare')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--iou-threshold', type=float, default=0.5)
+    parser.add_argument('--output', default=None, help='JSON results path, printed to stdout if not given')
+    args = parser.parse_args()
+
+    benchmark = BackendBenchmark(args.models, args.frames, args.batch_size, iou_threshold=args.iou_threshold)
+    results = benchmark.run(args.input)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import cv2
+import numpy as np
+from src.utils import VideoUtils
+from src.tracker import Tracker
+from src.team_assigner import TeamAssigner
+from src.ball_assigner import BallAssigner, PossessionStats
+from src.camera_movement_estimator import CameraMovementEstimator
+from src.view_transformer import ViewTransformer
+from src.speed_and_distance_estimator import SpeedAndDistanceEstimator
+from src.track_store import TrackStore
+from src.profiler import StageProfiler
+from .synthetic_data import SyntheticData
+
+class Benchmark:
+    def __init__(self, num_frames=240, num_players=22, frame_size=(1920, 1080), tracks_format='store', camera_movement_scale=1.0, seed=0):
+        self.synthetic_data = SyntheticData(num_frames, num_players, frame_size, seed=seed)
+
+        # 'store' runs stages on columnar TrackStore like the pipeline, 'dict' on plain nested dicts
+        self.tracks_format = tracks_format
+        self.camera_movement_scale = camera_movement_scale
+
+        self.results = []
+
+        # peak memory is measured like in pipeline profiling reports
+        self.profiler = StageProfiler()
+
+    def measure(self, stage, function, num_frames):
+        # wall time, cpu time and peak memory of one stage
+        peak_rss_before = self.profiler.get_peak_rss()
+        start_time, start_cpu_time = time.perf_counter(), time.process_time()
+        result = function()
+        seconds, cpu_seconds = time.perf_counter() - start_time, time.process_time() - start_cpu_time
+        peak_rss = self.profiler.get_peak_rss()
+
+        self.results.append({
+            'stage': stage,
+            'frames': num_frames,
+            'seconds': seconds,
+            'cpu_seconds': cpu_seconds,
+            'fps': num_frames / seconds if seconds > 0 else None,
+            'peak_rss_mb': peak_rss,
+            'peak_rss_increase_mb': peak_rss - peak_rss_before,
+        })
+        print(f"{stage:<26} {seconds:8.3f} s {self.results[-1]['fps'] or 0:10.1f} frames/sec  peak RSS {peak_rss:8.1f} MB")
+
+        return result
+
+    def get_environment(self):
+        # enough to tell runs apart when comparing results across commits and machines
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            'commit': commit,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+        }
+
+    def run(self, work_dir=None):
+        data = self.synthetic_data
+        num_frames = data.num_frames
+        self.results = []
+
+        # no model needed, detection is replaced by synthetic tracks
+        vu = VideoUtils()
+        tracker = Tracker(None)
+
+        with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+            input_video_path = data.generate_video(os.path.join(temp_dir, 'input.mp4'))
+            tracks = data.generate_tracks()
+            if self.tracks_format == 'store':
+                tracks = TrackStore.from_tracks(tracks)
+
+            video_frames = self.measure('read_video', lambda: vu.read_video(input_video_path), num_frames)
+            self.measure('add_position_to_tracks', lambda: tracker.add_position_to_tracks(tracks), num_frames)
+
+            camera_movement_estimator = CameraMovementEstimator(video_frames[0], self.camera_movement_scale)
+            camera_movement_per_frame = self.measure('camera_movement', lambda: camera_movement_estimator.get_camera_movement(video_frames), num_frames)
+            self.measure('adjust_track_positions', lambda: camera_movement_estimator.adjust_track_positions(tracks, camera_movement_per_frame), num_frames)
+
+            view_transformer = ViewTransformer()
+            self.measure('view_transform', lambda: view_transformer.add_transformed_position_to_tracks(tracks), num_frames)
+
+            def interpolate_ball_position():
+                tracks['ball'] = tracker.interpolate_ball_position(tracks['ball'])
+            self.measure('interpolate_ball_position', interpolate_ball_position, num_frames)
+
+            speed_and_distance_estimator = SpeedAndDistanceEstimator(data.fps)
+            self.measure('speed_and_distance', lambda: speed_and_distance_estimator.add_speed_and_distance_to_tracks(tracks), num_frames)
+
+            team_assigner = TeamAssigner()
+            def assign_teams():
+                team_assigner.assign_team_color(video_frames[0], tracks['players'][0])
+                team_assigner.add_team_to_tracks(video_frames, tracks)
+            self.measure('team_assignment', assign_teams, num_frames)
+
+            def assign_ball_possession():
+                possession_stats = PossessionStats()
+                possession_stats.add_team_ball_control(BallAssigner().assign_ball_possession(tracks))
+                return possession_stats
+            possession_stats = self.measure('ball_possession', assign_ball_possession, num_frames)
+
+            # render passes draw in place one after another, same as annotation compositor
+            def render_tracks():
+                for frame_num, frame in enumerate(video_frames):
+                    tracker.draw_frame_annotations(frame, frame_num, tracks, possession_stats)
+            def render_camera_movement():
+                for frame_num, frame in enumerate(video_frames):
+                    camera_movement_estimator.draw_frame_camera_movement(frame, camera_movement_per_frame[frame_num])
+            def render_speed_and_distance():
+                for frame_num, frame in enumerate(video_frames):
+                    speed_and_distance_estimator.draw_frame_speed_and_distance(frame, tracks['players'][frame_num])
+            self.measure('render_tracks', render_tracks, num_frames)
+            self.measure('render_camera_movement', render_camera_movement, num_frames)
+            self.measure('render_speed_and_distance', render_speed_and_distance, num_frames)
+
+            output_video_path = os.path.join(temp_dir, 'output.mp4')
+            self.measure('save_video', lambda: vu.save_video(video_frames, output_video_path, data.fps), num_frames)
+
+        total_seconds = sum(result['seconds'] for result in self.results)
+        return {
+            'config': {
+                'frames': num_frames,
+                'players': data.num_players,
+                'frame_size': list(data.frame_size),
+                'tracks_format': self.tracks_format,
+                'camera_movement_scale': self.camera_movement_scale,
+                'seed': data.seed,
+            },
+            'environment': self.get_environment(),
+            'stages': self.results,
+            'total': {
+                'seconds': total_seconds,
+                'fps': num_frames / total_seconds if total_seconds > 0 else None,
+                'peak_rss_mb': self.profiler.get_peak_rss(),
+            },
+        }
+
+
+if __name__ == '__main__':
+    # python -m src.benchmark.benchmark --frames 240 --players 22 --output benchmark.json
+    parser = argparse.ArgumentParser(description='Time every pipeline stage on synthetic video and tracks (no model needed)')
+    parser.add_argument('--frames', type=int, default=240)
+    parser.add_argument('--players', type=int, default=22)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--tracks-format', choices=['store', 'dict'], default='store')
+    parser.add_argument('--camera-scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', default=None, help='directory for temporary synthetic videos')
+    parser.add_argument('--output', default=None, help='JSON results path, printed to stdout if not given')
+    args = parser.parse_args()
+
+    benchmark = Benchmark(args.frames, args.players, (args.width, args.height), args.tracks_format, args.camera_scale, args.seed)
+    results = benchmark.run(args.work_dir)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
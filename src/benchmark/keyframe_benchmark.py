@@ -0,0 +1,123 @@
+import json
+import time
+import argparse
+import numpy as np
+from src.utils import VideoUtils, BBoxUtils
+from src.tracker import DetectionPipeline, KeyframeDetector
+from src.inference_backend import InferenceBackend
+
+class KeyframeBenchmark:
+    def __init__(self, model_path, strides=(2, 5, 10), num_frames=240, conf=0.1, iou_threshold=0.5):
+        self.model = InferenceBackend.create(model_path)
+        self.strides = strides
+        self.num_frames = num_frames
+        self.conf = conf
+
+        # propagated box counts as correct if it overlaps a box of full detection at least this much
+        self.iou_threshold = iou_threshold
+
+        self.vu = VideoUtils()
+        self.bbox_utils = BBoxUtils()
+
+    def get_frame_boxes(self, class_names, detections):
+        # {class name: (n, 4) boxes} of one frame
+        names = np.array([class_names[class_id] for class_id in detections.class_id])
+        return {name: detections.xyxy[names == name] for name in set(names)}
+
+    def collect(self, detections):
+        # boxes of every frame and seconds spent producing them
+        start_time = time.perf_counter()
+        frames = [self.get_frame_boxes(class_names, frame_detections) for class_names, frame_detections in detections]
+        return frames, time.perf_counter() - start_time
+
+    def detect_all_frames(self, video_path):
+        # reference: detector on every frame, same batched pipeline tracker uses
+        frames = self.vu.generate_frames(video_path, 0, self.num_frames)
+        return self.collect(DetectionPipeline(self.model, conf=self.conf).run(frames))
+
+    def compare(self, reference_frames, frames):
+        # per class recall, precision and mean IoU of matched boxes over all frames
+        counts = {}
+        for reference, boxes in zip(reference_frames, frames):
+            for name in set(reference) | set(boxes):
+                reference_boxes = reference.get(name, np.empty((0, 4)))
+                predicted_boxes = boxes.get(name, np.empty((0, 4)))
+                count = counts.setdefault(name, {'reference': 0, 'predicted': 0, 'matched': 0, 'iou_sum': 0.0})
+                count['reference'] += len(reference_boxes)
+                count['predicted'] += len(predicted_boxes)
+
+                _, _, iou = self.bbox_utils.match_boxes(reference_boxes, predicted_boxes, self.iou_threshold)
+                count['matched'] += len(iou)
+                count['iou_sum'] += float(iou.sum())
+
+        return {
+            name: {
+                'recall': count['matched'] / count['reference'] if count['reference'] else None,
+                'precision': count['matched'] / count['predicted'] if count['predicted'] else None,
+                'mean_iou': count['iou_sum'] / count['matched'] if count['matched'] else None,
+                'reference_boxes': count['reference'],
+            }
+            for name, count in sorted(counts.items())
+        }
+
+    def run(self, video_path):
+        reference_frames, reference_seconds = self.detect_all_frames(video_path)
+        num_frames = len(reference_frames)
+        print(f"{'full detection':<16} {reference_seconds:8.3f} s {num_frames / reference_seconds:8.1f} frames/sec")
+
+        results = []
+        for stride in self.strides:
+            keyframe_detector = KeyframeDetector(self.model, self.conf, stride)
+            frames, seconds = self.collect(keyframe_detector.run(self.vu.generate_frames(video_path, 0, self.num_frames)))
+            stats = keyframe_detector.stats
+            classes = self.compare(reference_frames, frames)
+
+            results.append({
+                'stride': stride,
+                'seconds': seconds,
+                'fps': num_frames / seconds if seconds > 0 else None,
+                'speedup': reference_seconds / seconds if seconds > 0 else None,
+                'keyframe_ratio': stats['keyframe_ratio'],
+                'triggers': stats['triggers'],
+                'classes': classes,
+            })
+
+            recalls = ', '.join(f"{name} {metrics['recall']:.2f}" for name, metrics in classes.items() if metrics['recall'] is not None)
+            print(f"{'stride ' + str(stride):<16} {seconds:8.3f} s {results[-1]['fps'] or 0:8.1f} frames/sec "
+                  f"speedup {results[-1]['speedup'] or 0:5.2f}x  keyframes {stats['keyframe_ratio']:.0%}  recall: {recalls}")
+
+        return {
+            'config': {
+                'video': video_path,
+                'frames': num_frames,
+                'conf': self.conf,
+                'iou_threshold': self.iou_threshold,
+            },
+            'full_detection': {
+                'seconds': reference_seconds,
+                'fps': num_frames / reference_seconds if reference_seconds > 0 else None,
+            },
+            'strides': results,
+        }
+
+
+if __name__ == '__main__':
+    # python -m src.benchmark.keyframe_benchmark --input input_videos/input.mp4 --strides 2 5 10 --output keyframes.json
+    parser = argparse.ArgumentParser(description='Compare keyframe detection with box propagation against detection on every frame')
+    parser.add_argument('--input', default='./input_videos/input.mp4', help='input video path')
+    parser.add_argument('--model', default='./models/best.pt', help='YOLO model path')
+    parser.add_argument('--strides', type=int, nargs='+', default=[2, 5, 10])
+    parser.add_argument('--frames', type=int, default=240, help='frames from start of video to compare')
+    parser.add_argument('--iou-threshold', type=float, default=0.5)
+    parser.add_argument('--output', default=None, help='JSON results path, printed to stdout if not given')
+    args = parser.parse_args()
+
+    benchmark = KeyframeBenchmark(args.model, args.strides, args.frames, iou_threshold=args.iou_threshold)
+    results = benchmark.run(args.input)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,123 @@
+import cv2
+import numpy as np
+from src.utils import VideoWriter
+
+class SyntheticData:
+    def __init__(self, num_frames=240, num_players=22, frame_size=(1920, 1080), fps=24, seed=0):
+        self.num_frames = num_frames
+        self.num_players = num_players
+        # frame_size is (width, height) like video writer
+        self.frame_size = frame_size
+        self.fps = fps
+        self.seed = seed
+
+        # players stay inside area of frame covered by view transformer court vertices
+        self.area = (300, 350, 1500, 950)
+
+        # shirt colors (BGR) of the two teams and referees
+        self.team_colors = [(255, 255, 255), (40, 40, 200)]
+        self.referee_color = (0, 220, 220)
+
+        # camera pans left and right by up to pan_amplitude pixels over pan_period frames
+        self.pan_amplitude = 200
+        self.pan_period = 240
+
+        self.tracks = None
+        self.player_teams = None
+        self.texture = None
+
+    def generate_tracks(self):
+        # tracks dict in the same format as Tracker.get_object_tracks, players walk randomly inside area
+        rng = np.random.default_rng(self.seed)
+        x1, y1, x2, y2 = self.area
+        num_referees = 2
+
+        positions = rng.uniform((x1, y1), (x2, y2), size=(self.num_players + num_referees, 2))
+        ball = rng.uniform((x1, y1), (x2, y2))
+        ball_velocity = rng.normal(0, 6, 2)
+
+        # alternate teams, track ids start from 1 like ByteTrack
+        self.player_teams = {player_id: player_id % 2 for player_id in range(1, self.num_players + 1)}
+
+        tracks = {'players': [], 'referees': [], 'ball': []}
+        for _ in range(self.num_frames):
+            positions = np.clip(positions + rng.normal(0, 2, positions.shape), (x1, y1), (x2, y2))
+
+            # players are sometimes missed by detector
+            visible = rng.random(len(positions)) > 0.02
+            players, referees = {}, {}
+            for index, (x, y) in enumerate(positions):
+                if not visible[index]:
+                    continue
+                bbox = [float(x - 20), float(y - 80), float(x + 20), float(y)]
+                if index < self.num_players:
+                    players[index + 1] = {'bbox': bbox}
+                else:
+                    referees[index + 1] = {'bbox': bbox}
+
+            # ball bounces inside area and is missing for short gaps
+            ball = ball + ball_velocity
+            ball_velocity = np.where((ball < (x1, y1)) | (ball > (x2, y2)), -ball_velocity, ball_velocity)
+            ball = np.clip(ball, (x1, y1), (x2, y2))
+            balls = {}
+            if rng.random() > 0.2:
+                balls[1] = {'bbox': [float(ball[0] - 8), float(ball[1] - 8), float(ball[0] + 8), float(ball[1] + 8)]}
+
+            tracks['players'].append(players)
+            tracks['referees'].append(referees)
+            tracks['ball'].append(balls)
+
+        self.tracks = tracks
+        return tracks
+
+    def generate_texture(self):
+        # grass with white marks (corners for optical flow features), wider than frame so camera can pan
+        rng = np.random.default_rng(self.seed)
+        width, height = self.frame_size
+        texture = np.empty((height, width + 2 * self.pan_amplitude, 3), dtype=np.uint8)
+        texture[:] = (40, 140, 40)
+        texture += rng.integers(0, 20, texture.shape, dtype=np.uint8)
+
+        for x, y in rng.uniform((0, 0), (texture.shape[1], height), size=(400, 2)).astype(int):
+            cv2.rectangle(texture, (int(x), int(y)), (int(x) + 6, int(y) + 6), (255, 255, 255), -1)
+
+        self.texture = texture
+        return texture
+
+    def get_camera_offset(self, frame_num):
+        return int(round(self.pan_amplitude * (1 + np.sin(2 * np.pi * frame_num / self.pan_period))))
+
+    def generate_frame(self, frame_num):
+        if self.tracks is None:
+            self.generate_tracks()
+        if self.texture is None:
+            self.generate_texture()
+
+        width, _ = self.frame_size
+        offset = self.get_camera_offset(frame_num)
+        frame = self.texture[:, offset:offset + width].copy()
+
+        # shirt on top half, inset so bbox corners stay grass (team assigner uses corners as background)
+        for player_id, player in self.tracks['players'][frame_num].items():
+            x1, y1, x2, y2 = map(int, player['bbox'])
+            cv2.rectangle(frame, (x1 + 8, y1 + 6), (x2 - 8, y2 - 6), self.team_colors[self.player_teams[player_id]], -1)
+        for referee in self.tracks['referees'][frame_num].values():
+            x1, y1, x2, y2 = map(int, referee['bbox'])
+            cv2.rectangle(frame, (x1 + 8, y1 + 6), (x2 - 8, y2 - 6), self.referee_color, -1)
+        for ball in self.tracks['ball'][frame_num].values():
+            x1, y1, x2, y2 = map(int, ball['bbox'])
+            cv2.circle(frame, ((x1 + x2) // 2, (y1 + y2) // 2), 8, (250, 250, 250), -1)
+
+        return frame
+
+    def generate_frames(self):
+        # frames one by one so long videos do not need to fit in memory
+        for frame_num in range(self.num_frames):
+            yield self.generate_frame(frame_num)
+
+    def generate_video(self, video_path):
+        with VideoWriter(video_path, self.frame_size, self.fps) as writer:
+            for frame in self.generate_frames():
+                writer.write(frame)
+
+        return video_path
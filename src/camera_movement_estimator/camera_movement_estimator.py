@@ -2,12 +2,16 @@ import cv2
 import pickle
 import numpy as np
 from src.utils import BBoxUtils
+from src.track_store import TrackStore, ColumnarFile
 
 class CameraMovementEstimator:
-    def __init__(self, first_frame):
+    def __init__(self, first_frame, scale=1.0):
         # min movement distance threshold
         self.minimum_distance = 5
 
+        # optical flow runs on frames resized by this factor (e.g. 0.5), lower is faster but less accurate
+        self.scale = scale
+
         # LK optical flow parameters
         self.lk_params = dict(
             winSize=(15, 15),
@@ -23,18 +27,32 @@ class CameraMovementEstimator:
         mask_features[:, :20] = 1
         mask_features[:, 900:1050] = 1
 
+        # feature mask must match size of downscaled frames
+        if self.scale != 1:
+            mask_features = cv2.resize(mask_features, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_NEAREST)
+
         # corner detection params
         self.features = dict(
             maxCorners=100,
             qualityLevel=0.3,
-            minDistance=3,
+            minDistance=max(1, int(round(3 * self.scale))),
             blockSize=7,
             mask=mask_features,
         )
 
         self.bbox_utils = BBoxUtils()
 
+        # last grayscale frame and its features, kept so streaming windows continue where previous one stopped
+        self.old_gray = None
+        self.old_features = None
+
     def adjust_track_positions(self, tracks, camera_movement_per_frame):
+        # columnar tracks: subtract camera movement of each row's frame at once
+        if isinstance(tracks, TrackStore):
+            camera_movement = np.asarray(camera_movement_per_frame, dtype=np.float64).reshape(-1, 2)
+            tracks.set_column('adjusted_position', tracks.position - camera_movement[tracks.frame])
+            return
+
         for object, object_tracks in tracks.items():
             for frame_num, track in enumerate(object_tracks):
                 for track_id, track_info in track.items():
@@ -47,59 +65,110 @@ class CameraMovementEstimator:
                     # store adjusted position
                     tracks[object][frame_num][track_id]['adjusted_position'] = adjusted_position
 
-    def get_camera_movement(self, frames, read_from_stub=False, stub_path=None):
+    def get_camera_movement(self, frames, read_from_stub=False, stub_path=None, frame_range=(0, None)):
+        # read only frame_range from memory-mapped columnar stub
+        if read_from_stub and ColumnarFile().is_columnar(stub_path):
+            return ColumnarFile().load_camera_movement(stub_path, *frame_range)
+
         # load precomputed movements if stub is provided
         if read_from_stub and stub_path:
             with open(stub_path, 'rb') as f:
                 return pickle.load(f)
 
-        # initialize movement tracking
-        camera_movement = [[0, 0]] * len(frames)
-
         # convert first frame to grayscale and get initial tracking features
-        old_gray = cv2.cvtColor(frames[0], cv2.COLOR_BGR2GRAY)
+        old_gray = self.get_gray_frame(frames[0])
         old_features = cv2.goodFeaturesToTrack(old_gray, **self.features)
 
+        # estimate movement for all frames
+        camera_movement, _, _ = self.estimate_camera_movement(frames, old_gray, old_features)
+
+        # save computed movements if stub_path is given
+        if ColumnarFile().is_columnar(stub_path):
+            ColumnarFile().save_camera_movement(camera_movement, stub_path)
+        elif stub_path:
+            with open(stub_path, 'wb') as f:
+                pickle.dump(camera_movement, f)
+
+        return camera_movement
+    
+    def update_camera_movement(self, frames):
+        # initialize tracking state from first frame of first window
+        if self.old_gray is None:
+            self.old_gray = self.get_gray_frame(frames[0])
+            self.old_features = cv2.goodFeaturesToTrack(self.old_gray, **self.features)
+
+        # continue from last frame of previous window
+        camera_movement, self.old_gray, self.old_features = self.estimate_camera_movement(
+            frames, self.old_gray, self.old_features
+        )
+
+        return camera_movement
+
+    def estimate_camera_movement(self, frames, old_gray, old_features):
+        # initialize movement tracking
+        camera_movement = [[0, 0]] * len(frames)
+
         # process each frame
         for frame_num in range(len(frames)):
-            new_gray = cv2.cvtColor(frames[frame_num], cv2.COLOR_BGR2GRAY)
+            new_gray = self.get_gray_frame(frames[frame_num])
 
             # calculate optical flow (track movement)
             new_features, _, _ = cv2.calcOpticalFlowPyrLK(
                 prevImg=old_gray, nextImg=new_gray, prevPts=old_features, nextPts=None, **self.lk_params
             )
 
-            # track max movement
-            max_distance = 0
-            camera_x, camera_y = 0, 0
-
-            # measure movement for each tracked feature
-            for i, (new_feature, old_feature) in enumerate(zip(new_features, old_features)):
-                # get points (e.g (x, y)) and calculate distance
-                new_feature_point = new_feature.ravel()
-                old_feature_point = old_feature.ravel()
-                distance = self.bbox_utils.measure_distance(new_feature_point, old_feature_point)
-
-                # update max distance and camera movement if needed
-                if distance > max_distance:
-                    max_distance = distance
-                    camera_x, camera_y = self.bbox_utils.measure_xy_distance(new_feature_point, old_feature_point)
-
-            # update movement if it exceeds threshold
-            if max_distance > self.minimum_distance:
-                camera_movement[frame_num] = camera_x, camera_y
+            # measure movement of all tracked features at once, rescaled to full resolution
+            movements = (new_features - old_features).reshape(-1, 2) / self.scale
+            distances = np.sqrt((movements ** 2).sum(axis=1))
+
+            # update movement if max movement exceeds threshold
+            max_index = distances.argmax()
+            if distances[max_index] > self.minimum_distance:
+                camera_movement[frame_num] = float(movements[max_index][0]), float(movements[max_index][1])
                 old_features = cv2.goodFeaturesToTrack(new_gray, **self.features)
 
             # update old frame to new one
             old_gray = new_gray.copy()
 
-        # save computed movements if stub_path is given
-        if stub_path:
-            with open(stub_path, 'wb') as f:
-                pickle.dump(camera_movement, f)
+        return camera_movement, old_gray, old_features
+
+    def track_points(self, old_gray, new_gray, points):
+        # follow full resolution (n, 2) points from old to new gray frame with same LK parameters,
+        # returns new points at full resolution and mask of points which were found
+        old_points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2) * self.scale
+        if len(old_points) == 0:
+            return np.empty((0, 2)), np.zeros(0, dtype=bool)
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+            prevImg=old_gray, nextImg=new_gray, prevPts=old_points, nextPts=None, **self.lk_params
+        )
+
+        return new_points.reshape(-1, 2) / self.scale, status.reshape(-1) == 1
+
+    def get_gray_frame(self, frame):
+        # convert frame to grayscale and downscale it if fast mode is used
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.scale != 1:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+        return gray
+
+    def draw_frame_camera_movement(self, frame, camera_movement):
+        # create an overlay for displaying movement info
+        alpha = 0.6
+        self.bbox_utils.draw_transparent_rectangle(frame, (0, 0), (500, 100), (255, 255, 255), alpha)
+
+        # extract movement values for current frame
+        movement_x, movement_y = camera_movement
+        movement_x_text = f"Camera Movement X: {movement_x:.2f}"
+        movement_y_text = f"Camera Movement Y: {movement_y:.2f}"
+
+        # draw movement text on frame
+        frame = cv2.putText(frame, movement_x_text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 3)
+        frame = cv2.putText(frame, movement_y_text, (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 3)
+
+        return frame
 
-        return camera_movement
-    
     def draw_camera_movement(self, frames, camera_movement_per_frame):
         # initialize output frames
         output_frames = []
@@ -108,22 +177,10 @@ class CameraMovementEstimator:
             # create a copy to avoid modifying the original frame
             frame = frame.copy()  
 
-            # create an overlay for displaying movement info
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (0, 0), (500, 100), (255, 255, 255), -1)
-            alpha = 0.6
-            cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
-
-            # extract movement values for current frame
-            movement_x, movement_y = camera_movement_per_frame[frame_num]
-            movement_x_text = f"Camera Movement X: {movement_x:.2f}"
-            movement_y_text = f"Camera Movement Y: {movement_y:.2f}"
-
-            # draw movement text on frame
-            frame = cv2.putText(frame, movement_x_text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 3)
-            frame = cv2.putText(frame, movement_y_text, (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 3)
+            # draw movement panel for current frame
+            frame = self.draw_frame_camera_movement(frame, camera_movement_per_frame[frame_num])
 
             # store modified frame
             output_frames.append(frame)  
 
-        return output_frames 
\ No newline at end of file
+        return output_frames 
@@ -0,0 +1,3 @@
+from .inference_backend import InferenceBackend
+from .torch_backend import TorchBackend
+from .onnx_backend import OnnxBackend
\ No newline at end of file
@@ -0,0 +1,21 @@
+import os
+
+class InferenceBackend:
+    # common interface of model runtimes: detect(frames, conf, imgsz) returns (class names, sv.Detections) per frame,
+    # so ByteTrack gets the same input whatever runs the model (imgsz: inference size of long side or None for model default)
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+        # {class id: class name} of model
+        self.names = {}
+
+    @classmethod
+    def create(cls, model_path, **kwargs):
+        # .onnx models run on ONNX Runtime, everything else (e.g. .pt) on PyTorch through ultralytics
+        # backends are imported here so only runtime which is used gets imported
+        if os.path.splitext(model_path)[1].lower() == '.onnx':
+            from .onnx_backend import OnnxBackend
+            return OnnxBackend(model_path, **kwargs)
+
+        from .torch_backend import TorchBackend
+        return TorchBackend(model_path, **kwargs)
@@ -0,0 +1,109 @@
+import os
+import shutil
+import argparse
+from src.utils import VideoUtils
+from .onnx_backend import OnnxBackend
+
+class CalibrationReader:
+    # feeds preprocessed video frames to ONNX Runtime static quantization, one frame per call
+    def __init__(self, backend, frames):
+        self.backend = backend
+        self.frames = frames
+        self.index = 0
+
+    def get_next(self):
+        if self.index >= len(self.frames):
+            return None
+        batch, _, _ = self.backend.preprocess([self.frames[self.index]])
+        self.index += 1
+        return {self.backend.input_name: batch}
+
+    def rewind(self):
+        self.index = 0
+
+class ModelExporter:
+    def __init__(self, model_path, output_dir=None, imgsz=640, dynamic=True):
+        self.model_path = model_path
+
+        # exported models are saved next to original model by default
+        self.output_dir = output_dir or os.path.dirname(model_path)
+        self.imgsz = imgsz
+
+        # dynamic batch and input size, needed for batched detection and multi-resolution detection
+        self.dynamic = dynamic
+
+    def get_output_path(self, suffix):
+        name = os.path.splitext(os.path.basename(self.model_path))[0]
+        return os.path.join(self.output_dir, f"{name}{suffix}.onnx")
+
+    def export_fp32(self):
+        # ultralytics exports ONNX with class names, stride and inference size as metadata
+        from ultralytics import YOLO
+        exported_path = YOLO(self.model_path).export(format='onnx', imgsz=self.imgsz, dynamic=self.dynamic)
+
+        output_path = self.get_output_path('')
+        if os.path.abspath(exported_path) != os.path.abspath(output_path):
+            os.makedirs(self.output_dir, exist_ok=True)
+            shutil.move(exported_path, output_path)
+
+        return output_path
+
+    def get_head_nodes(self, model):
+        # box decoding of detect head (last /model.N/ module) except its convolutions, its output mixes
+        # box coordinates (0-640) and class scores (0-1), which one INT8 range can not hold
+        modules = {node.name.split('/')[1] for node in model.graph.node if node.name.startswith('/model.')}
+        if not modules:
+            return []
+
+        head = max(modules, key=lambda module: int(module.split('.')[1]))
+        return [node.name for node in model.graph.node if node.name.startswith(f"/{head}/") and node.op_type != 'Conv']
+
+    def quantize_int8(self, fp32_path, calibration_video_path=None, calibration_frames=32):
+        import onnx
+        from onnxruntime.quantization import quantize_static, quantize_dynamic, QuantFormat, QuantType
+
+        output_path = self.get_output_path('_int8')
+        fp32_model = onnx.load(fp32_path)
+        head_nodes = self.get_head_nodes(fp32_model)
+
+        if calibration_video_path:
+            # static quantization: activation ranges are measured on frames of a real match
+            backend = OnnxBackend(fp32_path)
+            vu = VideoUtils()
+            step = max(1, vu.get_video_properties(calibration_video_path)['frame_count'] // calibration_frames)
+            video_frames = vu.read_frames_at(calibration_video_path, range(0, step * calibration_frames, step))
+            reader = CalibrationReader(backend, video_frames)
+            quantize_static(fp32_path, output_path, reader, quant_format=QuantFormat.QDQ, per_channel=True,
+                            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, nodes_to_exclude=head_nodes)
+        else:
+            # without calibration frames only weights are quantized, activations are quantized at runtime
+            quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QUInt8, nodes_to_exclude=head_nodes)
+
+        # quantization drops model metadata, backend needs class names and inference size
+        int8_model = onnx.load(output_path)
+        del int8_model.metadata_props[:]
+        int8_model.metadata_props.extend(fp32_model.metadata_props)
+        onnx.save(int8_model, output_path)
+
+        return output_path
+
+
+if __name__ == '__main__':
+    # python -m src.inference_backend.model_exporter --model ./models/best.pt --calibration-video ./input_videos/input.mp4
+    parser = argparse.ArgumentParser(description='Export YOLO model to FP32 and INT8 ONNX models for ONNX Runtime')
+    parser.add_argument('--model', default='./models/best.pt', help='YOLO model path')
+    parser.add_argument('--output-dir', default=None, help='directory of exported models, defaults to directory of model')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--static-shape', action='store_true', help='export fixed batch size and input size')
+    parser.add_argument('--calibration-video', default=None, help='video for static INT8 quantization, weights only quantization if not given')
+    parser.add_argument('--calibration-frames', type=int, default=32)
+    parser.add_argument('--skip-int8', action='store_true')
+    args = parser.parse_args()
+
+    exporter = ModelExporter(args.model, args.output_dir, args.imgsz, dynamic=not args.static_shape)
+    fp32_path = exporter.export_fp32()
+    print(f"FP32 model saved to: {fp32_path}")
+
+    if not args.skip_int8:
+        int8_path = exporter.quantize_int8(fp32_path, args.calibration_video, args.calibration_frames)
+        print(f"INT8 model saved to: {int8_path}")
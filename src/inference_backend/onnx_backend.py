@@ -0,0 +1,136 @@
+import ast
+import cv2
+import numpy as np
+import supervision as sv
+from .inference_backend import InferenceBackend
+
+class OnnxBackend(InferenceBackend):
+    def __init__(self, model_path, num_threads=None, iou=0.7, max_det=300):
+        super().__init__(model_path)
+
+        # onnxruntime is optional, only needed for .onnx models
+        import onnxruntime
+
+        # threads of CPU execution provider, None lets ONNX Runtime use all cores
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+
+        # ultralytics export stores class names, inference size and stride as metadata
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata['names'])
+        self.stride = int(metadata.get('stride', 32))
+        self.imgsz = ast.literal_eval(metadata.get('imgsz', '[640, 640]'))
+
+        # static exports have fixed batch and input size, dynamic ones (named dimensions) take any
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, width = model_input.shape
+        self.batch_size = batch if isinstance(batch, int) else None
+        self.dynamic = not isinstance(height, int)
+        if not self.dynamic:
+            self.imgsz = [height, width]
+
+        # same non-maximum suppression settings as ultralytics predict
+        self.iou = iou
+        self.max_det = max_det
+
+    def letterbox(self, frame, imgsz):
+        # resize keeping aspect ratio and pad with gray like ultralytics, dynamic models are only padded to stride multiple
+        height, width = frame.shape[:2]
+        new_height, new_width = imgsz
+        ratio = min(new_height / height, new_width / width)
+        resized_width, resized_height = round(width * ratio), round(height * ratio)
+
+        pad_width, pad_height = new_width - resized_width, new_height - resized_height
+        if self.dynamic:
+            pad_width, pad_height = pad_width % self.stride, pad_height % self.stride
+        pad_width, pad_height = pad_width / 2, pad_height / 2
+
+        if (resized_width, resized_height) != (width, height):
+            frame = cv2.resize(frame, (resized_width, resized_height), interpolation=cv2.INTER_LINEAR)
+        top, bottom = round(pad_height - 0.1), round(pad_height + 0.1)
+        left, right = round(pad_width - 0.1), round(pad_width + 0.1)
+        frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+        return frame, ratio, (left, top)
+
+    def preprocess(self, frames, imgsz=None):
+        # BGR frames -> (n, 3, h, w) float RGB batch in [0, 1], with scale and padding to map boxes back
+        if imgsz is None or not self.dynamic:
+            imgsz = self.imgsz
+        elif isinstance(imgsz, int):
+            imgsz = [imgsz, imgsz]
+
+        images, ratios, pads = [], [], []
+        for frame in frames:
+            image, ratio, pad = self.letterbox(frame, imgsz)
+            images.append(image)
+            ratios.append(ratio)
+            pads.append(pad)
+
+        batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+        batch = np.ascontiguousarray(batch, dtype=np.float32) / 255
+
+        return batch, ratios, pads
+
+    def non_max_suppression(self, boxes, scores):
+        # greedy suppression of boxes overlapping a higher scoring box more than iou, indices by descending score
+        order = np.argsort(-scores, kind='stable')
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        keep = []
+        while len(order) and len(keep) < self.max_det:
+            index, order = order[0], order[1:]
+            keep.append(index)
+
+            top_left = np.maximum(boxes[index, :2], boxes[order, :2])
+            bottom_right = np.minimum(boxes[index, 2:], boxes[order, 2:])
+            intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=1)
+            iou = intersection / (areas[index] + areas[order] - intersection + 1e-9)
+            order = order[iou <= self.iou]
+
+        return np.array(keep, dtype=int)
+
+    def postprocess(self, prediction, conf, ratio, pad, frame_shape):
+        # (4 + classes, anchors) output of one image -> supervision detections in frame coordinates
+        prediction = prediction.T
+        class_scores = prediction[:, 4:]
+        class_id = class_scores.argmax(axis=1)
+        confidence = class_scores[np.arange(len(class_scores)), class_id]
+
+        candidates = confidence > conf
+        xywh, confidence, class_id = prediction[candidates, :4], confidence[candidates], class_id[candidates]
+        xyxy = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+
+        # classes are suppressed separately by moving their boxes apart
+        keep = self.non_max_suppression(xyxy + class_id[:, None] * 7680.0, confidence)
+        xyxy, confidence, class_id = xyxy[keep], confidence[keep], class_id[keep]
+
+        # undo letterbox
+        height, width = frame_shape[:2]
+        xyxy = (xyxy - np.array([pad[0], pad[1], pad[0], pad[1]])) / ratio
+        xyxy = np.clip(xyxy, 0, [width, height, width, height]).astype(np.float32)
+
+        return sv.Detections(
+            xyxy=xyxy.reshape(-1, 4),
+            confidence=confidence.astype(np.float32),
+            class_id=class_id.astype(int),
+            data={'class_name': np.array([self.names[i] for i in class_id], dtype=str)},
+        )
+
+    def run(self, batch):
+        # static models with fixed batch size run image by image
+        if self.batch_size is None or self.batch_size == len(batch):
+            return self.session.run(None, {self.input_name: batch})[0]
+        return np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))])
+
+    def detect(self, frames, conf=0.1, imgsz=None):
+        if len(frames) == 0:
+            return []
+
+        batch, ratios, pads = self.preprocess(frames, imgsz)
+        predictions = self.run(batch)
+
+        return [(self.names, self.postprocess(prediction, conf, ratio, pad, frame.shape))
+                for prediction, ratio, pad, frame in zip(predictions, ratios, pads, frames)]
@@ -0,0 +1,18 @@
+import supervision as sv
+from .inference_backend import InferenceBackend
+
+class TorchBackend(InferenceBackend):
+    def __init__(self, model_path):
+        super().__init__(model_path)
+
+        # ultralytics (and torch) are slow to import, so only when this backend is used
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def detect(self, frames, conf=0.1, imgsz=None):
+        # ultralytics picks inference size of model unless imgsz is given
+        options = {'imgsz': imgsz} if imgsz else {}
+        results = self.model.predict(frames, conf=conf, verbose=False, **options)
+
+        return [(result.names, sv.Detections.from_ultralytics(result)) for result in results]
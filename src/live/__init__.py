@@ -0,0 +1,2 @@
+from .live_frame_source import LiveFrameSource
+from .latency_controller import LatencyController
\ No newline at end of file
@@ -0,0 +1,71 @@
+import time
+from src.profiler import StageProfiler
+
+class LatencyController:
+    # work done at each degradation level: overlays drawn and detector stride (boxes are propagated in between)
+    levels = [
+        {'overlays': True, 'detection_stride': 1},
+        {'overlays': False, 'detection_stride': 1},
+        {'overlays': False, 'detection_stride': 2},
+        {'overlays': False, 'detection_stride': 4},
+        {'overlays': False, 'detection_stride': 8},
+    ]
+
+    def __init__(self, latency_budget=0.1, cooldown_frames=6, recovery_fraction=0.5):
+        # seconds from capture to annotated frame a frame may take
+        self.latency_budget = latency_budget
+
+        # frames to wait after changing level, so effect of last change is measured before next one
+        self.cooldown_frames = cooldown_frames
+
+        # work is restored when latency stays below this fraction of budget for a whole cooldown
+        self.recovery_fraction = recovery_fraction
+
+        self.level = 0
+        self.frames_since_change = 0
+        self.frames_below_budget = 0
+        self.frames_dropped = 0
+
+        self.latencies = []
+        self.level_frames = [0] * len(self.levels)
+        self.level_changes = 0
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def update(self, capture_time, frames_dropped=0):
+        # end-to-end latency of frame which was just emitted, returns settings for next frame
+        # frames_dropped: total frames source skipped so far, skipping any since last frame means consumer fell behind
+        latency = time.perf_counter() - capture_time
+        dropped = frames_dropped > self.frames_dropped
+        self.frames_dropped = frames_dropped
+
+        self.latencies.append(latency)
+        self.level_frames[self.level] += 1
+        self.frames_since_change += 1
+        below_budget = latency < self.latency_budget * self.recovery_fraction and not dropped
+        self.frames_below_budget = self.frames_below_budget + 1 if below_budget else 0
+
+        if self.frames_since_change >= self.cooldown_frames:
+            if (latency > self.latency_budget or dropped) and self.level < len(self.levels) - 1:
+                self.change_level(1)
+            elif self.frames_below_budget >= self.cooldown_frames and self.level > 0:
+                self.change_level(-1)
+
+        return self.settings
+
+    def change_level(self, step):
+        self.level += step
+        self.level_changes += 1
+        self.frames_since_change = 0
+        self.frames_below_budget = 0
+
+    def report(self):
+        # end-to-end latency percentiles and share of frames processed at every degradation level
+        report = StageProfiler().get_frame_latency_report(self.latencies) if self.latencies else {'frames': 0}
+        report['budget_ms'] = self.latency_budget * 1000
+        report['over_budget_frames'] = sum(latency > self.latency_budget for latency in self.latencies)
+        report['level_frames'] = self.level_frames
+        report['level_changes'] = self.level_changes
+        return report
@@ -0,0 +1,91 @@
+import cv2
+import time
+import queue
+import threading
+
+class LiveFrameSource:
+    def __init__(self, source, realtime=True, queue_size=1):
+        # source: video file, RTSP / HTTP stream URL or camera index ("0")
+        self.source = int(source) if str(source).isdigit() else source
+        self.capture = cv2.VideoCapture(self.source)
+        if not self.capture.isOpened():
+            raise ValueError(f"Could not open video source: {source}")
+
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 24
+        self.frame_size = (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        # files are read as fast as possible unless replayed at their frame rate as stand-in for a camera,
+        # cameras and streams deliver frames at their own rate anyway
+        self.is_file = isinstance(self.source, str) and '://' not in self.source
+        self.realtime = realtime and self.is_file
+
+        # cameras and streams keep only newest frames, a consumer which falls behind skips frames instead of adding delay
+        # files never skip frames, reader waits for consumer (a replayed file then falls behind its schedule instead)
+        self.drop_frames = not self.is_file
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.stop_event = threading.Event()
+
+        self.thread = threading.Thread(target=self.read, daemon=True)
+        self.thread.start()
+
+    def put(self, item):
+        if not self.drop_frames:
+            self.put_wait(item)
+            return
+
+        # replace oldest waiting frame when queue is full
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def put_wait(self, item):
+        # wait for free place in queue, gives up when source is closed so close never waits for a consumer which stopped
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def read(self):
+        # producer: (frame number, frame, capture time) of every frame, None marks end of source
+        # capture time of replayed file is its schedule, so waiting for consumer counts as latency
+        start_time = time.perf_counter()
+        while not self.stop_event.is_set():
+            if self.realtime:
+                # wait until frame would have been captured by a camera
+                delay = start_time + self.frames_read / self.fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            ret, frame = self.capture.read()
+            if not ret:
+                break
+
+            capture_time = start_time + self.frames_read / self.fps if self.realtime else time.perf_counter()
+            self.put((self.frames_read, frame, capture_time))
+            self.frames_read += 1
+
+        # end marker never replaces last frame
+        self.capture.release()
+        self.put_wait(None)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            yield item
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
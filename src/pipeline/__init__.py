@@ -0,0 +1 @@
+from .pipeline import Pipeline
\ No newline at end of file
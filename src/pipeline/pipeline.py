@@ -0,0 +1,503 @@
+import os
+from src.utils import VideoUtils, VideoWriter, FrameReader
+from src.tracker import Tracker, BallInterpolator, KeyframeDetector, TrackCheckpoint
+from src.team_assigner import TeamAssigner
+from src.ball_assigner import BallAssigner, PossessionStats
+from src.camera_movement_estimator import CameraMovementEstimator
+from src.view_transformer import ViewTransformer
+from src.speed_and_distance_estimator import SpeedAndDistanceEstimator
+from src.track_store import TrackStore, ColumnarFile
+from src.annotation_compositor import AnnotationCompositor
+from src.profiler import StageProfiler
+from src.live import LiveFrameSource, LatencyController
+from src.track_index import TrackIndex
+
+class Pipeline:
+    def __init__(self, model_path, camera_movement_scale=1.0, cache=None, speed_window=5, max_speed=None, predict_ball=False, profiler=None, segment_runner=None, keyframe_stride=1, low_resolution=None, ball_roi_size=256, checkpoint_dir=None, checkpoint_chunk_size=1000, save_tracks=True):
+        print("Initializing video utilities...\n")
+        self.vu = VideoUtils()
+
+        print("Initializing tracker with model...\n")
+        self.tracker = Tracker(model_path, keyframe_stride, low_resolution, ball_roi_size)
+
+        # StageProfiler records time and memory of every stage, disabled one costs nothing
+        self.profiler = profiler or StageProfiler()
+        self.tracker.profiler = self.profiler
+
+        # SegmentRunner computes tracks and camera movement of time segments in parallel workers, None runs them here
+        self.segment_runner = segment_runner
+
+        # downscale factor for camera movement estimation (1.0 is full resolution)
+        self.camera_movement_scale = camera_movement_scale
+
+        # StageCache for expensive stages, None disables caching
+        self.cache = cache
+
+        # frames per speed window and optional max speed (km/h) above which windows are smoothed as outliers
+        self.speed_window = speed_window
+        self.max_speed = max_speed
+
+        # streaming mode: predict ball missing at end of window with constant velocity instead of holding last bbox
+        self.predict_ball = predict_ball
+
+        # offline tracking writes chunks of tracks and tracker snapshots here, an interrupted run resumes after last chunk
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_chunk_size = checkpoint_chunk_size
+
+        # TrackIndex over tracks of last offline run, answers per-player and per-team queries without scanning frames
+        # save_tracks also writes its tracks next to output video (output_tracks directory), so finished matches can be queried later
+        self.track_index = None
+        self.save_tracks = save_tracks
+
+    def create_speed_and_distance_estimator(self, input_video_path):
+        # speed is measured in real time, so frame rate comes from the video (24 if it is unknown)
+        properties = self.vu.get_video_properties(input_video_path)
+        frame_rate = properties['fps'] if properties and properties['fps'] > 0 else 24
+        return SpeedAndDistanceEstimator(frame_rate, self.speed_window, self.max_speed)
+
+    def get_detection_params(self):
+        # detection settings results depend on, keyframe and multi-resolution settings only when they are used
+        params = {'conf': self.tracker.conf}
+        keyframe_detector = self.tracker.keyframe_detector
+        if keyframe_detector is not None:
+            params['keyframes'] = {'stride': keyframe_detector.stride,
+                                   'scene_change_threshold': keyframe_detector.scene_change_threshold,
+                                   'motion_threshold': keyframe_detector.motion_threshold,
+                                   'min_tracked_fraction': keyframe_detector.min_tracked_fraction,
+                                   'scale': keyframe_detector.scale}
+        multi_resolution_detector = self.tracker.multi_resolution_detector
+        if multi_resolution_detector is not None:
+            params['multi_resolution'] = {'low_resolution': multi_resolution_detector.low_resolution,
+                                          'ball_roi_size': multi_resolution_detector.ball_roi_size,
+                                          'max_predicted_frames': multi_resolution_detector.max_predicted_frames,
+                                          'recovery_interval': multi_resolution_detector.recovery_interval}
+        return params
+
+    def get_tracks_output_path(self, output_video_path):
+        # e.g. ./output_videos/output.mp4 -> ./output_videos/output_tracks
+        return os.path.splitext(output_video_path)[0] + '_tracks'
+
+    def create_track_checkpoint(self, input_video_path):
+        if self.checkpoint_dir is None:
+            return None
+
+        # chunks are only reused for same video file, model file and detection settings
+        # (size and modification time tell when new weights were saved to same model path)
+        video_stat = os.stat(input_video_path)
+        model_stat = os.stat(self.tracker.model_path)
+        return TrackCheckpoint(self.checkpoint_dir, self.checkpoint_chunk_size,
+                               params={'video': os.path.abspath(input_video_path), 'size': video_stat.st_size, 'mtime_ns': video_stat.st_mtime_ns,
+                                       'model': os.path.abspath(self.tracker.model_path), 'model_size': model_stat.st_size,
+                                       'model_mtime_ns': model_stat.st_mtime_ns, **self.get_detection_params()})
+
+    def get_object_tracks(self, cache, input_video_path, video_frames):
+        checkpoint = self.create_track_checkpoint(input_video_path)
+        if cache is None:
+            return self.tracker.get_object_tracks(video_frames, checkpoint=checkpoint)
+
+        # tracks depend on video, model weights, detection confidence and keyframe settings
+        return cache.get_or_compute('tracks',
+                                    lambda: self.tracker.get_object_tracks(video_frames, checkpoint=checkpoint),
+                                    files=[input_video_path, self.tracker.model_path],
+                                    params=self.get_detection_params())
+
+    def get_camera_movement(self, cache, input_video_path, video_frames, camera_movement_estimator):
+        if cache is None:
+            return camera_movement_estimator.get_camera_movement(video_frames)
+
+        # camera movement depends on video and LK / feature parameters (including feature mask)
+        return cache.get_or_compute('camera_movement',
+                                    lambda: camera_movement_estimator.get_camera_movement(video_frames),
+                                    files=[input_video_path],
+                                    params={'minimum_distance': camera_movement_estimator.minimum_distance,
+                                            'lk_params': camera_movement_estimator.lk_params,
+                                            'features': camera_movement_estimator.features,
+                                            'scale': camera_movement_estimator.scale})
+
+    def get_segmented_tracks(self, cache, input_video_path, camera_movement_estimator):
+        runner = self.segment_runner
+        if cache is None:
+            return runner.run(input_video_path)
+
+        # stitched ids and chained camera movement also depend on how video was split
+        return cache.get_or_compute('segmented_tracks',
+                                    lambda: runner.run(input_video_path),
+                                    files=[input_video_path, self.tracker.model_path],
+                                    params={**self.get_detection_params(),
+                                            'num_segments': runner.num_segments,
+                                            'overlap': runner.overlap,
+                                            'min_iou': runner.min_iou,
+                                            'window_size': runner.window_size,
+                                            'minimum_distance': camera_movement_estimator.minimum_distance,
+                                            'lk_params': camera_movement_estimator.lk_params,
+                                            'features': camera_movement_estimator.features,
+                                            'scale': camera_movement_estimator.scale})
+
+    def get_team_assigner(self, cache, input_video_path, video_frames, tracks):
+        def fit_team_assigner():
+            team_assigner = TeamAssigner()
+            team_assigner.assign_team_color(video_frames[0], tracks['players'][0])
+            # resolves team of every player id, so cached assigner needs no more color extraction
+            team_assigner.add_team_to_tracks(video_frames, tracks)
+            return team_assigner
+
+        if cache is None:
+            return fit_team_assigner()
+
+        # team colors depend on video frames, player tracks actually used (ids differ between sequential, segmented
+        # and stub tracks, so they are keyed by content) and color clustering parameters
+        players = tracks.object_rows('players')
+        return cache.get_or_compute('team_assigner',
+                                    fit_team_assigner,
+                                    files=[input_video_path],
+                                    params={'players': {'frame': tracks.frame[players],
+                                                        'track_id': tracks.track_id[players],
+                                                        'bbox': tracks.bbox[players]},
+                                            'color_iterations': TeamAssigner().color_iterations})
+
+    def run(self, input_video_path, output_video_path, tracks_stub_path=None, camera_movement_stub_path=None):
+        vu = self.vu
+        tracker = self.tracker
+        profiler = self.profiler
+
+        # same pipeline can process several videos (batch workers), tracking starts fresh for every one
+        tracker.reset()
+
+        # stubs are hand-picked results, cache is not used together with them
+        cache = None if (tracks_stub_path or camera_movement_stub_path) else self.cache
+        use_segments = self.segment_runner is not None and not (tracks_stub_path or camera_movement_stub_path)
+
+        if use_segments:
+            # segment workers decode their own time ranges, here frames are only read where team colors need them
+            # and once more while rendering, so whole video is never held in memory
+            video_frames = FrameReader(input_video_path)
+            num_frames = 0
+        elif tracks_stub_path:
+            print(f"Reading video frames from: {input_video_path}")
+            with profiler.stage('read_video'):
+                video_frames = vu.read_video(input_video_path)
+            num_frames = len(video_frames)
+            profiler.add_frames('read_video', num_frames)
+            print(f"Total frames loaded: {num_frames}\n")
+        else:
+            # detection decodes video itself: its decode thread reads next frames while earlier ones are inferred,
+            # decoded frames are kept for later stages (reading time is part of object_tracks stage)
+            print(f"Decoding video frames from: {input_video_path} during detection\n")
+            video_frames = []
+            frame_reader = vu.collect_frames(input_video_path, video_frames)
+            num_frames = 0
+
+        # segment workers produce tracks and camera movement together
+        camera_movement_per_frame = None
+
+        print("Getting object tracks...")
+        with profiler.stage('object_tracks', num_frames):
+            if use_segments:
+                camera_movement_estimator = CameraMovementEstimator(video_frames[0], self.camera_movement_scale)
+                tracks, camera_movement_per_frame = self.get_segmented_tracks(cache, input_video_path, camera_movement_estimator)
+                num_frames = len(tracks['players'])
+            elif tracks_stub_path:
+                tracks = tracker.get_object_tracks(video_frames, 
+                                                   read_from_stub=True,
+                                                   stub_path=tracks_stub_path)
+            else:
+                tracks = self.get_object_tracks(cache, input_video_path, frame_reader)
+                # rest of video when detection did not need it (cached or checkpointed tracks)
+                for _ in frame_reader:
+                    pass
+                num_frames = len(video_frames)
+                print(f"Total frames loaded: {num_frames}")
+            tracks = TrackStore.from_tracks(tracks)
+        # frames only known once tracking read them
+        if not tracks_stub_path:
+            profiler.add_frames('object_tracks', num_frames)
+        print("Object tracking complete.\n")
+
+        print("Adding position to tracks...")
+        with profiler.stage('add_position_to_tracks', num_frames):
+            tracker.add_position_to_tracks(tracks)
+        print("Adding position to tracks complete.\n")
+
+        print("Estimating camera movements...")
+        with profiler.stage('camera_movement', num_frames):
+            camera_movement_estimator = CameraMovementEstimator(video_frames[0], self.camera_movement_scale)
+            if camera_movement_stub_path:
+                camera_movement_per_frame = camera_movement_estimator.get_camera_movement(video_frames, 
+                                                                                          read_from_stub=True,
+                                                                                          stub_path=camera_movement_stub_path)
+            elif camera_movement_per_frame is None:
+                camera_movement_per_frame = self.get_camera_movement(cache, input_video_path, video_frames, camera_movement_estimator)
+        print("Camera movement estimation complete.\n")
+
+        print("Adjusting track positions...")
+        with profiler.stage('adjust_track_positions', num_frames):
+            camera_movement_estimator.adjust_track_positions(tracks, camera_movement_per_frame)
+        print("Adjusting track positions complete.\n")
+
+        print("Adjusting view transformations...")
+        with profiler.stage('view_transform', num_frames):
+            view_transformer = ViewTransformer()
+            view_transformer.add_transformed_position_to_tracks(tracks)
+        print("Adjusting view transformations complete.\n")
+
+        print("Interpolating ball positions...")
+        with profiler.stage('interpolate_ball_position', num_frames):
+            tracks['ball'] = tracker.interpolate_ball_position(tracks['ball'])
+        print("Ball position interpolation complete.\n")
+
+        print("Estimating speed and distance...")
+        with profiler.stage('speed_and_distance', num_frames):
+            speed_and_distance_estimator = self.create_speed_and_distance_estimator(input_video_path)
+            speed_and_distance_estimator.add_speed_and_distance_to_tracks(tracks)
+        print("Estimating speed and distance complete.\n")
+
+        print("Assigning team colors for the first frame...")
+        with profiler.stage('team_colors'):
+            team_assigner = self.get_team_assigner(cache, input_video_path, video_frames, tracks)
+        print("Team color assignment complete.\n")
+
+        print("Assigning teams to players across frames...")
+        with profiler.stage('team_assignment', num_frames):
+            team_assigner.add_team_to_tracks(video_frames, tracks)
+        print("Player team assignment complete.\n")
+
+        print("Initializing ball assigner...")
+        ball_assigner = BallAssigner()
+
+        print("Assigning ball possession...")
+        with profiler.stage('ball_possession', num_frames):
+            team_ball_control = ball_assigner.assign_ball_possession(tracks)
+
+            # running possession percentages for all frames at once, renderer only looks them up
+            possession_stats = PossessionStats()
+            possession_stats.add_team_ball_control(team_ball_control)
+        print("Ball possession assignment complete.\n")
+
+        print("Indexing tracks...")
+        with profiler.stage('track_index', num_frames):
+            self.track_index = TrackIndex(tracks, speed_and_distance_estimator.frame_rate)
+            if self.save_tracks:
+                tracks_output_path = self.get_tracks_output_path(output_video_path)
+                self.track_index.save(tracks_output_path)
+        print("Track indexing complete.\n")
+        if self.save_tracks:
+            print(f"Tracks saved to: {tracks_output_path}\n")
+
+        # frames are annotated one by one and handed to encoder thread while next frame is drawn
+        print(f"Drawing annotations and saving output video to: {output_video_path}")
+        with profiler.stage('render_and_save_video', num_frames):
+            compositor = AnnotationCompositor(tracker, camera_movement_estimator, speed_and_distance_estimator)
+            # segmented runs decode video again while rendering
+            render_frames = vu.generate_frames(input_video_path, 0, num_frames) if use_segments else video_frames
+            num_rendered = 0
+            with vu.create_video_writer(input_video_path, output_video_path) as writer:
+                frames = compositor.compose_frames(render_frames, tracks, possession_stats, camera_movement_per_frame)
+                for frame in profiler.time_frames('render', frames):
+                    writer.write(frame)
+                    num_rendered += 1
+        print(writer.report())
+        if num_rendered != num_frames:
+            raise ValueError(f"Video has {num_rendered} frames but tracks cover {num_frames} frames")
+        print("Video saved successfully.\n")
+
+    def run_stream(self, input_video_path, output_video_path, window_size=240, tracks_stub_path=None, camera_movement_stub_path=None):
+        vu = self.vu
+        tracker = self.tracker
+        profiler = self.profiler
+
+        # same pipeline can process several videos (batch workers), tracking starts fresh for every one
+        tracker.reset()
+
+        # windows read their frame range from stubs, which only works with memory-mapped columnar stubs
+        for stub_path in [tracks_stub_path, camera_movement_stub_path]:
+            if stub_path and not ColumnarFile().is_columnar(stub_path):
+                raise ValueError(f"Streaming mode needs columnar stubs, convert {stub_path} with: python -m src.track_store.columnar_file")
+
+        print(f"Streaming video frames from: {input_video_path} (window size: {window_size})\n")
+        # output fps and frame size come from input video metadata
+        writer = vu.create_video_writer(input_video_path, output_video_path)
+        if writer is None:
+            print(f"Could not open video: {input_video_path}\n")
+            return
+
+        # stages keep their own state across windows (ByteTrack, LK features, ball gaps, distances, team colors)
+        camera_movement_estimator = None
+        view_transformer = ViewTransformer()
+        speed_and_distance_estimator = self.create_speed_and_distance_estimator(input_video_path)
+        team_assigner = TeamAssigner()
+        ball_assigner = BallAssigner()
+
+        # running possession counts, updated window by window
+        possession_stats = PossessionStats()
+        last_team_ball_control = -1
+        ball_interpolator = BallInterpolator(predict=self.predict_ball)
+
+        window_start = 0
+        for video_frames in vu.read_video_windows(input_video_path, window_size):
+            num_frames = len(video_frames)
+
+            # tracks are local to window, frame 0 is window_start in video
+            window_range = (window_start, window_start + num_frames)
+            with profiler.stage('object_tracks', num_frames):
+                tracks = TrackStore.from_tracks(tracker.get_object_tracks(video_frames,
+                                                                          read_from_stub=tracks_stub_path is not None,
+                                                                          stub_path=tracks_stub_path,
+                                                                          frame_range=window_range))
+            with profiler.stage('add_position_to_tracks', num_frames):
+                tracker.add_position_to_tracks(tracks)
+
+            with profiler.stage('camera_movement', num_frames):
+                if camera_movement_estimator is None:
+                    camera_movement_estimator = CameraMovementEstimator(video_frames[0], self.camera_movement_scale)
+                if camera_movement_stub_path:
+                    camera_movement_per_frame = camera_movement_estimator.get_camera_movement(video_frames,
+                                                                                              read_from_stub=True,
+                                                                                              stub_path=camera_movement_stub_path,
+                                                                                              frame_range=window_range)
+                else:
+                    camera_movement_per_frame = camera_movement_estimator.update_camera_movement(video_frames)
+            with profiler.stage('adjust_track_positions', num_frames):
+                camera_movement_estimator.adjust_track_positions(tracks, camera_movement_per_frame)
+
+            with profiler.stage('view_transform', num_frames):
+                view_transformer.add_transformed_position_to_tracks(tracks)
+
+            # fill ball gaps online, frames at end of window can not wait for next window
+            # so they keep last bbox (or constant velocity prediction), next window interpolates from there
+            with profiler.stage('interpolate_ball_position', num_frames):
+                filled_ball = []
+                for ball in tracks['ball']:
+                    filled_ball += ball_interpolator.update(ball.get(1, {}).get('bbox'))
+                filled_ball += ball_interpolator.flush()
+                tracks['ball'] = [{1: {'bbox': bbox}} if bbox is not None else {} for _, bbox in filled_ball]
+
+            with profiler.stage('speed_and_distance', num_frames):
+                speed_and_distance_estimator.add_speed_and_distance_to_tracks(tracks)
+
+            # fit team colors on first frame of video, then reuse cached player teams
+            with profiler.stage('team_assignment', num_frames):
+                if team_assigner.kMeans is None:
+                    team_assigner.assign_team_color(video_frames[0], tracks['players'][0])
+                team_assigner.add_team_to_tracks(video_frames, tracks)
+
+            # continue with team which had the ball at end of previous window
+            with profiler.stage('ball_possession', num_frames):
+                team_ball_control = ball_assigner.assign_ball_possession(tracks, last_team_ball_control)
+                possession_stats.add_team_ball_control(team_ball_control)
+                if len(team_ball_control):
+                    last_team_ball_control = team_ball_control[-1]
+
+            # annotate window in place and hand frames to encoder thread
+            with profiler.stage('render_and_save_video', num_frames):
+                compositor = AnnotationCompositor(tracker, camera_movement_estimator, speed_and_distance_estimator)
+                frames = compositor.compose_frames(video_frames, tracks, possession_stats, camera_movement_per_frame, window_start)
+                for frame in profiler.time_frames('render', frames):
+                    writer.write(frame)
+
+            window_start += num_frames
+            print(f"Processed frames: {window_start}")
+
+        with profiler.stage('render_and_save_video'):
+            writer.close()
+        print(writer.report())
+        print(f"\nVideo saved successfully to: {output_video_path}\n")
+
+    def run_live(self, source, output_video_path, latency_budget=0.1, realtime=True):
+        tracker = self.tracker
+        profiler = self.profiler
+
+        # segments need whole video up front, live frames arrive one by one
+        if self.segment_runner is not None:
+            raise ValueError("Live mode can not be split across segment workers, run it without --workers")
+
+        # same pipeline can process several videos (batch workers), tracking starts fresh for every one
+        tracker.reset()
+
+        # frames are processed one by one as they arrive, nothing looks ahead
+        print(f"Running live on: {source} (latency budget: {latency_budget * 1000:.0f} ms)\n")
+        frame_source = LiveFrameSource(source, realtime)
+        writer = VideoWriter(output_video_path, frame_source.frame_size, frame_source.fps)
+
+        # stages keep their own state from frame to frame
+        # own keyframe detector, so live stride changes do not leak into offline runs of same pipeline
+        # keyframes go through multi-resolution detector when low resolution is set (it then predicts ball from keyframe to keyframe)
+        keyframe_detector = KeyframeDetector(tracker.model, tracker.conf, stride=1, detector=tracker.multi_resolution_detector)
+        camera_movement_estimator = None
+        view_transformer = ViewTransformer()
+        speed_and_distance_estimator = SpeedAndDistanceEstimator(frame_source.fps, self.speed_window, self.max_speed)
+        team_assigner = TeamAssigner()
+        ball_assigner = BallAssigner()
+        possession_stats = PossessionStats()
+        last_team_ball_control = -1
+
+        # no look-ahead: missing ball is filled right away with last bbox (or constant velocity prediction)
+        ball_interpolator = BallInterpolator(look_ahead=0, predict=self.predict_ball)
+
+        # drops overlays and strides detection when frames take longer than latency budget
+        controller = LatencyController(latency_budget)
+        settings = controller.settings
+
+        try:
+            for frame_num, frame, capture_time in frame_source:
+                with profiler.stage('detection', 1):
+                    # configured keyframe stride is lowest stride, controller only raises it
+                    keyframe_detector.stride = max(tracker.keyframe_stride, settings['detection_stride'])
+                    class_names, detections, _ = keyframe_detector.detect_frame(frame)
+
+                # single frame tracks in same format as offline tracks
+                with profiler.stage('object_tracks', 1):
+                    tracks = {object: [object_tracks] for object, object_tracks in tracker.update_tracks(class_names, detections).items()}
+                    tracker.add_position_to_tracks(tracks)
+
+                with profiler.stage('camera_movement', 1):
+                    if camera_movement_estimator is None:
+                        camera_movement_estimator = CameraMovementEstimator(frame, self.camera_movement_scale)
+                        compositor = AnnotationCompositor(tracker, camera_movement_estimator, speed_and_distance_estimator)
+                    camera_movement_per_frame = camera_movement_estimator.update_camera_movement([frame])
+                    camera_movement_estimator.adjust_track_positions(tracks, camera_movement_per_frame)
+                    view_transformer.add_transformed_position_to_tracks(tracks)
+
+                with profiler.stage('interpolate_ball_position', 1):
+                    [(_, ball_bbox)] = ball_interpolator.update(tracks['ball'][0].get(1, {}).get('bbox'))
+                    tracks['ball'][0] = {1: {'bbox': ball_bbox}} if ball_bbox is not None else {}
+
+                # speed of last finished window, time is measured in source frames so skipped frames count
+                with profiler.stage('speed_and_distance', 1):
+                    speed_and_distance_estimator.update_speed_and_distance(tracks['players'][0], frame_num)
+
+                # team colors are fitted on first frame with at least two players
+                with profiler.stage('team_assignment', 1):
+                    if team_assigner.kMeans is None and len(tracks['players'][0]) >= 2:
+                        team_assigner.assign_team_color(frame, tracks['players'][0])
+                    if team_assigner.kMeans is not None:
+                        team_assigner.add_team_to_tracks([frame], tracks)
+
+                with profiler.stage('ball_possession', 1):
+                    if team_assigner.kMeans is not None:
+                        last_team_ball_control = ball_assigner.assign_ball_possession(tracks, last_team_ball_control)[0]
+                    possession_stats.update(last_team_ball_control)
+
+                with profiler.stage('render_and_save_video', 1):
+                    writer.write(compositor.compose(frame, 0, tracks, possession_stats, camera_movement_per_frame,
+                                                    len(possession_stats) - 1, settings['overlays']))
+
+                settings = controller.update(capture_time, frame_source.frames_dropped)
+        finally:
+            frame_source.close()
+            with profiler.stage('render_and_save_video'):
+                writer.close()
+
+        report = controller.report()
+        report['frames_read'] = frame_source.frames_read
+        report['frames_dropped'] = frame_source.frames_dropped
+        if profiler.enabled:
+            profiler.frame_latencies['end_to_end'] = controller.latencies
+
+        print(writer.report())
+        if report['frames']:
+            print(f"End-to-end latency: p50 {report['p50_ms']:.1f} ms, p90 {report['p90_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms, "
+                  f"max {report['max_ms']:.1f} ms ({report['over_budget_frames']} of {report['frames']} frames over budget)")
+        print(f"Dropped {report['frames_dropped']} of {report['frames_read']} frames, frames per degradation level: {report['level_frames']}")
+        print(f"\nVideo saved successfully to: {output_video_path}\n")
+
+        return report
@@ -0,0 +1 @@
+from .profiler import StageProfiler
\ No newline at end of file
@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import time
+import resource
+import contextlib
+import numpy as np
+
+class StageProfiler:
+    # upper edges (ms) of per-frame latency histogram buckets, last bucket takes everything slower
+    histogram_buckets = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+    def __init__(self, enabled=False, frame_histograms=False):
+        # disabled profiler hands out no-op context managers and returns loops unchanged
+        self.enabled = enabled
+        self.frame_histograms = enabled and frame_histograms
+
+        self.stages = {}
+        self.frame_latencies = {}
+        self.null_stage = contextlib.nullcontext()
+        self.start_time = time.perf_counter()
+
+    @classmethod
+    def from_env(cls, enabled=False, frame_histograms=False):
+        # AI_FOOTBALL_PROFILE=1 enables profiling, AI_FOOTBALL_PROFILE=frames also records per-frame latencies
+        value = os.environ.get('AI_FOOTBALL_PROFILE', '').lower()
+        enabled = enabled or value not in ['', '0', 'false', 'no']
+        frame_histograms = frame_histograms or value == 'frames'
+
+        return cls(enabled, frame_histograms)
+
+    def get_peak_rss(self):
+        # peak resident memory of this process in MB (ru_maxrss is KB on linux, bytes on macOS)
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak_rss / 1024 ** 2 if sys.platform == 'darwin' else peak_rss / 1024
+
+    def stage(self, name, frames=0):
+        if not self.enabled:
+            return self.null_stage
+        return self.measure_stage(name, frames)
+
+    @contextlib.contextmanager
+    def measure_stage(self, name, frames):
+        peak_rss_before = self.get_peak_rss()
+        start_time, start_cpu_time = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            # same stage can run many times (e.g. once per streaming window), totals are accumulated
+            stage = self.stages.setdefault(name, {'calls': 0, 'frames': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'peak_rss_increase_mb': 0.0})
+            stage['calls'] += 1
+            stage['frames'] += frames
+            stage['seconds'] += time.perf_counter() - start_time
+            stage['cpu_seconds'] += time.process_time() - start_cpu_time
+            stage['peak_rss_increase_mb'] += self.get_peak_rss() - peak_rss_before
+
+    def add_frames(self, name, frames):
+        # frames of a stage which are only known after it ran (e.g. reading video)
+        if self.enabled and name in self.stages:
+            self.stages[name]['frames'] += frames
+
+    def time_frames(self, name, frames):
+        # time spent producing every item of a loop (e.g. detections or rendered frames)
+        if not self.frame_histograms:
+            return frames
+        return self.measure_frames(name, frames)
+
+    def measure_frames(self, name, frames):
+        latencies = self.frame_latencies.setdefault(name, [])
+        iterator = iter(frames)
+        while True:
+            start_time = time.perf_counter()
+            try:
+                frame = next(iterator)
+            except StopIteration:
+                return
+            latencies.append(time.perf_counter() - start_time)
+            yield frame
+
+    def get_frame_latency_report(self, latencies):
+        latencies_ms = np.asarray(latencies) * 1000
+        counts = np.bincount(np.searchsorted(self.histogram_buckets, latencies_ms), minlength=len(self.histogram_buckets) + 1)
+        labels = [f"<={bucket}ms" for bucket in self.histogram_buckets] + [f">{self.histogram_buckets[-1]}ms"]
+
+        return {
+            'frames': len(latencies_ms),
+            'mean_ms': float(latencies_ms.mean()),
+            'p50_ms': float(np.percentile(latencies_ms, 50)),
+            'p90_ms': float(np.percentile(latencies_ms, 90)),
+            'p99_ms': float(np.percentile(latencies_ms, 99)),
+            'max_ms': float(latencies_ms.max()),
+            'histogram': dict(zip(labels, counts.tolist())),
+        }
+
+    def report(self):
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = dict(stage, fps=stage['frames'] / stage['seconds'] if stage['frames'] and stage['seconds'] > 0 else None)
+
+        return {
+            'wall_seconds': time.perf_counter() - self.start_time,
+            'peak_rss_mb': self.get_peak_rss(),
+            'stages': stages,
+            'frame_latencies': {name: self.get_frame_latency_report(latencies) for name, latencies in self.frame_latencies.items() if latencies},
+        }
+
+    def summary(self, report=None):
+        # readable table of report
+        report = report or self.report()
+        lines = [f"{'stage':<28}{'calls':>6}{'wall s':>10}{'cpu s':>10}{'frames/s':>11}{'+peak MB':>10}"]
+        for name, stage in report['stages'].items():
+            fps = f"{stage['fps']:.1f}" if stage['fps'] else '-'
+            lines.append(f"{name:<28}{stage['calls']:>6}{stage['seconds']:>10.3f}{stage['cpu_seconds']:>10.3f}{fps:>11}{stage['peak_rss_increase_mb']:>10.1f}")
+
+        for name, latency in report['frame_latencies'].items():
+            lines.append(f"{name} per frame: p50 {latency['p50_ms']:.1f} ms, p90 {latency['p90_ms']:.1f} ms, "
+                         f"p99 {latency['p99_ms']:.1f} ms, max {latency['max_ms']:.1f} ms ({latency['frames']} frames)")
+
+        lines.append(f"Total {report['wall_seconds']:.2f} s, peak RSS {report['peak_rss_mb']:.1f} MB")
+        return '\n'.join(lines)
+
+    def save(self, path):
+        # JSON report and readable summary next to it (report.json -> report.txt), returns summary
+        report = self.report()
+        summary = self.summary(report)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        with open(os.path.splitext(path)[0] + '.txt', 'w') as f:
+            f.write(summary + '\n')
+
+        return summary
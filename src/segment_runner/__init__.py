@@ -0,0 +1 @@
+from .segment_runner import SegmentRunner
\ No newline at end of file
@@ -0,0 +1,164 @@
+import os
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.optimize import linear_sum_assignment
+from src.utils import VideoUtils, BBoxUtils
+from src.tracker import Tracker
+from src.camera_movement_estimator import CameraMovementEstimator
+
+class SegmentRunner:
+    def __init__(self, model_path, num_workers=None, num_segments=None, overlap=24, window_size=240, camera_movement_scale=1.0, min_iou=0.5, keyframe_stride=1, low_resolution=None, ball_roi_size=256):
+        self.model_path = model_path
+        # detection settings of worker trackers
+        self.keyframe_stride = keyframe_stride
+        self.low_resolution = low_resolution
+        self.ball_roi_size = ball_roi_size
+
+        # one segment per worker unless more (shorter) segments are asked for
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.num_segments = num_segments or self.num_workers
+
+        # every segment (except first) also processes overlap frames before its start,
+        # they warm up ByteTrack and optical flow and are used to match track ids with previous segment
+        self.overlap = overlap
+
+        # frames held in memory by a worker at once
+        self.window_size = window_size
+        self.camera_movement_scale = camera_movement_scale
+
+        # mean IoU over overlap frames needed to treat two track ids as same object
+        self.min_iou = min_iou
+
+        self.bbox_utils = BBoxUtils()
+
+    def get_segments(self, num_frames):
+        # split [0, num_frames) into num_segments contiguous (start, end) ranges
+        bounds = np.linspace(0, num_frames, min(self.num_segments, max(num_frames, 1)) + 1).astype(int)
+        return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+    def process_segment(self, video_path, start_frame, end_frame):
+        # runs in worker process: tracks and camera movement of frames [start_frame, end_frame) window by window
+        vu = VideoUtils()
+        tracker = Tracker(self.model_path, self.keyframe_stride, self.low_resolution, self.ball_roi_size)
+        camera_movement_estimator = None
+
+        tracks = {'players': [], 'referees': [], 'ball': []}
+        camera_movement = []
+        for video_frames in vu.read_video_windows(video_path, self.window_size, start_frame, end_frame):
+            # ByteTrack and LK state carry over from window to window
+            window_tracks = tracker.get_object_tracks(video_frames)
+            for object, object_tracks in window_tracks.items():
+                tracks[object] += object_tracks
+
+            if camera_movement_estimator is None:
+                camera_movement_estimator = CameraMovementEstimator(video_frames[0], self.camera_movement_scale)
+            camera_movement += [list(movement) for movement in camera_movement_estimator.update_camera_movement(video_frames)]
+
+        return tracks, camera_movement
+
+    def match_track_ids(self, previous_frames, segment_frames):
+        # previous_frames, segment_frames: same overlap frames as {track_id: bbox} from previous and new segment
+        previous_ids = sorted({track_id for frame in previous_frames for track_id in frame})
+        segment_ids = sorted({track_id for frame in segment_frames for track_id in frame})
+        if not previous_ids or not segment_ids:
+            return {}
+
+        previous_index = {track_id: i for i, track_id in enumerate(previous_ids)}
+        segment_index = {track_id: i for i, track_id in enumerate(segment_ids)}
+
+        # IoU summed over overlap frames, divided by frames where either track is seen
+        iou_sum = np.zeros((len(previous_ids), len(segment_ids)))
+        previous_seen = np.zeros(len(previous_ids))
+        segment_seen = np.zeros(len(segment_ids))
+        both_seen = np.zeros((len(previous_ids), len(segment_ids)))
+        for previous_frame, segment_frame in zip(previous_frames, segment_frames):
+            rows = [previous_index[track_id] for track_id in previous_frame]
+            columns = [segment_index[track_id] for track_id in segment_frame]
+            previous_seen[rows] += 1
+            segment_seen[columns] += 1
+            if rows and columns:
+                iou = self.bbox_utils.get_iou(list(previous_frame.values()), list(segment_frame.values()))
+                iou_sum[np.ix_(rows, columns)] += iou
+                both_seen[np.ix_(rows, columns)] += 1
+        mean_iou = iou_sum / np.maximum(previous_seen[:, None] + segment_seen[None, :] - both_seen, 1)
+
+        # one to one assignment with highest total IoU
+        rows, columns = linear_sum_assignment(-mean_iou)
+        return {segment_ids[column]: previous_ids[row] for row, column in zip(rows, columns) if mean_iou[row, column] >= self.min_iou}
+
+    def get_frame_boxes(self, tracks, frame_num):
+        # players and referees share ByteTrack ids, so they are matched together
+        boxes = {}
+        for object in ['players', 'referees']:
+            for track_id, track_info in tracks[object][frame_num].items():
+                boxes[track_id] = track_info['bbox']
+        return boxes
+
+    def merge(self, segments, results):
+        # results: (tracks, camera_movement) per segment, each starting overlap frames before segment start
+        tracks = {'players': [], 'referees': [], 'ball': []}
+        camera_movement = []
+        next_track_id = 1
+
+        for (start_frame, end_frame), (segment_tracks, segment_camera_movement) in zip(segments, results):
+            warm_up = start_frame - max(0, start_frame - self.overlap)
+
+            # first segment keeps ByteTrack ids, later ones match ids of overlap frames against merged tracks of previous segment
+            id_map = {}
+            if not warm_up:
+                id_map = {track_id: track_id for object in ['players', 'referees'] for track in segment_tracks[object] for track_id in track}
+                next_track_id = max([next_track_id] + [track_id + 1 for track_id in id_map.values()])
+            else:
+                previous_frames = [self.get_frame_boxes(tracks, frame_num) for frame_num in range(start_frame - warm_up, start_frame)]
+                segment_frames = [self.get_frame_boxes(segment_tracks, frame_num) for frame_num in range(warm_up)]
+                id_map = self.match_track_ids(previous_frames, segment_frames)
+
+            for object in ['players', 'referees']:
+                for track in segment_tracks[object][warm_up:]:
+                    frame_tracks = {}
+                    for track_id, track_info in track.items():
+                        # unmatched ids are new objects and get next free id
+                        if track_id not in id_map:
+                            id_map[track_id] = next_track_id
+                            next_track_id += 1
+                        frame_tracks[id_map[track_id]] = track_info
+                    tracks[object].append(frame_tracks)
+            tracks['ball'] += segment_tracks['ball'][warm_up:]
+
+            # camera movement is measured frame to frame, warm-up frames only prime LK state of worker
+            camera_movement += segment_camera_movement[warm_up:]
+
+            next_track_id = max([next_track_id] + [track_id + 1 for track_id in id_map.values()])
+
+        return tracks, camera_movement
+
+    def run(self, video_path):
+        # tracks and camera movement of whole video, segments are processed in parallel worker processes
+        properties = VideoUtils().get_video_properties(video_path)
+        if properties is None:
+            raise ValueError(f"Could not open video: {video_path}")
+        segments = self.get_segments(properties['frame_count'])
+
+        print(f"Processing {len(segments)} segments with {self.num_workers} workers (overlap {self.overlap} frames)\n")
+        # spawn so workers do not inherit model or threads of parent process
+        # last segment reads until end of video, frame count from metadata can be too low
+        with ProcessPoolExecutor(self.num_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(self.process_segment, video_path, max(0, start_frame - self.overlap), end_frame if i < len(segments) - 1 else None)
+                       for i, (start_frame, end_frame) in enumerate(segments)]
+            results = [future.result() for future in futures]
+
+        # every other segment must have decoded exactly its frames, otherwise frame count or seeking of this video
+        # is not reliable and segments would not line up
+        for i, ((start_frame, end_frame), (segment_tracks, _)) in enumerate(zip(segments, results)):
+            read_start = max(0, start_frame - self.overlap)
+            num_frames = len(segment_tracks['players'])
+            if (i < len(segments) - 1 and num_frames != end_frame - read_start) or num_frames < start_frame - read_start:
+                raise ValueError(f"Segment {start_frame}-{end_frame} of {video_path} decoded {num_frames} frames, expected {end_frame - read_start}. "
+                                 f"Frame count or seeking of this video is not reliable, run it without segment workers")
+
+        tracks, camera_movement = self.merge(segments, results)
+        if len(camera_movement) != len(tracks['players']):
+            raise ValueError(f"Merged {len(tracks['players'])} frames of tracks but {len(camera_movement)} frames of camera movement")
+
+        return tracks, camera_movement
@@ -1,66 +1,203 @@
 import cv2
+import numpy as np
+from itertools import chain
 from src.utils import BBoxUtils
+from src.track_store import TrackStore
 
 class SpeedAndDistanceEstimator:
-    def __init__(self):
-        self.frame_window = 5
-        self.frame_rate  = 24
+    def __init__(self, frame_rate=24, frame_window=5, max_speed=None):
+        # speed is measured over frame_window frames, frame_rate should be fps of video
+        self.frame_window = frame_window
+        self.frame_rate  = frame_rate
+
+        # optional outlier smoothing: windows faster than max_speed (km/h) are treated as tracking glitches
+        self.max_speed = max_speed
+
         self.bboxUtils = BBoxUtils()
 
+        # dictionary to store total distance covered by each player, kept across streaming windows
+        self.total_distance = {}
+
+        # online mode: (frame, position) where current window of each player started and speed of its last window
+        self.window_starts = {}
+        self.last_speed = {}
+
+    def compute_speed_and_distance(self, frames, track_ids, positions, num_frames):
+        # frames, track_ids: (rows,) sorted by frame, positions: (rows, 2) transformed positions with nan when missing
+        speed = np.full(len(frames), np.nan)
+        distance = np.full(len(frames), np.nan)
+        total_distance = self.total_distance.setdefault('players', {})
+        if len(frames) == 0:
+            return speed, distance
+
+        # windows start every frame_window frames and end frame_window frames later (or at last frame),
+        # so only rows on window boundaries need (frame, track) lookups, key keeps rows in frame order
+        id_range = int(track_ids.max()) + 1
+        frame_offsets = frames % self.frame_window
+        boundaries = np.flatnonzero((frame_offsets == 0) | (frames == num_frames - 1))
+        boundary_keys = frames[boundaries] * id_range + track_ids[boundaries]
+        boundary_order = np.argsort(boundary_keys, kind='stable')
+        boundaries, boundary_keys = boundaries[boundary_order], boundary_keys[boundary_order]
+
+        is_start = frame_offsets[boundaries] == 0
+        starts, start_keys = boundaries[is_start], boundary_keys[is_start]
+        if len(starts) == 0:
+            return speed, distance
+        start_frames = frames[starts]
+        end_frames = np.minimum(start_frames + self.frame_window, num_frames - 1)
+        window_track_ids = track_ids[starts]
+
+        # player must be present with position at both start and end of window
+        end_keys = end_frames * id_range + window_track_ids
+        ends = np.minimum(np.searchsorted(boundary_keys, end_keys), len(boundaries) - 1)
+        valid = (boundary_keys[ends] == end_keys) & (end_frames > start_frames)
+        movement = positions[boundaries[ends]] - positions[starts]
+        valid &= np.isfinite(movement).all(axis=1)
+
+        # distance traveled in every window, time in seconds and speed in km/h
+        distance_covered = np.sqrt((movement ** 2).sum(axis=1))
+        time_elapsed = (end_frames - start_frames) / self.frame_rate
+        with np.errstate(divide='ignore', invalid='ignore'):
+            window_speed = distance_covered / time_elapsed * 3.6
+
+        outliers = np.zeros(len(starts), dtype=bool)
+        if self.max_speed is not None:
+            outliers = valid & (window_speed > self.max_speed)
+            valid &= ~outliers
+
+        # group windows by track, frame order is kept inside each track
+        track_order = np.argsort(window_track_ids, kind='stable')
+        grouped_track_ids = window_track_ids[track_order]
+        grouped_valid = valid[track_order]
+        new_track = np.ones(len(starts), dtype=bool)
+        new_track[1:] = grouped_track_ids[1:] != grouped_track_ids[:-1]
+        first_window = np.flatnonzero(new_track)
+        window_counts = np.diff(np.append(first_window, len(starts)))
+
+        # accumulate distance over valid windows of each track, continuing from previous streaming windows
+        base_distance = np.array([total_distance.get(int(track_id), 0) for track_id in grouped_track_ids[first_window]], dtype=np.float64)
+        cumulative = np.cumsum(np.where(grouped_valid, distance_covered[track_order], 0))
+        offset = np.where(first_window > 0, cumulative[first_window - 1], 0) - base_distance
+        grouped_distance = cumulative - np.repeat(offset, window_counts)
+
+        last_window = first_window + window_counts - 1
+        for track_id, last, has_valid in zip(grouped_track_ids[first_window], last_window, np.add.reduceat(grouped_valid, first_window)):
+            if has_valid:
+                total_distance[int(track_id)] = float(grouped_distance[last])
+
+        window_distance = np.empty(len(starts))
+        window_distance[track_order] = grouped_distance
+
+        # outlier windows keep speed of previous valid window of the same track and add no distance
+        window_speed = np.where(valid, window_speed, np.nan)
+        if outliers.any():
+            previous = np.maximum.accumulate(np.where(grouped_valid, np.arange(len(starts)), -1))
+            smoothed = outliers[track_order] & (previous >= np.repeat(first_window, window_counts))
+            window_speed[track_order[smoothed]] = window_speed[track_order[previous[smoothed]]]
+            valid[track_order[smoothed]] = True
+        window_distance = np.where(valid, window_distance, np.nan)
+
+        # every row takes values of the window it falls in, except last frame of video which only ends a window
+        row_keys = (frames - frame_offsets) * id_range + track_ids
+        windows = np.minimum(np.searchsorted(start_keys, row_keys), len(starts) - 1)
+        has_window = (start_keys[windows] == row_keys) & (frames < num_frames - 1)
+        speed = np.where(has_window, window_speed[windows], np.nan)
+        distance = np.where(has_window, window_distance[windows], np.nan)
+
+        return speed, distance
+
     def add_speed_and_distance_to_tracks(self, tracks):
-        # dictionary to store total distance covered by each player
-        total_distance = {}  
-
-        for object, object_tracks in tracks.items():
-            # process only player tracks
-            if object != 'players':  
-                continue  
-
-            number_of_frames = len(object_tracks)
-
-            # process every 5th frame to calculate speed
-            for frame_num in range(0, number_of_frames, self.frame_window):
-                last_frame = min(frame_num + self.frame_window, number_of_frames - 1)
-
-                for track_id, _ in object_tracks[frame_num].items():
-                    # skip if player disappears in the last frame of this batch
-                    if track_id not in object_tracks[last_frame]:
-                        continue
-
-                    # get player's position at start and end of the frame window
-                    start_position = object_tracks[frame_num][track_id]['transformed_position']
-                    end_position = object_tracks[last_frame][track_id]['transformed_position']
-
-                      # skip if any position is missing
-                    if not start_position or not end_position:
-                        continue
-
-                    # measure the distance traveled between the frames
-                    distance_covered = self.bboxUtils.measure_distance(start_position, end_position)
-
-                    # calculate time difference in seconds
-                    time_elapsed_per_sec = (last_frame - frame_num) / self.frame_rate
-                    
-                    # compute speed in meters per second and convert to km/h
-                    speed_meters_per_sec = distance_covered / time_elapsed_per_sec
-                    speed_km_per_hour = speed_meters_per_sec * 3.6  
-
-                    # initialize total distance
-                    if object not in total_distance:
-                        total_distance[object] = {}
-                    
-                    if track_id not in total_distance[object]:
-                        total_distance[object][track_id] = 0
-                    
-                    # accumulate total distance for the player
-                    total_distance[object][track_id] += distance_covered
-
-                    # update speed and distance for each frame in this batch
-                    for frame_num_batch in range(frame_num, last_frame):
-                        if track_id not in tracks[object][frame_num_batch]:
-                            continue
-                        tracks[object][frame_num_batch][track_id]['speed'] = speed_km_per_hour
-                        tracks[object][frame_num_batch][track_id]['distance'] = total_distance[object][track_id]
+        # speed and distance are only computed for players
+        object_tracks = tracks['players']
+        number_of_frames = len(object_tracks)
+
+        if isinstance(tracks, TrackStore):
+            # columnar tracks: player rows are contiguous
+            players = tracks.object_rows('players')
+            # missing values are stored as nan, so column can be used without copy
+            positions = tracks.transformed_position[players]
+            speed, distance = self.compute_speed_and_distance(tracks.frame[players], tracks.track_id[players], positions, number_of_frames)
+
+            rows = np.flatnonzero(np.isfinite(speed))
+            tracks.set_column('speed', speed[rows], players.start + rows)
+            tracks.set_column('distance', distance[rows], players.start + rows)
+            return
+
+        # build per-row arrays once from nested dicts, rows are in frame order
+        track_infos = [track_info for track in object_tracks for track_info in track.values()]
+        frames = np.repeat(np.arange(number_of_frames), [len(track) for track in object_tracks])
+        track_ids = np.fromiter(chain.from_iterable(object_tracks), dtype=np.int64, count=len(track_infos))
+
+        # positions are only read on window boundaries (window start frames and last frame)
+        positions = np.full((len(track_infos), 2), np.nan)
+        boundaries = np.flatnonzero((frames % self.frame_window == 0) | (frames == number_of_frames - 1))
+        positions[boundaries] = np.fromiter(
+            chain.from_iterable(track_infos[row].get('transformed_position') or (np.nan, np.nan) for row in boundaries.tolist()),
+            dtype=np.float64, count=2 * len(boundaries)
+        ).reshape(-1, 2)
+
+        speed, distance = self.compute_speed_and_distance(frames, track_ids, positions, number_of_frames)
+
+        # update speed and distance for each row which falls in a valid window
+        rows = np.flatnonzero(np.isfinite(speed))
+        for row, row_speed, row_distance in zip(rows.tolist(), speed[rows].tolist(), distance[rows].tolist()):
+            track_infos[row]['speed'] = row_speed
+            track_infos[row]['distance'] = row_distance
+
+    def update_speed_and_distance(self, player_tracks, frame_num):
+        # online mode: no frames ahead are known, so speed of a player is measured over its last finished window
+        # (frame_window frames back) and shown until next window finishes
+        total_distance = self.total_distance.setdefault('players', {})
+        for track_id, track_info in player_tracks.items():
+            track_id = int(track_id)
+            position = track_info.get('transformed_position')
+            if position is None:
+                continue
+
+            window_start = self.window_starts.get(track_id)
+            if window_start is None:
+                self.window_starts[track_id] = (frame_num, position)
+                continue
+
+            start_frame, start_position = window_start
+            if frame_num - start_frame >= self.frame_window:
+                distance_covered = self.bboxUtils.measure_distance(start_position, position)
+                speed = distance_covered / ((frame_num - start_frame) / self.frame_rate) * 3.6
+
+                # outlier window keeps speed of previous window and adds no distance
+                if self.max_speed is None or speed <= self.max_speed:
+                    self.last_speed[track_id] = speed
+                    total_distance[track_id] = total_distance.get(track_id, 0) + distance_covered
+                self.window_starts[track_id] = (frame_num, position)
+
+            if track_id in self.last_speed:
+                track_info['speed'] = self.last_speed[track_id]
+                track_info['distance'] = total_distance.get(track_id, 0)
+
+    def draw_frame_speed_and_distance(self, frame, player_tracks):
+        for _, track_info in player_tracks.items():
+            if "speed" in track_info:
+                speed = track_info.get('speed', None)
+                distance = track_info.get('distance', None)
+                
+                if speed is None or distance is None:
+                    continue
+
+                # get bounding box and calculate foot position
+                bbox = track_info['bbox']
+                position = self.bboxUtils.get_foot_position(bbox)  
+                position = list(position)
+
+                # adjust label position slightly below the player's foot
+                position[1] += 40  
+                # convert to integer tuple
+                position = tuple(map(int, position))  
+
+                # draw speed and distance on the frame
+                cv2.putText(frame, f"{speed:.2f} km/h", position, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+                cv2.putText(frame, f"{distance:.2f} m", (position[0], position[1] + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+
+        return frame
 
     def draw_speed_and_distance(self, frames, tracks):
         # list to store modified frames with annotations
@@ -72,28 +209,8 @@ class SpeedAndDistanceEstimator:
                 if object != "players":
                     continue  
 
-                for _, track_info in object_tracks[frame_num].items():
-                    if "speed" in track_info:
-                        speed = track_info.get('speed', None)
-                        distance = track_info.get('distance', None)
-                        
-                        if speed is None or distance is None:
-                            continue
-
-                        # get bounding box and calculate foot position
-                        bbox = track_info['bbox']
-                        position = self.bboxUtils.get_foot_position(bbox)  
-                        position = list(position)
-
-                        # adjust label position slightly below the player's foot
-                        position[1] += 40  
-                        # convert to integer tuple
-                        position = tuple(map(int, position))  
-
-                        # draw speed and distance on the frame
-                        cv2.putText(frame, f"{speed:.2f} km/h", position, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
-                        cv2.putText(frame, f"{distance:.2f} m", (position[0], position[1] + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+                frame = self.draw_frame_speed_and_distance(frame, object_tracks[frame_num])
 
             output_frames.append(frame)
 
-        return output_frames
\ No newline at end of file
+        return output_frames
@@ -0,0 +1,164 @@
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+
+class StageCache:
+    def __init__(self, cache_dir='./cache', max_size=10 * 1024 ** 3):
+        # directory holding cached stage results, evicted least recently used first above max_size bytes
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # hashes of big input files (video, model) keyed by path, size and mtime so they are read only once
+        self.file_hashes_path = os.path.join(self.cache_dir, 'file_hashes.json')
+        self.file_hashes = self.load_file_hashes()
+
+        self.hits = 0
+        self.misses = 0
+
+        # entries loaded or saved by this process, never evicted (even when one of them alone is bigger than max_size)
+        self.used_paths = set()
+
+    def load_file_hashes(self):
+        # unreadable file (e.g. torn write of another process) only means files are hashed again
+        try:
+            with open(self.file_hashes_path) as f:
+                file_hashes = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return file_hashes if isinstance(file_hashes, dict) else {}
+
+    def save_file_hashes(self):
+        # several processes (e.g. batch workers) share cache directory, so file is replaced atomically
+        # and hashes other processes added meanwhile are kept
+        file_hashes = {**self.load_file_hashes(), **self.file_hashes}
+        temp_path = f"{self.file_hashes_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(file_hashes, f)
+        os.replace(temp_path, self.file_hashes_path)
+        self.file_hashes = file_hashes
+
+    def hash_file(self, path):
+        stat = os.stat(path)
+        file_id = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        if file_id in self.file_hashes:
+            return self.file_hashes[file_id]
+
+        # hash file content in chunks
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        file_hash = digest.hexdigest()
+        self.file_hashes[file_id] = file_hash
+        self.save_file_hashes()
+
+        return file_hash
+
+    def hash_value(self, digest, value):
+        # feed stage parameters into digest in a stable way (dict order, numpy arrays by content)
+        if isinstance(value, dict):
+            digest.update(b'{')
+            for key in sorted(value, key=str):
+                digest.update(str(key).encode())
+                self.hash_value(digest, value[key])
+            digest.update(b'}')
+        elif isinstance(value, (list, tuple)):
+            digest.update(b'[')
+            for item in value:
+                self.hash_value(digest, item)
+            digest.update(b']')
+        elif isinstance(value, np.ndarray):
+            digest.update(f"{value.dtype}{value.shape}".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value).encode())
+
+    def get_key(self, stage, files=(), params=None):
+        # key depends on stage name, content of input files and stage parameters
+        digest = hashlib.sha256(stage.encode())
+        for path in files:
+            digest.update(self.hash_file(path).encode())
+        self.hash_value(digest, params)
+
+        return digest.hexdigest()
+
+    def get_path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}.pkl")
+
+    def load(self, stage, key):
+        path = self.get_path(stage, key)
+        if not os.path.exists(path):
+            return False, None
+
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError, TypeError, IndexError):
+            # broken entry (e.g. interrupted write) or stale one (pickled classes changed since), recompute it
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return False, None
+
+        # touch entry so it becomes most recently used
+        os.utime(path)
+        self.used_paths.add(path)
+
+        return True, value
+
+    def save(self, stage, key, value):
+        # write to temporary file first so readers never see partial entries
+        path = self.get_path(stage, key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        self.used_paths.add(path)
+
+        self.evict()
+
+    def evict(self):
+        # remove least recently used entries until cache fits into max_size, entries used by this run are kept
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if path in self.used_paths:
+                continue
+            # another process (e.g. batch worker) may have evicted it already
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def get_or_compute(self, stage, compute, files=(), params=None):
+        key = self.get_key(stage, files, params)
+
+        hit, value = self.load(stage, key)
+        if hit:
+            self.hits += 1
+            print(f"Cache hit for {stage} ({key[:12]})")
+            return value
+
+        self.misses += 1
+        print(f"Cache miss for {stage} ({key[:12]}), computing...")
+        value = compute()
+        self.save(stage, key, value)
+
+        return value
@@ -1,4 +1,6 @@
+import numpy as np
 from sklearn.cluster import KMeans
+from src.track_store import TrackStore
 
 class TeamAssigner:
     def __init__(self):
@@ -6,72 +8,78 @@ class TeamAssigner:
         self.team_colors = {}
         self.player_team = {}
 
-    def get_cluster_model(self, image):
-        # reshape image into 2d
-        image_2d = image.reshape(-1, 3)
+        # iterations of batched 2-means used for jersey colors
+        self.color_iterations = 10
 
-        # perform clustering
-        kMeans =  KMeans(n_clusters=2, init='k-means++', n_init='auto')
-        kMeans.fit(image_2d)
-
-        return kMeans
-
-    def get_cluster_centers(self, kMeans, clustered_image):
-        # get corner clusters to differentiate b/w player and non-player clusters
-        top_left = clustered_image[0, 0]
-        top_right = clustered_image[0, -1]
-        bottom_left = clustered_image[-1, 0]
-        bottom_right = clustered_image[-1, -1]
-
-        # get the max value from corner and get player cluster
-        corner_clusters = [top_left, top_right, bottom_left, bottom_right]
+    def get_player_cluster(self, corner_clusters):
+        # the cluster found in most corners is background, ties go to cluster 0 as background
         non_player_cluster = max(set(corner_clusters), key=corner_clusters.count)
         player_cluster = 1 - non_player_cluster
 
-        # get cluster centers using player cluster
-        cluster_centers = kMeans.cluster_centers_[player_cluster]
-
-        return cluster_centers
-
-
-    def get_player_color(self, frame, bbox):
-        # get bbox co-ordinates
-        x1, y1, x2, y2 = bbox
-
-        # get image inside bounding box
-        image = frame[int(y1): int(y2), int(x1): int(x2)]
-
-        # get top half of image (T-Shirt only)
-        n = image.shape[0] // 2
-        top_half_image = image[:n, :]
-
-        # get cluster model
-        kMeans = self.get_cluster_model(top_half_image)
-
-        # get the cluster labels
-        labels = kMeans.labels_
-
-        # get height and width
-        height, width = top_half_image.shape[0], top_half_image.shape[1]
-
-        # reshape to original image
-        clustered_image = labels.reshape(height, width)
-
-        # get cluser centers as rgb
-        player_color_rgb = self.get_cluster_centers(kMeans, clustered_image)
-
-        return player_color_rgb
-
+        return player_cluster
+
+    def get_color_labels(self, pixels, centers):
+        # pixel is closer to center 1 when 2 * p.(c1 - c0) > |c1|^2 - |c0|^2
+        direction = centers[:, 1] - centers[:, 0]
+        threshold = (centers[:, 1] ** 2).sum(axis=1) - (centers[:, 0] ** 2).sum(axis=1)
+        return 2 * np.einsum('npc,nc->np', pixels, direction) > threshold[:, None]
+
+    def get_player_colors(self, frame, bboxes):
+        # jersey color of every bbox: 2-means over pixels of top half of its crop (T-Shirt only), all crops in one batch
+        crops = []
+        for x1, y1, x2, y2 in bboxes:
+            image = frame[int(y1): int(y2), int(x1): int(x2)]
+            crops.append(image[:image.shape[0] // 2, :])
+
+        num_crops = len(crops)
+        player_colors = np.zeros((num_crops, 3))
+        if num_crops == 0:
+            return player_colors
+
+        # pad pixels of all crops into one (crops, max_pixels, 3) array with validity mask
+        sizes = np.array([crop.shape[0] * crop.shape[1] for crop in crops])
+        pixels = np.zeros((num_crops, max(sizes.max(), 1), 3), dtype=np.float32)
+        for i, crop in enumerate(crops):
+            pixels[i, :sizes[i]] = crop.reshape(-1, 3)
+        valid = np.arange(pixels.shape[1])[None, :] < sizes[:, None]
+
+        # initialize centers with top left pixel (background side) and the pixel farthest from it
+        first_center = pixels[:, 0]
+        distances = np.where(valid, ((pixels - first_center[:, None]) ** 2).sum(axis=2), -1)
+        second_center = pixels[np.arange(num_crops), distances.argmax(axis=1)]
+        centers = np.stack([first_center, second_center], axis=1).astype(np.float64)
+
+        for _ in range(self.color_iterations + 1):
+            labels = self.get_color_labels(pixels, centers)
+
+            # move centers to mean of their pixels, keep center of empty cluster
+            members = np.stack([valid & ~labels, valid & labels], axis=1)
+            counts = members.sum(axis=2)
+            sums = np.einsum('nkp,npc->nkc', members.astype(np.float32), pixels)
+            new_centers = np.where(counts[:, :, None] > 0, sums / np.maximum(counts, 1)[:, :, None], centers)
+
+            if np.allclose(new_centers, centers):
+                break
+            centers = new_centers
+
+        # labels of final centers, so background rejection never mixes labels and centers of different iterations
+        labels = self.get_color_labels(pixels, centers)
+
+        # corner based background rejection, see get_player_cluster
+        for i, crop in enumerate(crops):
+            height, width = crop.shape[0], crop.shape[1]
+            if height == 0 or width == 0:
+                continue
+            clustered_image = labels[i, :sizes[i]].astype(int).reshape(height, width)
+            corner_clusters = [clustered_image[0, 0], clustered_image[0, -1], clustered_image[-1, 0], clustered_image[-1, -1]]
+            player_colors[i] = centers[i, self.get_player_cluster(corner_clusters)]
+
+        return player_colors
 
     def assign_team_color(self, frame, player_detections):
-        # store player colors in list
-        player_colors = []
-
-        # get color for each player
-        for _, player in player_detections.items():
-            bbox = player['bbox']
-            player_color = self.get_player_color(frame, bbox)
-            player_colors.append(player_color)
+        # get color for each player in one batch
+        bboxes = [player['bbox'] for _, player in player_detections.items()]
+        player_colors = self.get_player_colors(frame, bboxes)
         
         # divide players into team colors
         kMeans = KMeans(n_clusters=2, init='k-means++', n_init='auto')
@@ -89,20 +97,58 @@ class TeamAssigner:
         if player_id in self.player_team:
             return self.player_team[player_id]  
 
-        # get player color
-        player_color = self.get_player_color(frame, player_bbox)
-
-        # predict which team this color belongs to
-        predicted_team_id = self.kMeans.predict(player_color.reshape(1, -1))[0]
-
-        # team id is 1 if predicted id is 0 else 2
-        team_id = 1 if predicted_team_id == 0 else 2
-
-        # assign team to goalkeepr
-        if player_id == 81:
-            team_id = 1
-
-        # save team_id in player team
-        self.player_team[player_id] = team_id
-
-        return team_id
+        return self.get_player_teams(frame, {player_id: {'bbox': player_bbox}})[player_id]
+
+    def get_player_teams(self, frame, players):
+        # only players seen for the first time need a color
+        new_player_ids = [player_id for player_id in players if player_id not in self.player_team]
+
+        if new_player_ids:
+            # get colors of all new players in frame at once
+            player_colors = self.get_player_colors(frame, [players[player_id]['bbox'] for player_id in new_player_ids])
+
+            # predict which team these colors belong to
+            predicted_team_ids = self.kMeans.predict(player_colors)
+
+            for player_id, predicted_team_id in zip(new_player_ids, predicted_team_ids):
+                # team id is 1 if predicted id is 0 else 2
+                team_id = 1 if predicted_team_id == 0 else 2
+
+                # assign team to goalkeepr
+                if player_id == 81:
+                    team_id = 1
+
+                # save team_id in player team
+                self.player_team[player_id] = team_id
+
+        return {player_id: self.player_team[player_id] for player_id in players}
+
+    def add_team_to_tracks(self, frames, tracks):
+        if isinstance(tracks, TrackStore):
+            players = tracks.object_rows('players')
+            track_ids = tracks.track_id[players]
+            player_frames = tracks.frame[players]
+            player_bboxes = tracks.bbox[players]
+
+            # team of a player is decided on the frame where it first appears
+            unique_ids, first_rows = np.unique(track_ids, return_index=True)
+            first_rows = first_rows[np.argsort(player_frames[first_rows], kind='stable')]
+            for frame_num in np.unique(player_frames[first_rows]):
+                rows = first_rows[player_frames[first_rows] == frame_num]
+                frame_players = {int(track_ids[row]): {'bbox': player_bboxes[row]} for row in rows}
+                # frame is only needed when a player has no team yet (frames can be read lazily from video)
+                if any(player_id not in self.player_team for player_id in frame_players):
+                    self.get_player_teams(frames[frame_num], frame_players)
+
+            # write team and team color of all rows at once
+            teams = np.array([self.player_team[int(track_id)] for track_id in unique_ids], dtype=np.int8)
+            row_teams = teams[np.searchsorted(unique_ids, track_ids)]
+            tracks.set_column('team', row_teams, players)
+            tracks.set_column('team_color', np.array([self.team_colors[1], self.team_colors[2]])[row_teams - 1], players)
+            return
+
+        for frame_num, player_track in enumerate(tracks['players']):
+            teams = self.get_player_teams(frames[frame_num], player_track)
+            for player_id, team in teams.items():
+                tracks['players'][frame_num][player_id]['team'] = team
+                tracks['players'][frame_num][player_id]['team_color'] = self.team_colors[team]
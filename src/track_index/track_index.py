@@ -0,0 +1,205 @@
+import os
+import json
+import pickle
+import numpy as np
+from src.track_store import TrackStore, ColumnarFile
+
+class TrackIndex:
+    def __init__(self, tracks, frame_rate=24):
+        # built once after tracks are complete (team, speed, distance and possession added), queries never scan frames
+        self.tracks = TrackStore.from_tracks(tracks)
+        self.frame_rate = frame_rate
+        self.num_frames = self.tracks.num_frames
+
+        self.build_track_index()
+        self.build_possession_spells()
+
+    @classmethod
+    def from_tracks_file(cls, path, frame_rate=None):
+        # index of a finished match from tracks saved by save (or any tracks stub, .pkl or columnar directory)
+        if ColumnarFile().is_columnar(path):
+            tracks = ColumnarFile().load_tracks(path)
+        else:
+            with open(path, 'rb') as f:
+                tracks = pickle.load(f)
+
+        # frame rate saved next to columnar tracks, 24 like speed estimation when it is unknown
+        index_meta_path = os.path.join(path, 'track_index.json')
+        if frame_rate is None and os.path.exists(index_meta_path):
+            with open(index_meta_path) as f:
+                frame_rate = json.load(f)['frame_rate']
+
+        return cls(tracks, frame_rate or 24)
+
+    def save(self, path):
+        # columnar tracks with team, speed, distance and possession, index is rebuilt from them by from_tracks_file
+        ColumnarFile().save_tracks(self.tracks, path)
+        with open(os.path.join(path, 'track_index.json'), 'w') as f:
+            json.dump({'frame_rate': self.frame_rate}, f)
+
+    def build_track_index(self):
+        tracks = self.tracks
+
+        # player rows sorted by track then frame, every track is one contiguous span of rows
+        players = tracks.object_rows('players')
+        order = np.lexsort((tracks.frame[players], tracks.track_id[players]))
+        self.rows = players.start + order
+        self.frames = tracks.frame[self.rows]
+
+        track_ids = tracks.track_id[self.rows]
+        self.track_ids, first_rows, row_counts = np.unique(track_ids, return_index=True, return_counts=True)
+        self.track_offsets = np.append(first_rows, len(self.rows))
+
+        # key increases with track position then frame, searchsorted gives span of any (track, frame range)
+        self.keys = np.repeat(np.arange(len(self.track_ids), dtype=np.int64), row_counts) * (self.num_frames + 1) + self.frames
+
+        # first and last frame of every track and team (0 while teams are not assigned yet)
+        self.first_frames = self.frames[first_rows] if len(self.rows) else np.zeros(0, dtype=np.int32)
+        self.last_frames = self.frames[self.track_offsets[1:] - 1] if len(self.rows) else np.zeros(0, dtype=np.int32)
+        self.track_teams = np.where(tracks.present['team'][self.rows[first_rows]], tracks.team[self.rows[first_rows]], 0)
+
+    def build_possession_spells(self):
+        # spell is a run of consecutive frames in which same track has ball
+        has_ball = np.flatnonzero(self.tracks.has_ball[self.rows] & self.tracks.present['has_ball'][self.rows])
+        positions = np.searchsorted(self.track_offsets, has_ball, side='right') - 1
+        frames = self.frames[has_ball]
+
+        new_spell = np.ones(len(has_ball), dtype=bool)
+        new_spell[1:] = (positions[1:] != positions[:-1]) | (frames[1:] != frames[:-1] + 1)
+        starts = np.flatnonzero(new_spell)
+        # (match without possession, e.g. raw tracks stub, has no spells)
+        ends = np.append(starts[1:], len(has_ball))[:len(starts)] - 1
+
+        # spells sorted by track then start frame, end frame is exclusive like frame ranges
+        self.spell_track_positions = positions[starts]
+        self.spell_start_frames = frames[starts]
+        self.spell_end_frames = frames[ends] + 1
+
+    def get_track_position(self, track_id):
+        position = np.searchsorted(self.track_ids, track_id)
+        if position == len(self.track_ids) or self.track_ids[position] != track_id:
+            raise KeyError(track_id)
+        return position
+
+    def get_frame_range(self, start_seconds=0, end_seconds=None):
+        # time window in seconds of video to frame range, e.g. minute 30-45 is get_frame_range(30 * 60, 45 * 60)
+        start_frame = int(np.ceil(start_seconds * self.frame_rate))
+        end_frame = self.num_frames if end_seconds is None else min(self.num_frames, int(np.ceil(end_seconds * self.frame_rate)))
+        return max(0, start_frame), max(0, end_frame)
+
+    def get_spans(self, positions, start_frame=0, end_frame=None):
+        # (first row, end row) into sorted rows of every track position, limited to frames [start_frame, end_frame)
+        end_frame = self.num_frames if end_frame is None else end_frame
+        positions = np.asarray(positions, dtype=np.int64)
+        base = positions * (self.num_frames + 1)
+        return (np.searchsorted(self.keys, base + max(0, start_frame)),
+                np.searchsorted(self.keys, base + min(self.num_frames, max(0, end_frame))))
+
+    def get_track_rows(self, track_id, start_frame=0, end_frame=None):
+        # rows of TrackStore where track is present in frame range, in frame order
+        lo, hi = self.get_spans([self.get_track_position(track_id)], start_frame, end_frame)
+        return self.rows[lo[0]:hi[0]]
+
+    def get_team_track_ids(self, team):
+        return self.track_ids[self.track_teams == team]
+
+    def get_active_track_ids(self, start_frame=0, end_frame=None, team=None):
+        # tracks present at least once in frame range
+        end_frame = self.num_frames if end_frame is None else end_frame
+        active = (self.first_frames < end_frame) & (self.last_frames >= start_frame)
+        if team is not None:
+            active &= self.track_teams == team
+        return self.track_ids[active]
+
+    def get_trajectory(self, track_id, start_frame=0, end_frame=None, position='transformed_position'):
+        # frames and positions of one track, position column can be any of TrackStore position columns
+        # (missing values are nan, e.g. transformed position outside of court)
+        rows = self.get_track_rows(track_id, start_frame, end_frame)
+        return self.tracks.frame[rows], getattr(self.tracks, position)[rows]
+
+    def get_frames_with_ball(self, track_id, start_frame=0, end_frame=None):
+        rows = self.get_track_rows(track_id, start_frame, end_frame)
+        return self.tracks.frame[rows[self.tracks.has_ball[rows] & self.tracks.present['has_ball'][rows]]]
+
+    def get_possession_spells(self, track_id=None, team=None, start_frame=0, end_frame=None, min_frames=1):
+        # spells overlapping frame range, clipped to it
+        end_frame = self.num_frames if end_frame is None else end_frame
+        selected = (self.spell_start_frames < end_frame) & (self.spell_end_frames > start_frame)
+        if track_id is not None:
+            selected &= self.spell_track_positions == self.get_track_position(track_id)
+        if team is not None:
+            selected &= self.track_teams[self.spell_track_positions] == team
+
+        spell_start_frames = np.maximum(self.spell_start_frames[selected], start_frame)
+        spell_end_frames = np.minimum(self.spell_end_frames[selected], end_frame)
+        positions = self.spell_track_positions[selected]
+
+        spells = []
+        for position, spell_start, spell_end in zip(positions.tolist(), spell_start_frames.tolist(), spell_end_frames.tolist()):
+            if spell_end - spell_start < min_frames:
+                continue
+            spells.append({
+                'track_id': int(self.track_ids[position]),
+                'team': int(self.track_teams[position]),
+                'start_frame': spell_start,
+                'end_frame': spell_end,
+                'frames': spell_end - spell_start,
+                'seconds': (spell_end - spell_start) / self.frame_rate,
+            })
+
+        # match order when several tracks are selected
+        spells.sort(key=lambda spell: (spell['start_frame'], spell['track_id']))
+        return spells
+
+    def get_track_summaries(self, track_ids, start_frame=0, end_frame=None):
+        # speed and distance of every track in frame range
+        tracks = self.tracks
+        positions = [self.get_track_position(track_id) for track_id in track_ids]
+        lo, hi = self.get_spans(positions, start_frame, end_frame)
+        track_lo = self.track_offsets[positions] if len(positions) else np.zeros(0, dtype=np.int64)
+
+        summaries = {}
+        for track_id, position, first, end, track_first in zip(track_ids, positions, lo.tolist(), hi.tolist(), track_lo.tolist()):
+            rows = self.rows[first:end]
+            speed = tracks.speed[rows]
+            speed = speed[np.isfinite(speed)]
+
+            # distance column is running total at end of each speed window, so covered distance is last total
+            # inside range minus last total before it (range edges are accurate to one speed window)
+            distance = tracks.distance[rows]
+            distance = distance[np.isfinite(distance)]
+            before = tracks.distance[self.rows[track_first:first]]
+            before = before[np.isfinite(before)]
+            distance_covered = float(distance[-1] - (before[-1] if len(before) else 0)) if len(distance) else 0.0
+
+            has_ball = tracks.has_ball[rows] & tracks.present['has_ball'][rows]
+            summaries[int(track_id)] = {
+                'team': int(self.track_teams[position]),
+                'frames': end - first,
+                'seconds': (end - first) / self.frame_rate,
+                'distance': distance_covered,
+                'mean_speed': float(speed.mean()) if len(speed) else None,
+                'max_speed': float(speed.max()) if len(speed) else None,
+                'ball_frames': int(has_ball.sum()),
+            }
+
+        return summaries
+
+    def get_speed_distance_summary(self, track_id=None, team=None, start_frame=0, end_frame=None):
+        # one track, one team or all players in frame range
+        end_frame = self.num_frames if end_frame is None else end_frame
+        if track_id is not None:
+            return self.get_track_summaries([track_id], start_frame, end_frame)[int(track_id)]
+
+        track_ids = self.get_active_track_ids(start_frame, end_frame, team).tolist()
+        summaries = self.get_track_summaries(track_ids, start_frame, end_frame)
+        max_speeds = [summary['max_speed'] for summary in summaries.values() if summary['max_speed'] is not None]
+
+        return {
+            'team': team,
+            'tracks': len(summaries),
+            'distance': sum(summary['distance'] for summary in summaries.values()),
+            'max_speed': max(max_speeds) if max_speeds else None,
+            'ball_frames': sum(summary['ball_frames'] for summary in summaries.values()),
+            'per_track': summaries,
+        }
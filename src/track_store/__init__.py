@@ -0,0 +1,2 @@
+from .track_store import TrackStore
+from .columnar_file import ColumnarFile
\ No newline at end of file
@@ -0,0 +1,100 @@
+import os
+import json
+import pickle
+import argparse
+import numpy as np
+from .track_store import TrackStore
+
+class ColumnarFile:
+    # directory layout: meta.json + one .npy file per column, every file can be memory-mapped
+    format_version = 1
+
+    def is_columnar(self, path):
+        # existing directory is columnar and any existing file is a pickle (.pkl, .pickle, ...),
+        # stub which does not exist yet is written as columnar directory unless its name has an extension
+        if path is None:
+            return False
+        if os.path.exists(path):
+            return os.path.isdir(path)
+        return not os.path.splitext(path)[1]
+
+    def save_tracks(self, tracks, path):
+        store = TrackStore.from_tracks(tracks)
+        os.makedirs(path, exist_ok=True)
+
+        # row identity and (object, frame) -> row span index
+        np.save(os.path.join(path, 'object_id.npy'), store.object_id)
+        np.save(os.path.join(path, 'frame.npy'), store.frame)
+        np.save(os.path.join(path, 'track_id.npy'), store.track_id)
+        np.save(os.path.join(path, 'frame_offsets.npy'), store.frame_offsets)
+
+        # values and present masks of every column
+        for name in store.columns:
+            np.save(os.path.join(path, f'{name}.npy'), getattr(store, name))
+            np.save(os.path.join(path, f'present_{name}.npy'), store.present[name])
+
+        # write meta last, directory is only treated as complete when meta.json exists
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'format_version': self.format_version, 'kind': 'tracks', 'num_frames': store.num_frames, 'objects': store.objects}, f)
+
+    def load_tracks(self, path, start_frame=0, end_frame=None):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        num_frames = meta['num_frames']
+        end_frame = num_frames if end_frame is None else min(end_frame, num_frames)
+        start_frame = max(0, min(start_frame, end_frame))
+
+        # rows of every object inside frame range are one contiguous span
+        frame_offsets = np.load(os.path.join(path, 'frame_offsets.npy'), mmap_mode='r')
+        spans = [(int(offsets[start_frame]), int(offsets[end_frame])) for offsets in frame_offsets]
+
+        def read(name):
+            # memory map column and copy only rows of requested frames
+            column = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            return np.concatenate([np.array(column[start:end]) for start, end in spans])
+
+        columns = {name: read(name) for name in TrackStore.columns}
+        present = {name: read(f'present_{name}') for name in TrackStore.columns}
+
+        return TrackStore.from_columns(end_frame - start_frame,
+                                       read('object_id'),
+                                       read('frame') - start_frame,
+                                       read('track_id'),
+                                       columns,
+                                       present)
+
+    def save_camera_movement(self, camera_movement, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'camera_movement.npy'), np.asarray(camera_movement, dtype=np.float64).reshape(-1, 2))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'format_version': self.format_version, 'kind': 'camera_movement', 'num_frames': len(camera_movement)}, f)
+
+    def load_camera_movement(self, path, start_frame=0, end_frame=None):
+        # (frames, 2) array of x, y movement, only requested frames are read
+        camera_movement = np.load(os.path.join(path, 'camera_movement.npy'), mmap_mode='r')
+        return np.array(camera_movement[start_frame:end_frame])
+
+    def convert_stubs(self, tracks_stub_path=None, camera_movement_stub_path=None, tracks_path=None, camera_movement_path=None):
+        # convert pickle stubs into columnar directories
+        if tracks_stub_path and tracks_path:
+            with open(tracks_stub_path, 'rb') as f:
+                self.save_tracks(pickle.load(f), tracks_path)
+            print(f"Converted {tracks_stub_path} -> {tracks_path}")
+
+        if camera_movement_stub_path and camera_movement_path:
+            with open(camera_movement_stub_path, 'rb') as f:
+                self.save_camera_movement(pickle.load(f), camera_movement_path)
+            print(f"Converted {camera_movement_stub_path} -> {camera_movement_path}")
+
+
+if __name__ == '__main__':
+    # python -m src.track_store.columnar_file --tracks-stub stubs/track_stubs.pkl --tracks-out stubs/tracks
+    parser = argparse.ArgumentParser(description='Convert pickle stubs to memory-mapped columnar format')
+    parser.add_argument('--tracks-stub', default='./stubs/track_stubs.pkl')
+    parser.add_argument('--tracks-out', default='./stubs/tracks')
+    parser.add_argument('--camera-movement-stub', default='./stubs/camera_movement_stubs.pkl')
+    parser.add_argument('--camera-movement-out', default='./stubs/camera_movement')
+    args = parser.parse_args()
+
+    ColumnarFile().convert_stubs(args.tracks_stub, args.camera_movement_stub, args.tracks_out, args.camera_movement_out)
@@ -0,0 +1,312 @@
+import numpy as np
+
+class TrackStore:
+    # object names in the same order as tracks dict, row object_id is index in this list
+    objects = ['players', 'referees', 'ball']
+
+    # per row columns: (shape of one value, dtype), missing float values are stored as nan
+    columns = {
+        'bbox': ((4,), np.float64),
+        'position': ((2,), np.float64),
+        'adjusted_position': ((2,), np.float64),
+        'transformed_position': ((2,), np.float64),
+        'speed': ((), np.float64),
+        'distance': ((), np.float64),
+        'team': ((), np.int8),
+        'team_color': ((3,), np.float64),
+        'has_ball': ((), np.bool_),
+    }
+
+    def __init__(self, num_frames, object_id, frame, track_id, bbox):
+        self.num_frames = num_frames
+
+        # sort rows by object then frame, stable so track order inside a frame is kept
+        order = np.lexsort((np.asarray(frame), np.asarray(object_id)))
+        self.object_id = np.asarray(object_id, dtype=np.int8)[order]
+        self.frame = np.asarray(frame, dtype=np.int32)[order]
+        self.track_id = np.asarray(track_id, dtype=np.int64)[order]
+
+        # allocate every column with missing values, present masks tell which rows have a value (key in dict view)
+        num_rows = len(self.frame)
+        self.present = {}
+        for name, (shape, dtype) in self.columns.items():
+            fill = np.nan if np.issubdtype(dtype, np.floating) else 0
+            setattr(self, name, np.full((num_rows,) + shape, fill, dtype=dtype))
+            self.present[name] = np.zeros(num_rows, dtype=bool)
+        self.set_column('bbox', np.asarray(bbox, dtype=np.float64).reshape(-1, 4)[order])
+
+        self.build_index()
+
+    @classmethod
+    def from_columns(cls, num_frames, object_id, frame, track_id, columns, present):
+        # build store from column arrays (e.g. read from columnar file), rows already sorted by object and frame
+        store = cls(num_frames, object_id, frame, track_id, columns['bbox'])
+        for name in cls.columns:
+            getattr(store, name)[:] = columns[name]
+            store.present[name][:] = present[name]
+
+        return store
+
+    @classmethod
+    def from_tracks(cls, tracks):
+        # already columnar
+        if isinstance(tracks, TrackStore):
+            return tracks
+
+        object_ids, frames, track_ids, bboxes = [], [], [], []
+        extra = []
+
+        # flatten nested tracks dict into rows
+        for object_id, object in enumerate(cls.objects):
+            for frame_num, track in enumerate(tracks[object]):
+                for track_id, track_info in track.items():
+                    object_ids.append(object_id)
+                    frames.append(frame_num)
+                    track_ids.append(track_id)
+                    bboxes.append(track_info['bbox'])
+                    extra.append(track_info)
+
+        num_frames = len(tracks[cls.objects[0]])
+        store = cls(num_frames, object_ids, frames, track_ids, np.array(bboxes, dtype=np.float64).reshape(-1, 4))
+
+        # copy any other values already computed for tracks (e.g. loaded from stub)
+        order = np.lexsort((np.asarray(frames, dtype=np.int32), np.asarray(object_ids, dtype=np.int8)))
+        for row, source_row in enumerate(order):
+            for key, value in extra[source_row].items():
+                if key != 'bbox' and key in cls.columns:
+                    store.set_value(row, key, value)
+
+        return store
+
+    def to_tracks(self):
+        # materialize plain nested dicts (e.g. for code that pickles or mutates tracks freely)
+        return {
+            object: [{track_id: dict(track_info.items()) for track_id, track_info in track.items()} for track in object_tracks]
+            for object, object_tracks in self.items()
+        }
+
+    def build_index(self):
+        # key increases with object then frame, searchsorted gives first row of every (object, frame)
+        key = self.object_id.astype(np.int64) * (self.num_frames + 1) + self.frame
+        self.frame_offsets = np.stack([
+            np.searchsorted(key, object_id * (self.num_frames + 1) + np.arange(self.num_frames + 1))
+            for object_id in range(len(self.objects))
+        ])
+
+    def object_rows(self, object):
+        # rows of one object are contiguous
+        object_id = self.objects.index(object)
+        return slice(self.frame_offsets[object_id][0], self.frame_offsets[object_id][-1])
+
+    def frame_rows(self, object, frame_num):
+        object_id = self.objects.index(object)
+        return slice(self.frame_offsets[object_id][frame_num], self.frame_offsets[object_id][frame_num + 1])
+
+    def object_mask(self, object):
+        return self.object_id == self.objects.index(object)
+
+    def set_column(self, name, values, rows=slice(None)):
+        # write values of whole column (or rows of it) at once
+        getattr(self, name)[rows] = values
+        self.present[name][rows] = True
+
+    def has_value(self, row, name):
+        return bool(self.present[name][row])
+
+    def get_value(self, row, name):
+        value = getattr(self, name)[row]
+
+        # return same python types that tracks dict holds
+        if name == 'bbox':
+            return value.tolist()
+        if name == 'position':
+            return int(value[0]), int(value[1])
+        if name == 'adjusted_position':
+            return float(value[0]), float(value[1])
+        if name == 'transformed_position':
+            return None if np.isnan(value).any() else value.tolist()
+        if name == 'team_color':
+            return value.copy()
+        if name in ['team']:
+            return int(value)
+        if name == 'has_ball':
+            return bool(value)
+        return float(value)
+
+    def set_value(self, row, name, value):
+        if name not in self.columns:
+            raise KeyError(f"TrackStore has no column '{name}'")
+
+        # None means missing value (e.g. transformed position outside of court)
+        if value is None:
+            value = np.nan
+        getattr(self, name)[row] = value
+        self.present[name][row] = True
+
+    def add_track(self, object, frame_num, track_id, track_info):
+        # rare path: insert one row and rebuild sorted arrays and index
+        row = self.frame_rows(object, frame_num).stop
+        self.object_id = np.insert(self.object_id, row, self.objects.index(object))
+        self.frame = np.insert(self.frame, row, frame_num)
+        self.track_id = np.insert(self.track_id, row, track_id)
+        for name, (shape, dtype) in self.columns.items():
+            fill = np.nan if np.issubdtype(dtype, np.floating) else 0
+            setattr(self, name, np.insert(getattr(self, name), row, np.full(shape, fill, dtype=dtype), axis=0))
+            self.present[name] = np.insert(self.present[name], row, False)
+        self.build_index()
+
+        for key, value in track_info.items():
+            self.set_value(row, key, value)
+
+    def replace_object_tracks(self, object, object_tracks):
+        # drop rows of object and append rows from list of dicts (e.g. interpolated ball)
+        keep = ~self.object_mask(object)
+        replacement = TrackStore.from_tracks({
+            name: object_tracks if name == object else [{}] * len(object_tracks) for name in self.objects
+        })
+
+        self.object_id = np.concatenate([self.object_id[keep], replacement.object_id])
+        self.frame = np.concatenate([self.frame[keep], replacement.frame])
+        self.track_id = np.concatenate([self.track_id[keep], replacement.track_id])
+        for name in self.columns:
+            setattr(self, name, np.concatenate([getattr(self, name)[keep], getattr(replacement, name)]))
+            self.present[name] = np.concatenate([self.present[name][keep], replacement.present[name]])
+
+        # restore (object, frame) order
+        order = np.lexsort((self.frame, self.object_id))
+        self.object_id, self.frame, self.track_id = self.object_id[order], self.frame[order], self.track_id[order]
+        for name in self.columns:
+            setattr(self, name, getattr(self, name)[order])
+            self.present[name] = self.present[name][order]
+        self.build_index()
+
+    # dict-compatible view: store[object][frame_num][track_id][key]
+    def __getitem__(self, object):
+        if object not in self.objects:
+            raise KeyError(object)
+        return ObjectTracksView(self, object)
+
+    def __setitem__(self, object, object_tracks):
+        self.replace_object_tracks(object, object_tracks)
+
+    def __contains__(self, object):
+        return object in self.objects
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def keys(self):
+        return list(self.objects)
+
+    def items(self):
+        return [(object, self[object]) for object in self.objects]
+
+
+class ObjectTracksView:
+    def __init__(self, store, object):
+        self.store = store
+        self.object = object
+
+    def __len__(self):
+        return self.store.num_frames
+
+    def __getitem__(self, frame_num):
+        if isinstance(frame_num, slice):
+            return [self[i] for i in range(*frame_num.indices(len(self)))]
+        if frame_num < 0:
+            frame_num += len(self)
+        if not 0 <= frame_num < len(self):
+            raise IndexError(frame_num)
+        return FrameTracksView(self.store, self.object, frame_num)
+
+    def __iter__(self):
+        for frame_num in range(len(self)):
+            yield FrameTracksView(self.store, self.object, frame_num)
+
+
+class FrameTracksView:
+    def __init__(self, store, object, frame_num):
+        self.store = store
+        self.object = object
+        self.frame_num = frame_num
+
+    def rows(self):
+        rows = self.store.frame_rows(self.object, self.frame_num)
+        return range(rows.start, rows.stop)
+
+    def find_row(self, track_id):
+        for row in self.rows():
+            if self.store.track_id[row] == track_id:
+                return row
+        return None
+
+    def __getitem__(self, track_id):
+        row = self.find_row(track_id)
+        if row is None:
+            raise KeyError(track_id)
+        return TrackRowView(self.store, row)
+
+    def __setitem__(self, track_id, track_info):
+        row = self.find_row(track_id)
+        if row is None:
+            self.store.add_track(self.object, self.frame_num, track_id, track_info)
+            return
+        for key, value in track_info.items():
+            self.store.set_value(row, key, value)
+
+    def __contains__(self, track_id):
+        return self.find_row(track_id) is not None
+
+    def __len__(self):
+        return len(self.rows())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, track_id, default=None):
+        row = self.find_row(track_id)
+        return default if row is None else TrackRowView(self.store, row)
+
+    def keys(self):
+        return [int(self.store.track_id[row]) for row in self.rows()]
+
+    def values(self):
+        return [TrackRowView(self.store, row) for row in self.rows()]
+
+    def items(self):
+        return [(int(self.store.track_id[row]), TrackRowView(self.store, row)) for row in self.rows()]
+
+
+class TrackRowView:
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, key):
+        if key not in self.store.columns or not self.store.has_value(self.row, key):
+            raise KeyError(key)
+        return self.store.get_value(self.row, key)
+
+    def __setitem__(self, key, value):
+        self.store.set_value(self.row, key, value)
+
+    def __contains__(self, key):
+        return key in self.store.columns and self.store.has_value(self.row, key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def keys(self):
+        return [name for name in self.store.columns if self.store.has_value(self.row, name)]
+
+    def items(self):
+        return [(name, self.store.get_value(self.row, name)) for name in self.keys()]
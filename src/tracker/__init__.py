@@ -1 +1,6 @@
-from .tracker import Tracker
\ No newline at end of file
+from .tracker import Tracker
+from .detection_pipeline import DetectionPipeline
+from .ball_interpolator import BallInterpolator
+from .keyframe_detector import KeyframeDetector
+from .multi_resolution_detector import MultiResolutionDetector
+from .track_checkpoint import TrackCheckpoint
\ No newline at end of file
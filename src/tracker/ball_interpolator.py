@@ -0,0 +1,89 @@
+import numpy as np
+
+class BallInterpolator:
+    def __init__(self, look_ahead=None, predict=False, max_predicted_frames=12):
+        # max frames a missing ball waits for next detection before it is filled anyway, None waits until flush
+        self.look_ahead = look_ahead
+
+        # fill frames which can not wait with constant velocity of last two detections instead of holding last bbox
+        self.predict = predict
+
+        # prediction drifts quickly, ball stops at predicted position after this many frames without detection
+        self.max_predicted_frames = max_predicted_frames
+
+        # next frame number to be added
+        self.frame_num = 0
+
+        # frames without ball waiting for next detection
+        self.pending = []
+
+        # last filled frame and its bbox, gap is interpolated from here to next detection
+        self.anchor_frame = None
+        self.anchor_bbox = None
+
+        # last detection and bbox change per frame between last two detections
+        self.last_detection_frame = None
+        self.last_detection_bbox = None
+        self.velocity = None
+
+    def update(self, bbox):
+        # add ball bbox of next frame (None if ball is missing), returns [(frame_num, bbox)] of frames which are final now
+        frame_num = self.frame_num
+        self.frame_num += 1
+
+        if bbox is None:
+            self.pending.append(frame_num)
+            # look-ahead buffer is full, oldest frame can not wait any longer
+            if self.look_ahead is not None and len(self.pending) > self.look_ahead:
+                return self.fill_pending(1)
+            return []
+
+        bbox = np.asarray(bbox, dtype=np.float64)
+        filled = []
+
+        if self.pending:
+            if self.anchor_bbox is None:
+                # ball missing from first frames, back fill with first detection
+                filled = [(pending_frame, bbox.tolist()) for pending_frame in self.pending]
+            else:
+                # linear interpolation between last filled frame and this detection
+                frames = [self.anchor_frame, frame_num]
+                columns = [np.interp(self.pending, frames, [self.anchor_bbox[i], bbox[i]]) for i in range(4)]
+                filled = [(pending_frame, [float(column[j]) for column in columns]) for j, pending_frame in enumerate(self.pending)]
+            self.pending = []
+
+        # velocity per frame between last two detections for constant velocity prediction
+        if self.last_detection_bbox is not None:
+            self.velocity = (bbox - self.last_detection_bbox) / (frame_num - self.last_detection_frame)
+        self.last_detection_frame, self.last_detection_bbox = frame_num, bbox
+
+        self.anchor_frame, self.anchor_bbox = frame_num, bbox
+        filled.append((frame_num, bbox.tolist()))
+
+        return filled
+
+    def fill_pending(self, count):
+        # fill oldest pending frames without waiting for next detection
+        filled = []
+        for frame_num in self.pending[:count]:
+            if self.anchor_bbox is None:
+                # no ball seen yet, nothing to fill with
+                filled.append((frame_num, None))
+                continue
+
+            if self.predict and self.velocity is not None:
+                predicted_frames = min(frame_num - self.last_detection_frame, self.max_predicted_frames)
+                bbox = self.last_detection_bbox + self.velocity * predicted_frames
+            else:
+                bbox = self.anchor_bbox
+
+            self.anchor_frame, self.anchor_bbox = frame_num, bbox
+            filled.append((frame_num, bbox.tolist()))
+
+        self.pending = self.pending[count:]
+
+        return filled
+
+    def flush(self):
+        # fill every pending frame (e.g. at end of streaming window or video), state is kept for next frames
+        return self.fill_pending(len(self.pending))
@@ -0,0 +1,142 @@
+import os
+import time
+import queue
+import threading
+
+class DetectionPipeline:
+    def __init__(self, model, conf=0.1, queue_size=64, initial_batch_size=20, min_batch_size=1, max_batch_size=64, memory_fraction=0.25):
+        self.model = model
+        self.conf = conf
+
+        # bounded queue between decode thread and inference, limits frames held in memory
+        self.queue_size = queue_size
+
+        # batch size limits, batch size is tuned from measured latency per frame
+        self.initial_batch_size = initial_batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+
+        # fraction of available memory a batch (and its preprocessed copies) may use
+        self.memory_fraction = memory_fraction
+
+        self.stats = {}
+
+    def get_available_memory(self):
+        # available physical memory in bytes, None if platform does not report it
+        try:
+            return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (ValueError, OSError, AttributeError):
+            return None
+
+    def get_memory_batch_limit(self, frame):
+        available_memory = self.get_available_memory()
+        if available_memory is None:
+            return self.max_batch_size
+
+        # a frame is copied a few times while preprocessing (resize, normalize, tensor)
+        frame_memory = frame.nbytes * 4
+        return max(self.min_batch_size, int(available_memory * self.memory_fraction // frame_memory))
+
+    def put(self, frame_queue, item, stop_event):
+        # wait for free slot in queue, give up when consumer has stopped
+        while not stop_event.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decode(self, frames, frame_queue, stop_event):
+        # producer: read frames (list or generator) and push them into bounded queue, None marks end
+        try:
+            for frame in frames:
+                if not self.put(frame_queue, frame, stop_event):
+                    return
+            self.put(frame_queue, None, stop_event)
+        except Exception as e:
+            self.put(frame_queue, e, stop_event)
+
+    def next_batch(self, frame_queue, batch_size):
+        # block for first frame, then take frames until batch is full or video ends
+        batch = []
+        finished = False
+        while len(batch) < batch_size:
+            item = frame_queue.get()
+            if isinstance(item, Exception):
+                raise item
+            if item is None:
+                finished = True
+                break
+            batch.append(item)
+
+        return batch, finished
+
+    def adapt_batch_size(self, batch_size, latency_per_frame, best_latency_per_frame, memory_limit):
+        # grow batch while latency per frame improves, shrink back when it gets worse
+        if best_latency_per_frame is None or latency_per_frame < best_latency_per_frame * 0.95:
+            batch_size = int(batch_size * 1.5) + 1
+        elif latency_per_frame > best_latency_per_frame * 1.1:
+            batch_size = int(batch_size / 1.5)
+
+        return max(self.min_batch_size, min(batch_size, self.max_batch_size, memory_limit))
+
+    def run(self, frames):
+        frame_queue = queue.Queue(maxsize=self.queue_size)
+        stop_event = threading.Event()
+        decoder = threading.Thread(target=self.decode, args=(frames, frame_queue, stop_event), daemon=True)
+        decoder.start()
+
+        batch_size = self.initial_batch_size
+        best_latency_per_frame = None
+        memory_limit = self.max_batch_size
+        num_frames = 0
+        inference_time = 0
+        batch_sizes = []
+        start_time = time.perf_counter()
+
+        try:
+            finished = False
+            while not finished:
+                batch_frames, finished = self.next_batch(frame_queue, batch_size)
+                if not batch_frames:
+                    break
+
+                if num_frames == 0:
+                    memory_limit = self.get_memory_batch_limit(batch_frames[0])
+
+                # get predictions for batch
+                batch_start = time.perf_counter()
+                batch_detections = self.model.detect(batch_frames, self.conf)
+                batch_time = time.perf_counter() - batch_start
+
+                inference_time += batch_time
+                num_frames += len(batch_frames)
+                batch_sizes.append(len(batch_frames))
+
+                # tune next batch size from measured latency (only full batches are comparable)
+                latency_per_frame = batch_time / len(batch_frames)
+                if len(batch_frames) == batch_size:
+                    next_batch_size = self.adapt_batch_size(batch_size, latency_per_frame, best_latency_per_frame, memory_limit)
+                    if best_latency_per_frame is None or latency_per_frame < best_latency_per_frame:
+                        best_latency_per_frame = latency_per_frame
+                    batch_size = next_batch_size
+
+                # hand (class names, detections) over in frame order, e.g. straight to ByteTrack
+                for detection in batch_detections:
+                    yield detection
+        finally:
+            # stop decode thread if consumer stops early or fails
+            stop_event.set()
+            decoder.join()
+
+            total_time = time.perf_counter() - start_time
+            self.stats = {
+                'frames': num_frames,
+                'seconds': total_time,
+                'fps': num_frames / total_time if total_time > 0 else 0,
+                'inference_fps': num_frames / inference_time if inference_time > 0 else 0,
+                'batches': len(batch_sizes),
+                'mean_batch_size': sum(batch_sizes) / len(batch_sizes) if batch_sizes else 0,
+                'final_batch_size': batch_size,
+            }
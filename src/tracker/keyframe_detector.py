@@ -0,0 +1,176 @@
+import time
+import cv2
+import numpy as np
+import supervision as sv
+from src.camera_movement_estimator import CameraMovementEstimator
+
+class KeyframeDetector:
+    # points followed inside every box, as fractions of box width and height
+    grid = [0.25, 0.5, 0.75]
+
+    def __init__(self, model, conf=0.1, stride=5, scene_change_threshold=30, motion_threshold=40, min_tracked_fraction=0.5, scale=0.5, detector=None):
+        self.model = model
+        self.conf = conf
+
+        # keyframes are detected by detector (e.g. MultiResolutionDetector) instead of model when given
+        self.detector = detector
+
+        # detector runs at least every stride frames, boxes of frames in between are propagated by optical flow
+        self.stride = stride
+
+        # mean absolute difference (0-255) of small grayscale thumbnails above which frame is a new scene (e.g. cut, replay)
+        self.scene_change_threshold = scene_change_threshold
+
+        # median box shift (pixels) above which motion is too fast to propagate boxes reliably
+        self.motion_threshold = motion_threshold
+
+        # share of boxes which must still be followed by optical flow, fewer forces a keyframe
+        self.min_tracked_fraction = min_tracked_fraction
+
+        # optical flow runs on frames resized by this factor, like camera movement estimation
+        self.scale = scale
+
+        # points of a box which must be found to move it, otherwise box stays where it was
+        self.min_tracked_points = 3
+
+        # state kept across calls so streaming windows continue where previous one stopped
+        self.reset()
+
+        self.stats = {}
+
+    def reset(self):
+        # forget frames of previous video (e.g. next job of a batch worker)
+        self.camera_movement_estimator = None
+        self.old_gray = None
+        self.old_thumbnail = None
+        self.class_names = None
+        self.detections = None
+        self.frames_since_keyframe = 0
+
+    def get_state(self):
+        # state carried from frame to frame (e.g. for tracking checkpoints), model is left out
+        return {'camera_movement_estimator': self.camera_movement_estimator,
+                'old_gray': self.old_gray,
+                'old_thumbnail': self.old_thumbnail,
+                'class_names': self.class_names,
+                'detections': self.detections,
+                'frames_since_keyframe': self.frames_since_keyframe}
+
+    def set_state(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def get_thumbnail(self, gray):
+        # tiny blurred frame, compared between frames to find scene changes
+        return cv2.resize(gray, (64, 36), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def get_keyframe_trigger(self, thumbnail):
+        # reason to run detector on this frame, None if boxes can be propagated
+        if self.detections is None:
+            return 'first'
+        if self.frames_since_keyframe >= self.stride:
+            return 'stride'
+        if np.abs(thumbnail - self.old_thumbnail).mean() > self.scene_change_threshold:
+            return 'scene_change'
+        return None
+
+    def detect(self, frame):
+        if self.detector is not None:
+            class_names, detections, _ = self.detector.detect(frame)
+            return class_names, detections
+        return self.model.detect([frame], self.conf)[0]
+
+    def propagate(self, new_gray):
+        # move every box by median optical flow of a point grid inside it, returns moved detections or reason for a keyframe
+        detections = self.detections
+        if len(detections) == 0:
+            return detections, None
+
+        # (n, 9, 2) grid points of all boxes
+        xyxy = detections.xyxy.astype(np.float64)
+        grid_x, grid_y = np.meshgrid(self.grid, self.grid)
+        x = xyxy[:, None, 0] + (xyxy[:, None, 2] - xyxy[:, None, 0]) * grid_x.reshape(1, -1)
+        y = xyxy[:, None, 1] + (xyxy[:, None, 3] - xyxy[:, None, 1]) * grid_y.reshape(1, -1)
+        points = np.stack([x, y], axis=2)
+
+        new_points, found = self.camera_movement_estimator.track_points(self.old_gray, new_gray, points.reshape(-1, 2))
+        shifts = (new_points - points.reshape(-1, 2)).reshape(points.shape)
+        found = found.reshape(points.shape[:2])
+
+        # boxes without enough followed points keep their position
+        tracked = found.sum(axis=1) >= self.min_tracked_points
+        if tracked.mean() < self.min_tracked_fraction:
+            return None, 'lost'
+
+        box_shifts = np.zeros((len(detections), 2))
+        masked_shifts = np.where(found[tracked][:, :, None], shifts[tracked], np.nan)
+        box_shifts[tracked] = np.nanmedian(masked_shifts, axis=1)
+        if np.median(np.hypot(box_shifts[tracked, 0], box_shifts[tracked, 1])) > self.motion_threshold:
+            return None, 'motion'
+
+        propagated = sv.Detections(
+            xyxy=(xyxy + np.tile(box_shifts, 2)).astype(detections.xyxy.dtype),
+            confidence=detections.confidence,
+            class_id=detections.class_id,
+            data=detections.data,
+        )
+        return propagated, None
+
+    def detect_frame(self, frame):
+        # detections of next frame, returns (class names, detections, keyframe trigger or None if boxes were propagated)
+        if self.stride <= 1:
+            # every frame is a keyframe (e.g. live mode within latency budget), so no grayscale frames are kept for optical flow
+            # and first frame after stride is raised is a keyframe again
+            self.class_names, detections = self.detect(frame)
+            self.detections = self.old_gray = self.old_thumbnail = None
+            self.frames_since_keyframe = 0
+            return self.class_names, detections, 'stride'
+
+        if self.camera_movement_estimator is None:
+            self.camera_movement_estimator = CameraMovementEstimator(frame, self.scale)
+        new_gray = self.camera_movement_estimator.get_gray_frame(frame)
+        thumbnail = self.get_thumbnail(new_gray)
+
+        trigger = self.get_keyframe_trigger(thumbnail)
+        if trigger is None:
+            detections, trigger = self.propagate(new_gray)
+
+        if trigger is not None:
+            self.class_names, detections = self.detect(frame)
+            self.frames_since_keyframe = 0
+
+        self.detections = detections
+        self.old_gray, self.old_thumbnail = new_gray, thumbnail
+        self.frames_since_keyframe += 1
+
+        return self.class_names, detections, trigger
+
+    def run(self, frames):
+        # (class names, supervision detections) for every frame in order, so ByteTrack is still updated on every frame
+        triggers = {'first': 0, 'stride': 0, 'scene_change': 0, 'lost': 0, 'motion': 0}
+        num_frames = 0
+        detection_time = 0
+        start_time = time.perf_counter()
+
+        try:
+            for frame in frames:
+                detection_start = time.perf_counter()
+                class_names, detections, trigger = self.detect_frame(frame)
+                if trigger is not None:
+                    detection_time += time.perf_counter() - detection_start
+                    triggers[trigger] += 1
+                num_frames += 1
+
+                yield class_names, detections
+        finally:
+            total_time = time.perf_counter() - start_time
+            num_keyframes = sum(triggers.values())
+            self.stats = {
+                'frames': num_frames,
+                'keyframes': num_keyframes,
+                'keyframe_ratio': num_keyframes / num_frames if num_frames else 0,
+                'triggers': triggers,
+                'seconds': total_time,
+                'detection_seconds': detection_time,
+                'fps': num_frames / total_time if total_time > 0 else 0,
+            }
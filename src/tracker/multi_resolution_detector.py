@@ -0,0 +1,147 @@
+import time
+import cv2
+import numpy as np
+import supervision as sv
+
+class MultiResolutionDetector:
+    def __init__(self, model, conf=0.1, low_resolution=480, ball_roi_size=256, max_predicted_frames=12, recovery_interval=12):
+        self.model = model
+        self.conf = conf
+
+        # players and referees are detected on frame downscaled to this long side (pixels)
+        self.low_resolution = low_resolution
+
+        # ball is detected on a square crop of this size (pixels) at full resolution around its predicted position
+        self.ball_roi_size = ball_roi_size
+
+        # ball position is predicted with constant velocity for this many frames after it was last seen
+        self.max_predicted_frames = max_predicted_frames
+
+        # lost ball is searched on full resolution frame every recovery_interval frames
+        self.recovery_interval = recovery_interval
+
+        # state kept across calls so streaming windows continue where previous one stopped
+        self.reset()
+
+        self.stats = {}
+
+    def reset(self):
+        # forget ball of previous video (e.g. next job of a batch worker)
+        self.ball_center = None
+        self.ball_velocity = None
+        self.frames_since_ball = 0
+        self.frames_since_recovery = None
+
+    def get_state(self):
+        # state carried from frame to frame (e.g. for tracking checkpoints), model is left out
+        return {'ball_center': self.ball_center,
+                'ball_velocity': self.ball_velocity,
+                'frames_since_ball': self.frames_since_ball,
+                'frames_since_recovery': self.frames_since_recovery}
+
+    def set_state(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def get_imgsz(self, image):
+        # inference size of image's long side, multiple of 32 like model stride, so model does not resize it again
+        return max(32, int(np.ceil(max(image.shape[:2]) / 32) * 32))
+
+    def predict(self, image):
+        return self.model.detect([image], self.conf, self.get_imgsz(image))[0]
+
+    def get_predicted_ball_center(self):
+        # None if ball was never seen or is lost for too long
+        if self.ball_center is None or self.frames_since_ball > self.max_predicted_frames:
+            return None
+        if self.ball_velocity is None:
+            return self.ball_center
+        return self.ball_center + self.ball_velocity * self.frames_since_ball
+
+    def get_ball_roi(self, frame, center):
+        # square crop around center, shifted to stay inside frame
+        height, width = frame.shape[:2]
+        size = min(self.ball_roi_size, width, height)
+        x1 = int(np.clip(round(center[0] - size / 2), 0, width - size))
+        y1 = int(np.clip(round(center[1] - size / 2), 0, height - size))
+        return x1, y1, x1 + size, y1 + size
+
+    def update_ball(self, ball_detections):
+        # follow most confident ball, velocity per frame between last two sightings
+        if len(ball_detections) == 0:
+            self.frames_since_ball += 1
+            return
+
+        xyxy = ball_detections.xyxy[np.argmax(ball_detections.confidence)]
+        center = np.array([(xyxy[0] + xyxy[2]) / 2, (xyxy[1] + xyxy[3]) / 2], dtype=np.float64)
+        if self.ball_center is not None and self.frames_since_ball <= self.max_predicted_frames:
+            self.ball_velocity = (center - self.ball_center) / (self.frames_since_ball + 1)
+        else:
+            self.ball_velocity = None
+        self.ball_center = center
+        self.frames_since_ball = 0
+
+    def detect(self, frame):
+        # (class names, supervision detections) of one frame in full frame coordinates, returns which ball search was used
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.low_resolution / max(height, width))
+        predicted_center = self.get_predicted_ball_center()
+
+        # lost ball: from time to time whole frame at full resolution, which also gives players and referees
+        if predicted_center is None and (self.frames_since_recovery is None or self.frames_since_recovery >= self.recovery_interval):
+            self.frames_since_recovery = 0
+            class_names, detections = self.predict(frame)
+            ball_class_id = {v: k for k, v in class_names.items()}['ball']
+            self.update_ball(detections[detections.class_id == ball_class_id])
+            return class_names, detections, 'recovery'
+        if self.frames_since_recovery is not None:
+            self.frames_since_recovery += 1
+
+        # players and referees on downscaled frame, boxes scaled back to full frame
+        low_frame = cv2.resize(frame, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA) if scale < 1 else frame
+        class_names, detections = self.predict(low_frame)
+        detections.xyxy = detections.xyxy / np.array([low_frame.shape[1] / width, low_frame.shape[0] / height] * 2, dtype=np.float32)
+        ball_class_id = {v: k for k, v in class_names.items()}['ball']
+
+        if predicted_center is None:
+            # no idea where ball is, keep whatever low resolution frame found
+            self.update_ball(detections[detections.class_id == ball_class_id])
+            return class_names, detections, 'low_resolution'
+
+        # ball on full resolution crop around its predicted position, boxes shifted back to full frame
+        x1, y1, x2, y2 = self.get_ball_roi(frame, predicted_center)
+        _, roi_detections = self.predict(frame[y1:y2, x1:x2])
+        roi_detections = roi_detections[roi_detections.class_id == ball_class_id]
+        roi_detections.xyxy = roi_detections.xyxy + np.array([x1, y1, x1, y1], dtype=np.float32)
+
+        # crop finds ball more reliably than downscaled frame, fall back to downscaled frame when crop misses it
+        ball_detections = roi_detections if len(roi_detections) else detections[detections.class_id == ball_class_id]
+        self.update_ball(ball_detections)
+
+        detections = sv.Detections.merge([detections[detections.class_id != ball_class_id], ball_detections])
+        return class_names, detections, 'roi'
+
+    def run(self, frames):
+        # (class names, supervision detections) for every frame in order
+        searches = {'recovery': 0, 'low_resolution': 0, 'roi': 0}
+        num_frames = 0
+        ball_frames = 0
+        start_time = time.perf_counter()
+
+        try:
+            for frame in frames:
+                class_names, detections, search = self.detect(frame)
+                searches[search] += 1
+                num_frames += 1
+                ball_frames += self.frames_since_ball == 0
+
+                yield class_names, detections
+        finally:
+            total_time = time.perf_counter() - start_time
+            self.stats = {
+                'frames': num_frames,
+                'ball_searches': searches,
+                'ball_found_ratio': ball_frames / num_frames if num_frames else 0,
+                'seconds': total_time,
+                'fps': num_frames / total_time if total_time > 0 else 0,
+            }
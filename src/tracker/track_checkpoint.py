@@ -0,0 +1,45 @@
+import os
+import json
+import pickle
+import hashlib
+
+class TrackCheckpoint:
+    def __init__(self, checkpoint_dir, chunk_size=1000, params=None):
+        # tracks are written in append-only chunks of chunk_size frames, each with snapshot of tracker state after its last frame
+        # params (video, model, detection settings) pick sub-directory, so a changed run never resumes from stale chunks
+        key = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        self.checkpoint_dir = os.path.join(checkpoint_dir, key)
+        self.chunk_size = chunk_size
+        self.params = params
+
+    def get_chunk_path(self, start_frame):
+        return os.path.join(self.checkpoint_dir, f"chunk-{start_frame:09d}.pkl")
+
+    def load(self):
+        # called when tracking starts or resumes, so nothing is written for runs which never track (e.g. cached tracks)
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        with open(os.path.join(self.checkpoint_dir, 'params.json'), 'w') as f:
+            json.dump(self.params, f, indent=2, sort_keys=True, default=str)
+
+        # tracks of all completed chunks and tracker state after last of them (None if nothing was saved yet)
+        tracks = {'players': [], 'referees': [], 'ball': []}
+        state = None
+
+        # chunks are read in frame order and must follow each other, anything after a gap is ignored
+        while os.path.exists(self.get_chunk_path(len(tracks['players']))):
+            with open(self.get_chunk_path(len(tracks['players'])), 'rb') as f:
+                chunk = pickle.load(f)
+            for object, object_tracks in chunk['tracks'].items():
+                tracks[object] += object_tracks
+            state = chunk['state']
+
+        return tracks, state
+
+    def save_chunk(self, start_frame, chunk_tracks, state):
+        # written to temporary file and renamed, so a crash never leaves a half written chunk behind
+        path = self.get_chunk_path(start_frame)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump({'tracks': chunk_tracks, 'state': state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
@@ -1,108 +1,208 @@
 import pickle
-import pandas as pd
+from itertools import islice
+import numpy as np
 import supervision as sv
-from ultralytics import YOLO
 from src.utils import BBoxUtils
+from src.track_store import TrackStore, ColumnarFile
+from src.profiler import StageProfiler
+from src.inference_backend import InferenceBackend
+from .detection_pipeline import DetectionPipeline
+from .keyframe_detector import KeyframeDetector
+from .multi_resolution_detector import MultiResolutionDetector
 
 class Tracker:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, keyframe_stride=1, low_resolution=None, ball_roi_size=256):
+        self.model_path = model_path
+        # model_path None skips loading model, post-processing and drawing still work (e.g. benchmarks)
+        # .onnx models run on ONNX Runtime, .pt models on PyTorch
+        self.model = InferenceBackend.create(model_path) if model_path is not None else None
         self.tracker = sv.ByteTrack()
         self.bbox_utils = BBoxUtils()
 
+        # detection confidence threshold
+        self.conf = 0.1
+
+        # decode thread + adaptive batch inference
+        self.detection_pipeline = DetectionPipeline(self.model, conf=self.conf)
+
+        # stride above 1 runs detector only on keyframes and propagates boxes by optical flow in between
+        self.keyframe_stride = keyframe_stride
+        self.keyframe_detector = KeyframeDetector(self.model, self.conf, keyframe_stride) if keyframe_stride > 1 else None
+
+        # low_resolution (long side in pixels) detects players and referees on downscaled frames
+        # and ball on a full resolution crop around its predicted position
+        if low_resolution and self.keyframe_detector is not None:
+            raise ValueError("Keyframe detection and multi-resolution detection can not be combined")
+        self.multi_resolution_detector = MultiResolutionDetector(self.model, self.conf, low_resolution, ball_roi_size) if low_resolution else None
+
+        # class names of last frame and their inverse, see get_class_ids
+        self.class_names = None
+        self.class_names_inverse = None
+
+        # records per-frame detection latency when profiling is enabled
+        self.profiler = StageProfiler()
+
     def detect_frames(self, frames):
-        # define batch size
-        batch_size = 20
+        # detect frames on batches instead of whole video at once, frames can be a list or a generator
+        # returns (class names, supervision detections) of every frame
+        return list(self.detection_pipeline.run(frames))
 
-        # define detections array to store detections
-        detections = []
+    def get_detections(self, frames):
+        # (class names, supervision detections) of every frame, detected on every frame or only on keyframes
+        if self.keyframe_detector is not None:
+            return self.keyframe_detector.run(frames)
+        if self.multi_resolution_detector is not None:
+            return self.multi_resolution_detector.run(frames)
+        return self.detection_pipeline.run(frames)
 
-        # detect frames on batches instead of whole video at once
-        for i in range(0, len(frames), batch_size):
-            # get 20 (batch_size) frames
-            batch_frames = frames[i: i + batch_size]
+    def print_detection_stats(self):
+        if self.keyframe_detector is not None:
+            stats = self.keyframe_detector.stats
+            print(f"Detected {stats['frames']} frames at {stats['fps']:.2f} frames/sec "
+                  f"({stats['keyframes']} keyframes, {stats['keyframe_ratio']:.0%} of frames)")
+            return
 
-            # get predictions in 20 frames
-            batch_detections = self.model.predict(batch_frames, conf=0.1)
+        if self.multi_resolution_detector is not None:
+            stats = self.multi_resolution_detector.stats
+            print(f"Detected {stats['frames']} frames at {stats['fps']:.2f} frames/sec "
+                  f"(ball found on {stats['ball_found_ratio']:.0%} of frames, {stats['ball_searches']['roi']} ball crops)")
+            return
 
-            # append batch_detecions to detections
-            detections += batch_detections
-        
-        return detections
+        stats = self.detection_pipeline.stats
+        print(f"Detected {stats['frames']} frames at {stats['fps']:.2f} frames/sec (mean batch size {stats['mean_batch_size']:.1f})")
+
+    def reset(self):
+        # start a new video: fresh ByteTrack (ids start from 1 again) and no detector state of previous video, model stays loaded
+        # streaming windows and segments of one video keep state, so this is called once per video, not per get_object_tracks
+        self.tracker = sv.ByteTrack()
+        if self.keyframe_detector is not None:
+            self.keyframe_detector.reset()
+        if self.multi_resolution_detector is not None:
+            self.multi_resolution_detector.reset()
+
+    def get_state(self):
+        # ByteTrack and detection state after last frame, model is left out
+        # (ByteTrack class is wrapped by a deprecation decorator and can not be pickled itself, its attributes can)
+        return {
+            'byte_track': dict(vars(self.tracker)),
+            'keyframe_detector': self.keyframe_detector.get_state() if self.keyframe_detector is not None else None,
+            'multi_resolution_detector': self.multi_resolution_detector.get_state() if self.multi_resolution_detector is not None else None,
+        }
+
+    def set_state(self, state):
+        vars(self.tracker).update(state['byte_track'])
+        if self.keyframe_detector is not None:
+            self.keyframe_detector.set_state(state['keyframe_detector'])
+        if self.multi_resolution_detector is not None:
+            self.multi_resolution_detector.set_state(state['multi_resolution_detector'])
+
+    def get_object_tracks(self, frames, read_from_stub=False, stub_path=None, frame_range=(0, None), checkpoint=None):
+        # read only frame_range from memory-mapped columnar stub
+        if read_from_stub and ColumnarFile().is_columnar(stub_path):
+            return ColumnarFile().load_tracks(stub_path, *frame_range)
 
-    def get_object_tracks(self, frames, read_from_stub=False, stub_path=None):
         # read from stub then return saved tracks
         if read_from_stub and stub_path:
             with open(stub_path, 'rb') as f:
                 tracks = pickle.load(f)
             return tracks
 
-        # detection frames using YOLO model
-        detections = self.detect_frames(frames)
-
         # initialize tracks to store for players, referees and ball
         tracks = {'players':[], 'referees':[], 'ball':[]}
 
+        # TrackCheckpoint: continue after last completed chunk of an interrupted run with tracker state saved with it
+        if checkpoint is not None:
+            tracks, state = checkpoint.load()
+            if state is not None:
+                self.set_state(state)
+                print(f"Resuming tracking from frame {len(tracks['players'])}")
+            frames = islice(frames, len(tracks['players']), None)
+        chunk_start = len(tracks['players'])
+
+        # detection frames using YOLO model, results are consumed in order while next batches are decoded
+        detections = self.profiler.time_frames('detection', self.get_detections(frames))
+
         # iterate over detctions
-        for frame_num, detection in enumerate(detections):
-
-            # get detections names (e.g, 2:player, 3:referee etc)
-            class_names = detection.names
-            # inverse names like (player:2, referee:3)
-            class_names_inverse = {v:k for k, v in class_names.items()}
-
-            # convert YOLO detections to supervision format so tracker (ByteTrack) can use it
-            sv_detections = sv.Detections.from_ultralytics(detection)
-
-            # convert 'goalkeeper' class_id to 'player' class_id in sv_detections
-            # because model is not performing consistent with referee due to small dataset
-            for object_idx, class_id in enumerate(sv_detections.class_id):
-                if class_names[class_id] == 'goalkeeper':
-                    sv_detections.class_id[object_idx] = class_names_inverse['player']
-
-            # track objects
-            detection_with_tracks = self.tracker.update_with_detections(sv_detections)
-
-            # appending dictionary for each object
-            # key will be track id which we get from tracker and value will be bounding box
-            tracks['players'].append({})
-            tracks['referees'].append({})
-            tracks['ball'].append({})
-
-            for frame_detection in detection_with_tracks:
-                # index for bbox = 0, class_id = 3, tracker_id = 4
-                bbox = frame_detection[0].tolist()
-                class_id = frame_detection[3]
-                tracker_id = frame_detection[4]
-
-                # assign 'player' bounding box to corresponding tracker_id in current frame
-                if class_id == class_names_inverse['player']:
-                    tracks['players'][frame_num][tracker_id] = {'bbox': bbox}
-                
-                # assign 'referee' bounding box to corresponding tracker_id in current frame
-                if class_id == class_names_inverse['referee']:
-                    tracks['referees'][frame_num][tracker_id] = {'bbox': bbox}
-            
-            # we are taking ball without tracks
-            for frame_detection in sv_detections:
-                bbox = frame_detection[0].tolist()
-                class_id = frame_detection[3]
-
-                # just setting 1 as track id for ball
-                tracker_id = 1
-
-                # assign 'ball' bounding box to corresponding tracker_id in current frame
-                if class_id == class_names_inverse['ball']:
-                    tracks['ball'][frame_num][tracker_id] = {'bbox': bbox}
-        
+        # detections are already in supervision format so tracker (ByteTrack) can use them
+        for class_names, sv_detections in detections:
+            frame_tracks = self.update_tracks(class_names, sv_detections)
+            for object, object_tracks in frame_tracks.items():
+                tracks[object].append(object_tracks)
+
+            # state is saved right after last frame of chunk, detection generators have not looked further yet
+            if checkpoint is not None and len(tracks['players']) - chunk_start == checkpoint.chunk_size:
+                checkpoint.save_chunk(chunk_start, {object: object_tracks[chunk_start:] for object, object_tracks in tracks.items()}, self.get_state())
+                chunk_start = len(tracks['players'])
+
+        # last partial chunk, so rerun of a finished video needs no detection at all
+        if checkpoint is not None and len(tracks['players']) > chunk_start:
+            checkpoint.save_chunk(chunk_start, {object: object_tracks[chunk_start:] for object, object_tracks in tracks.items()}, self.get_state())
+
+        self.print_detection_stats()
+
         # save tracks if stub_path is provided
-        if stub_path: 
+        if ColumnarFile().is_columnar(stub_path):
+            ColumnarFile().save_tracks(tracks, stub_path)
+        elif stub_path: 
             with open(stub_path, 'wb') as f:
                 pickle.dump(tracks, f)
         
         return tracks
 
+    def get_class_ids(self, class_names):
+        # detections names are like (2:player, 3:referee etc), inverse names like (player:2, referee:3)
+        # backends return same names dict every frame, so inverse is only built when it changes
+        if class_names is not self.class_names:
+            self.class_names = class_names
+            self.class_names_inverse = {v:k for k, v in class_names.items()}
+        return self.class_names_inverse
+
+    def update_tracks(self, class_names, sv_detections):
+        # feed detections of next frame to ByteTrack, returns {track_id: {'bbox': bbox}} of players, referees and ball in that frame
+        # (online mode calls this frame by frame)
+        class_names_inverse = self.get_class_ids(class_names)
+
+        # convert 'goalkeeper' class_id to 'player' class_id in sv_detections
+        # because model is not performing consistent with referee due to small dataset
+        if 'goalkeeper' in class_names_inverse:
+            sv_detections.class_id[sv_detections.class_id == class_names_inverse['goalkeeper']] = class_names_inverse['player']
+
+        # track objects
+        detection_with_tracks = self.tracker.update_with_detections(sv_detections)
+
+        # dictionary for each object
+        # key will be track id which we get from tracker and value will be bounding box
+        # boxes and ids are converted to python values once per frame instead of once per detection
+        bboxes = detection_with_tracks.xyxy.tolist()
+        tracker_ids = detection_with_tracks.tracker_id.tolist()
+        class_ids = detection_with_tracks.class_id
+        frame_tracks = {}
+        for object, name in [('players', 'player'), ('referees', 'referee')]:
+            rows = np.flatnonzero(class_ids == class_names_inverse[name]).tolist()
+            frame_tracks[object] = {tracker_ids[row]: {'bbox': bboxes[row]} for row in rows}
+
+        # we are taking ball without tracks, most confident ball detection if there are several
+        # just setting 1 as track id for ball
+        frame_tracks['ball'] = {}
+        ball_rows = np.flatnonzero(sv_detections.class_id == class_names_inverse['ball'])
+        if len(ball_rows):
+            confidence = sv_detections.confidence
+            ball_row = ball_rows[np.argmax(confidence[ball_rows])] if confidence is not None else ball_rows[-1]
+            frame_tracks['ball'][1] = {'bbox': sv_detections.xyxy[ball_row].tolist()}
+
+        return frame_tracks
+
     def add_position_to_tracks(self, tracks):
+        # columnar tracks: compute positions for all rows at once
+        if isinstance(tracks, TrackStore):
+            bbox = tracks.bbox
+            is_ball = tracks.object_mask('ball')
+            # same as int() in get_center/get_foot_position
+            x = np.trunc((bbox[:, 0] + bbox[:, 2]) / 2)
+            y = np.where(is_ball, np.trunc((bbox[:, 1] + bbox[:, 3]) / 2), np.trunc(bbox[:, 3]))
+            tracks.set_column('position', np.stack([x, y], axis=1))
+            return
+
         for object, object_tracks in tracks.items():
             for frame_num, track in enumerate(object_tracks):
                 for track_id, track_info in track.items():
@@ -118,21 +218,63 @@ class Tracker:
 
 
     def interpolate_ball_position(self, ball_positions):
-        # get bounding boxes of ball and convert to list
-        ball_positions = [position.get(1, {}).get('bbox', []) for position in ball_positions]
+        # get bounding boxes of ball as (frames, 4) array, nan where ball is missing
+        bboxes = np.full((len(ball_positions), 4), np.nan)
+        for frame_num, position in enumerate(ball_positions):
+            bbox = position.get(1, {}).get('bbox')
+            if bbox is not None:
+                bboxes[frame_num] = bbox
 
-        # convert ball positions to pandas dataframe
-        df_ball_positions = pd.DataFrame(ball_positions, columns=['x1', 'y1', 'x2', 'y2'])
+        bboxes = self.interpolate_bboxes(bboxes)
 
-        # interpolate missing values and back fill in case if values are missing from starting frame (e.g. frame 1)
-        df_ball_positions = df_ball_positions.interpolate().bfill()
+        # convert ball positions to same format and return, frames stay empty only if ball is never detected
+        ball_positions = [{1: {'bbox': bbox}} if not np.isnan(bbox[0]) else {} for bbox in bboxes.tolist()]
 
-        # convert ball positions to same format and return
-        ball_positions = [{1: {'bbox': position}} for position in df_ball_positions.to_numpy().tolist()]
-        
         return ball_positions
 
-    def draw_annotations(self, video_frames, tracks, team_ball_control):
+    def interpolate_bboxes(self, bboxes):
+        # linear interpolation between detected frames, frames before first detection take first bbox
+        # and frames after last detection keep last bbox
+        detected = np.flatnonzero(~np.isnan(bboxes).any(axis=1))
+        if len(detected) == 0:
+            return bboxes
+
+        frames = np.arange(len(bboxes))
+        return np.stack([np.interp(frames, detected, bboxes[detected, i]) for i in range(4)], axis=1)
+
+    def draw_frame_annotations(self, frame, frame_num, tracks, possession_stats, frame_offset=0):
+        # get players, referees, and ball info stored in tracks
+        players_dict = tracks['players'][frame_num]
+        referees_dict = tracks['referees'][frame_num]
+        ball_dict = tracks['ball'][frame_num]
+
+        # change rectangle bounding box to ellipse for all tracks in frame for players
+        for track_id, player in players_dict.items():
+            bbox = player['bbox']
+            color = player.get('team_color', (0, 0, 255))
+            frame = self.bbox_utils.draw_custom_bbox(frame, bbox, color, track_id)
+            if player.get('has_ball', False):
+                frame = self.bbox_utils.draw_triangle(frame, bbox, (0, 0, 255))
+        
+        # change rectangle bounding box to ellipse for all tracks in frame for referees
+        for _, referee in referees_dict.items():
+            bbox = referee['bbox']
+            color = (0, 255, 255)
+            frame = self.bbox_utils.draw_custom_bbox(frame, bbox, color)
+        
+        # change rectangle bounding box to filled triangle for all tracks in frame for ball
+        for _, ball in ball_dict.items():
+            bbox = ball['bbox']
+            color = (0, 255, 0)
+            frame = self.bbox_utils.draw_triangle(frame, bbox, color)
+        
+        # draw rectangle and show team controling the ball
+        # frame_offset maps window frame number to video frame number in streaming mode
+        frame = self.bbox_utils.draw_team_ball_control(frame, frame_offset + frame_num, possession_stats)
+
+        return frame
+
+    def draw_annotations(self, video_frames, tracks, possession_stats, frame_offset=0):
         # initialize output video frames to store frames after assigning them ellipse bounding box
         output_video_frames = []
 
@@ -141,35 +283,10 @@ class Tracker:
             # make copy to not change original frame
             frame = frame.copy()
 
-            # get players, referees, and ball info stored in tracks
-            players_dict = tracks['players'][frame_num]
-            referees_dict = tracks['referees'][frame_num]
-            ball_dict = tracks['ball'][frame_num]
-
-            # change rectangle bounding box to ellipse for all tracks in frame for players
-            for track_id, player in players_dict.items():
-                bbox = player['bbox']
-                color = player.get('team_color', (0, 0, 255))
-                frame = self.bbox_utils.draw_custom_bbox(frame, bbox, color, track_id)
-                if player.get('has_ball', False):
-                    frame = self.bbox_utils.draw_triangle(frame, bbox, (0, 0, 255))
-            
-            # change rectangle bounding box to ellipse for all tracks in frame for referees
-            for _, referee in referees_dict.items():
-                bbox = referee['bbox']
-                color = (0, 255, 255)
-                frame = self.bbox_utils.draw_custom_bbox(frame, bbox, color)
-            
-            # change rectangle bounding box to filled triangle for all tracks in frame for ball
-            for _, ball in ball_dict.items():
-                bbox = ball['bbox']
-                color = (0, 255, 0)
-                frame = self.bbox_utils.draw_triangle(frame, bbox, color)
-            
-            # draw rectangle and show team controling the ball
-            frame = self.bbox_utils.draw_team_ball_control(frame, frame_num, team_ball_control)
+            # draw tracks and ball control on frame
+            frame = self.draw_frame_annotations(frame, frame_num, tracks, possession_stats, frame_offset)
 
             # append new frame to output video frames
             output_video_frames.append(frame)
         
-        return output_video_frames
\ No newline at end of file
+        return output_video_frames
@@ -1,2 +1,4 @@
 from .video_utils import VideoUtils
-from .bbox_utils import BBoxUtils
\ No newline at end of file
+from .bbox_utils import BBoxUtils
+from .video_writer import VideoWriter
+from .frame_reader import FrameReader
\ No newline at end of file
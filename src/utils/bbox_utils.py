@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+from scipy.optimize import linear_sum_assignment
 
 class BBoxUtils:
     def __init__(self):
@@ -51,6 +52,30 @@ class BBoxUtils:
         dist_y = point1[1] - point2[1]
         return dist_x, dist_y
     
+    def get_iou(self, boxes_a, boxes_b):
+        # (a, 4) x (b, 4) boxes as x1, y1, x2, y2 -> (a, b) intersection over union matrix
+        boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+        boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+        top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+        bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+        intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+        area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=1)
+        area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=1)
+        union = area_a[:, None] + area_b[None, :] - intersection
+
+        return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0)
+
+    def match_boxes(self, boxes_a, boxes_b, min_iou=0.5):
+        # one to one matching of two box sets with highest total IoU, returns (indices a, indices b, IoU) of pairs above min_iou
+        if len(boxes_a) == 0 or len(boxes_b) == 0:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty(0)
+
+        iou = self.get_iou(boxes_a, boxes_b)
+        rows, columns = linear_sum_assignment(-iou)
+        matched = iou[rows, columns] >= min_iou
+
+        return rows[matched], columns[matched], iou[rows, columns][matched]
+
     def draw_ellipse(self, frame, x_center, y2, width, color):
         # Calculate axes of ellipse
         minor_axis, major_axis = int(width), int(width * 0.35)
@@ -151,21 +176,29 @@ class BBoxUtils:
 
         return frame
     
-    def draw_team_ball_control(self, frame, frame_num, team_ball_control):
+    def draw_transparent_rectangle(self, frame, pt1, pt2, color, alpha):
+        # blend filled rectangle into frame in place, only rectangle region (ROI) is touched
+        # (same pixels as drawing rectangle on full frame copy and blending whole frame)
+        height, width = frame.shape[:2]
+        x1, y1 = max(pt1[0], 0), max(pt1[1], 0)
+        x2, y2 = min(pt2[0] + 1, width), min(pt2[1] + 1, height)
+        if x1 >= x2 or y1 >= y2:
+            return frame
+
+        roi = frame[y1:y2, x1:x2]
+        overlay = np.empty_like(roi)
+        overlay[:] = color
+        cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0, roi)
+
+        return frame
+
+    def draw_team_ball_control(self, frame, frame_num, possession_stats):
         # draw transparent rectangle
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (1350, 850), (1900, 970), (255, 255, 255), -1)
         alpha = 0.4
-        cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
-
-        # get team ball till current frame
-        team_ball_control_till_frame = team_ball_control[:frame_num + 1]
+        self.draw_transparent_rectangle(frame, (1350, 850), (1900, 970), (255, 255, 255), alpha)
 
-        # get number of times each team controlled ball
-        team1_num_frames = team_ball_control_till_frame[team_ball_control_till_frame == 1].shape[0]
-        team2_num_frames = team_ball_control_till_frame[team_ball_control_till_frame == 2].shape[0]
-        team1 = team1_num_frames / (team1_num_frames + team2_num_frames)
-        team2 = team2_num_frames / (team1_num_frames + team2_num_frames)
+        # share of ball control of both teams up to frame, looked up in precomputed PossessionStats
+        team1, team2 = possession_stats.get_percentages(frame_num)
 
         # show text on triangle
         team1_text = f"Team 1 Ball Control: {team1*100:.2f}"
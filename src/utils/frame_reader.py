@@ -0,0 +1,26 @@
+from .video_utils import VideoUtils
+
+class FrameReader:
+    def __init__(self, video_path):
+        # frames of video by frame number without holding them in memory, e.g. frames[frame_num] for team colors
+        # frames are decoded forward from start of video, so asking in increasing order reads video once
+        self.video_path = video_path
+        self.vu = VideoUtils()
+
+        self.frames = None
+        self.frame_num = -1
+        self.frame = None
+
+    def __getitem__(self, frame_num):
+        # going back starts decoding from first frame again (seeking is not frame exact for every codec)
+        if self.frames is None or frame_num < self.frame_num:
+            self.frames = self.vu.generate_frames(self.video_path)
+            self.frame_num = -1
+
+        while self.frame_num < frame_num:
+            self.frame = next(self.frames, None)
+            if self.frame is None:
+                raise IndexError(frame_num)
+            self.frame_num += 1
+
+        return self.frame
@@ -1,4 +1,5 @@
 import cv2
+from .video_writer import VideoWriter
 
 class VideoUtils:
     def __init__(self):
@@ -30,19 +31,114 @@ class VideoUtils:
 
         return frames
 
-    def save_video(self, output_video_frames, output_video_path):
+    def generate_frames(self, video_path, start_frame=0, end_frame=None):
+        # open video file for reading
+        capture = cv2.VideoCapture(video_path)
+
+        # nothing to yield if video is not opening
+        if not capture.isOpened():
+            return
+
+        # seek to first frame of requested range (e.g. segment of a long match)
+        if start_frame > 0:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        try:
+            frame_num = start_frame
+            while end_frame is None or frame_num < end_frame:
+                # read the frame of video
+                ret, frame = capture.read()
+
+                # stop if not frames are avaliable
+                if not ret:
+                    break
+
+                # hand over one frame at a time instead of storing all of them
+                yield frame
+                frame_num += 1
+        finally:
+            # close video even if consumer stops early
+            capture.release()
+
+    def read_frames_at(self, video_path, frame_nums):
+        # few frames spread over video (e.g. calibration samples), seeks to each one instead of decoding whole video
+        capture = cv2.VideoCapture(video_path)
+        if not capture.isOpened():
+            return []
+
+        frames = []
+        try:
+            for frame_num in frame_nums:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                frames.append(frame)
+        finally:
+            capture.release()
+
+        return frames
+
+    def collect_frames(self, video_path, frames):
+        # yield frames one by one (e.g. to detection's decode thread) and also append them to frames list,
+        # so later stages get whole video without decoding it a second time
+        for frame in self.generate_frames(video_path):
+            frames.append(frame)
+            yield frame
+
+    def read_video_windows(self, video_path, window_size, start_frame=0, end_frame=None):
+        # collect frames into windows so memory is bounded by window size, not video length
+        window = []
+        for frame in self.generate_frames(video_path, start_frame, end_frame):
+            window.append(frame)
+
+            if len(window) == window_size:
+                yield window
+                window = []
+
+        # yield remaining frames of last (smaller) window
+        if window:
+            yield window
+
+    def get_video_properties(self, video_path):
+        # open video file to read its metadata
+        capture = cv2.VideoCapture(video_path)
+
+        # just return None if video is not opening
+        if not capture.isOpened():
+            return None
+
+        properties = {
+            'fps': capture.get(cv2.CAP_PROP_FPS),
+            'frame_size': (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+            'frame_count': int(capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+        }
+
+        # close video
+        capture.release()
+
+        return properties
+
+    def open_video_writer(self, output_video_path, frame_size, fps=24):
         # define output format of video
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
 
+        # define VideoWriter for saving frames as video at given path, frame_size is (width, height)
+        return cv2.VideoWriter(output_video_path, fourcc, fps, frame_size)
+
+    def create_video_writer(self, input_video_path, output_video_path, queue_size=32):
+        # take fps and frame size of output video from input video metadata
+        properties = self.get_video_properties(input_video_path)
+        if properties is None:
+            return None
+
+        return VideoWriter(output_video_path, properties['frame_size'], properties['fps'] or 24, queue_size=queue_size)
+
+    def save_video(self, output_video_frames, output_video_path, fps=24):
         # define frame size
         (y, x, c) = output_video_frames[0].shape
 
-        # define VideoWriter for saving frames as video at given path
-        output = cv2.VideoWriter(output_video_path, fourcc, 24, (x, y))
-
-        # saving frames as video 
-        for frame in output_video_frames:
-            output.write(frame)
-        
-        # close video writer
-        output.release()
+        # saving frames as video, encoding runs on background thread
+        with VideoWriter(output_video_path, (x, y), fps) as output:
+            for frame in output_video_frames:
+                output.write(frame)
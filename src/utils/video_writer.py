@@ -0,0 +1,98 @@
+import cv2
+import time
+import queue
+import threading
+
+class VideoWriter:
+    def __init__(self, output_video_path, frame_size, fps=24, fourcc='mp4v', queue_size=32):
+        # define VideoWriter for saving frames as video at given path, frame_size is (width, height)
+        self.writer = cv2.VideoWriter(output_video_path, cv2.VideoWriter_fourcc(*fourcc), fps, frame_size)
+        self.output_video_path = output_video_path
+
+        # bounded queue between renderer and encoder thread, keeps memory flat
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+
+        # throughput and stall statistics
+        self.frames_written = 0
+        self.stalls = 0
+        self.stall_seconds = 0
+        self.encode_seconds = 0
+        self.start_time = time.perf_counter()
+        self.stats = {}
+
+        # encode frames on background thread so rendering and encoding overlap
+        self.thread = threading.Thread(target=self.encode, daemon=True)
+        self.thread.start()
+
+    def encode(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+
+            # keep draining queue after an error so producer never blocks forever
+            if self.error is not None:
+                continue
+
+            try:
+                encode_start = time.perf_counter()
+                self.writer.write(frame)
+                self.encode_seconds += time.perf_counter() - encode_start
+                self.frames_written += 1
+            except Exception as e:
+                self.error = e
+
+    def write(self, frame):
+        if self.error is not None:
+            raise self.error
+
+        # frame must not be modified after it is handed over
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            # encoder is slower than renderer, wait for free slot and count the stall
+            stall_start = time.perf_counter()
+            self.queue.put(frame)
+            self.stalls += 1
+            self.stall_seconds += time.perf_counter() - stall_start
+
+    def close(self):
+        # flush remaining frames and close video writer
+        self.queue.put(None)
+        self.thread.join()
+        self.writer.release()
+
+        total_seconds = time.perf_counter() - self.start_time
+        self.stats = {
+            'frames': self.frames_written,
+            'seconds': total_seconds,
+            'fps': self.frames_written / total_seconds if total_seconds > 0 else 0,
+            'encode_fps': self.frames_written / self.encode_seconds if self.encode_seconds > 0 else 0,
+            'stalls': self.stalls,
+            'stall_seconds': self.stall_seconds,
+        }
+
+        if self.error is not None:
+            raise self.error
+
+        return self.stats
+
+    def report(self):
+        stats = self.stats
+        return (f"Wrote {stats['frames']} frames at {stats['fps']:.2f} frames/sec "
+                f"(encoder {stats['encode_fps']:.2f} frames/sec, {stats['stalls']} queue stalls, {stats['stall_seconds']:.2f}s waiting)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # on errors in with-block still stop encoder thread, but do not hide original error
+        if exc_type is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.writer.release()
+            return False
+
+        self.close()
+        return False
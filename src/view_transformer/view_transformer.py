@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+from src.track_store import TrackStore
 
 class ViewTransformer:
     def __init__(self):
@@ -26,43 +27,62 @@ class ViewTransformer:
         # compute the transformation matrix to map pixel coordinates to real-world coordinates
         self.perspective_transformer = cv2.getPerspectiveTransform(self.pixel_vertices, self.target_vertices)
     
-    def transform_point(self, point):
-        # convert to float32 (required for opencv)
-        point = np.array(point).astype(np.float32)  
-        p = tuple(point)
+    def is_inside(self, points):
+        # vectorized point-in-quad test, field polygon is convex so a point is inside (or on border)
+        # when it lies on the same side of all 4 edges, same result as cv2.pointPolygonTest(...) >= 0
+        vertices = self.pixel_vertices.astype(np.float64)
+        edges = np.roll(vertices, -1, axis=0) - vertices
+        to_points = points[:, None, :] - vertices[None, :, :]
+        cross = edges[None, :, 0] * to_points[:, :, 1] - edges[None, :, 1] * to_points[:, :, 0]
 
-        # ensure polygon is in the correct shape for opencv
-        polygon = self.pixel_vertices.reshape((-1, 1, 2)).astype(np.float32)
+        return np.all(cross >= 0, axis=1) | np.all(cross <= 0, axis=1)
 
-        # check if the point is inside the field
-        is_inside = cv2.pointPolygonTest(polygon, p, False) >= 0
-        if not is_inside:
-            return None  
+    def transform_points(self, points):
+        # convert to float32 (required for opencv), points is (N, 2) array of pixel positions
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        transformed_points = np.full(points.shape, np.nan, dtype=np.float32)
 
-        # reshape the point into the required format for transformation
-        reshaped_point = point.reshape(-1, 1, 2)
+        # check which points are inside the field (nan points are never inside)
+        inside = self.is_inside(points.astype(np.float64))
+        if not inside.any():
+            return transformed_points, inside
 
-        # apply perspective transformation
-        transformed_point = cv2.perspectiveTransform(reshaped_point, self.perspective_transformer)
+        # apply perspective transformation on all points inside the field with one call
+        transformed_points[inside] = cv2.perspectiveTransform(
+            points[inside].reshape(-1, 1, 2), self.perspective_transformer
+        ).reshape(-1, 2)
 
-        # reshape the result to a 2D format
-        transformed_point = transformed_point.reshape(-1, 2)
+        return transformed_points, inside
 
-        return transformed_point
+    def transform_point(self, point):
+        # single point version of transform_points
+        transformed_point, inside = self.transform_points([point])
+        if not inside[0]:
+            return None
 
+        return transformed_point
 
     def add_transformed_position_to_tracks(self, tracks):
+        # columnar tracks: transform adjusted positions of all rows at once
+        if isinstance(tracks, TrackStore):
+            rows = tracks.present['adjusted_position']
+            transformed_points, _ = self.transform_points(tracks.adjusted_position[rows])
+            # points outside field stay nan, which dict view returns as None
+            tracks.set_column('transformed_position', transformed_points, rows)
+            return
+
+        # collect adjusted positions of all objects in all frames
+        keys = []
+        positions = []
         for object, object_tracks in tracks.items():
             for frame_num, track in enumerate(object_tracks):
                 for track_id, track_info in track.items():
-                    # get the adjusted position of the object
-                    position = track_info['adjusted_position']
+                    keys.append((object, frame_num, track_id))
+                    positions.append(track_info['adjusted_position'])
 
-                    # transform the position to real-world coordinates
-                    transformed_position = self.transform_point(position)
+        # transform the positions to real-world coordinates
+        transformed_points, inside = self.transform_points(positions)
 
-                    if transformed_position is not None:
-                        transformed_position = np.squeeze(transformed_position).tolist()
-                    
-                    # save the transformed position back in the tracking data
-                    tracks[object][frame_num][track_id]['transformed_position'] = transformed_position
\ No newline at end of file
+        for (object, frame_num, track_id), transformed_point, is_inside in zip(keys, transformed_points.tolist(), inside):
+            # save the transformed position back in the tracking data
+            tracks[object][frame_num][track_id]['transformed_position'] = transformed_point if is_inside else None